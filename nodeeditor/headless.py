@@ -0,0 +1,40 @@
+import os, sys, json, argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from nodeeditor.node_headless import HeadlessScene
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Run a graph saved by the NodeEditor without GUI")
+    parser.add_argument("filename", help="graph file saved by the NodeEditor")
+    parser.add_argument("--stdin", action="store_true",
+                        help='after start read JSON lines {"node": <id>, "socket": <index>, "data": <value>} '
+                             'from stdin and feed them into the graph')
+    parser.add_argument("--profile", metavar="TRACE_FILE",
+                        help="profile the evaluation, print a report and save Chrome trace-event JSON to TRACE_FILE")
+    args = parser.parse_args()
+
+    scene = HeadlessScene()
+    scene.loadFromFile(args.filename)
+    scene.profiler.setEnabled(args.profile is not None)
+
+    try:
+        scene.run()
+
+        if args.stdin:
+            for line in sys.stdin:
+                line = line.strip()
+                if line == "":
+                    continue
+                try:
+                    message = json.loads(line)
+                    scene.feed(message["node"], message["data"], message.get("socket", 0))
+                except Exception as e:
+                    print("Invalid input line:", line, e)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if args.profile is not None:
+            scene.profiler.printReport()
+            scene.profiler.exportChromeTrace(args.profile)
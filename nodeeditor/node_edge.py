@@ -6,6 +6,7 @@ import math
 from collections import OrderedDict
 from nodeeditor.node_graphics_edge import QDMGraphicsEdge
 from nodeeditor.node_serializable import Serializable
+from nodeeditor.node_scene_evaluator import DELIVERY_EVERY, OVERFLOW_DROP_OLDEST
 from nodeeditor.utils_no_qt import dumpException
 
 
@@ -39,6 +40,14 @@ class Edge(Serializable):
 
             - **scene** - reference to the :class:`~nodeeditor.node_scene.Scene`
             - **grEdge** - Instance of :class:`~nodeeditor.node_graphics_edge.QDMGraphicsEdge` subclass handling graphical representation in the ``QGraphicsScene``.
+            - **delivery_policy** - how the :class:`~nodeeditor.node_scene_evaluator.SceneEvaluator` delivers data sent over this `Edge`. See :data:`~nodeeditor.node_scene_evaluator.DELIVERY_POLICIES`
+            - **queue_size** - maximal number of values queued on this `Edge` or ``0`` for no queue
+            - **overflow_policy** - what happens when the queue is full. See :data:`~nodeeditor.node_scene_evaluator.OVERFLOW_POLICIES`
+            - **queue_depth** - number of values currently waiting for delivery
+            - **dropped_count** - number of values dropped by the ``latest`` delivery policy or by queue overflow
+            - **blocked_count** - number of times the producer was blocked by a full queue
+            - **is_feedback** - ``True`` if this `Edge` closes a loop. Data sent over it is delivered on the next tick.
+              Set automatically by :class:`~nodeeditor.node_scene_topology.SceneTopology` when the `Edge` is created
         """
         super().__init__()
         self.scene = scene
@@ -46,12 +55,20 @@ class Edge(Serializable):
         # default init
         self._start_socket = None
         self._end_socket = None
+        self.grEdge = None
+        self.is_feedback = False
 
         self.start_socket = start_socket
         self.end_socket = end_socket
         self._edge_type = edge_type
 
         self.locked = False
+        self.delivery_policy = DELIVERY_EVERY
+        self.queue_size = 0
+        self.overflow_policy = OVERFLOW_DROP_OLDEST
+        self.queue_depth = 0
+        self.dropped_count = 0
+        self.blocked_count = 0
 
         # create Graphics Edge instance
         self.grEdge = self.createEdgeClassInstance()
@@ -64,6 +81,9 @@ class Edge(Serializable):
             hex(id(self))[2:5], hex(id(self))[-3:],
             self.start_socket, self.end_socket
         )
+    def onIDChanged(self, old_id):
+        self.scene.updateEdgeID(self, old_id)
+
     @property
     def start_socket(self):
         """
@@ -86,6 +106,7 @@ class Edge(Serializable):
         # addEdge to the Socket class
         if self.start_socket is not None:
             self.start_socket.addEdge(self)
+            self.updateTopology()
 
     @property
     def end_socket(self):
@@ -109,6 +130,7 @@ class Edge(Serializable):
         # addEdge to the Socket class
         if self.end_socket is not None:
             self.end_socket.addEdge(self)
+            self.updateTopology()
 
     @property
     def edge_type(self):
@@ -185,6 +207,61 @@ class Edge(Serializable):
             self.updatePositions()
         return self.grEdge
 
+    def hasDeliveryStats(self) -> bool:
+        """Returns ``True`` if data sent over this `Edge` is queued or can be dropped
+
+        :rtype: ``bool``
+        """
+        return self.queue_size > 0 or self.delivery_policy != DELIVERY_EVERY
+
+    def setDeliveryPolicy(self, delivery_policy: str = None, queue_size: int = None, overflow_policy: str = None):
+        """
+        Change how data is delivered over this `Edge`. ``None`` keeps the current value
+
+        :param delivery_policy: one of :data:`~nodeeditor.node_scene_evaluator.DELIVERY_POLICIES`
+        :type delivery_policy: ``str``
+        :param queue_size: maximal number of queued values or ``0`` for no queue
+        :type queue_size: ``int``
+        :param overflow_policy: one of :data:`~nodeeditor.node_scene_evaluator.OVERFLOW_POLICIES`
+        :type overflow_policy: ``str``
+        """
+        self.grEdge.prepareGeometryChange()
+        if delivery_policy is not None: self.delivery_policy = delivery_policy
+        if queue_size is not None: self.queue_size = queue_size
+        if overflow_policy is not None: self.overflow_policy = overflow_policy
+        self.grEdge.update()
+
+    def resetDeliveryStats(self):
+        """Reset the drop and block counters"""
+        self.dropped_count = 0
+        self.blocked_count = 0
+        self.onDeliveryStatsChanged()
+
+    def onDeliveryStatsChanged(self):
+        """Called by the :class:`~nodeeditor.node_scene_evaluator.SceneEvaluator` when queue depth or counters changed"""
+        if self.grEdge is not None: self.grEdge.update()
+
+    def updateTopology(self):
+        """Make this `Edge` a feedback `Edge` if it closes a loop"""
+        if not self.scene.topology.addEdge(self):
+            self.is_feedback = True
+            if self.grEdge is not None: self.grEdge.update()
+
+    def setFeedback(self, value: bool = True) -> bool:
+        """
+        Change if data sent over this `Edge` is delivered on the next tick. `Edges` which close a loop stay feedback
+        `Edges`
+
+        :param value: ``True`` to deliver on the next tick
+        :type value: ``bool``
+        :return: ``True`` if the `Edge` was changed as requested
+        :rtype: ``bool``
+        """
+        self.is_feedback = value
+        if not value: self.updateTopology()
+        if self.grEdge is not None: self.grEdge.update()
+        return self.is_feedback == value
+
     def getOtherSocket(self, known_socket:'Socket'):
         """
         Returns the opposite socket on this ``Edge``
@@ -311,15 +388,23 @@ class Edge(Serializable):
             ('end', self.end_socket.id if self.end_socket is not None else None),
             ('locked_status', self.locked),
             ('edge_visibility', self.grEdge.hiddenStatus),
+            ('delivery_policy', self.delivery_policy),
+            ('queue_size', self.queue_size),
+            ('overflow_policy', self.overflow_policy),
+            ('is_feedback', self.is_feedback),
         ])
 
     def deserialize(self, data:dict, hashmap:dict={}, restore_id:bool=True, *args, **kwargs) -> bool:
         if restore_id: self.id = data['id']
+        # before the sockets, so the saved feedback Edge closes the loop
+        self.is_feedback = data.get('is_feedback', False)
         self.start_socket = hashmap[data['start']]
         self.end_socket = hashmap[data['end']]
         self.edge_type = data['edge_type']
         self.grEdge.setLockedStatus(data['locked_status'])
         self.grEdge.hiddenStatus = data['edge_visibility']
+        self.setDeliveryPolicy(data.get('delivery_policy', DELIVERY_EVERY), data.get('queue_size', 0),
+                               data.get('overflow_policy', OVERFLOW_DROP_OLDEST))
 
 # Example: using validators for Edge
 # You can register edge validators wherever you want, even here...
@@ -4,12 +4,8 @@ A module containing ``NodeEditorWidget`` class
 """
 import json
 import os
-import pyclbr
-import re
 import sys
 import pip
-from os import listdir
-from os.path import isfile, join, abspath
 
 from PyQt5.QtCore import Qt, QPropertyAnimation, QRect, pyqtProperty
 from PyQt5.QtGui import QBrush, QPen, QFont, QColor, QIcon, QMouseEvent
@@ -21,12 +17,16 @@ from nodeeditor.node_node import Node
 from nodeeditor.node_edge import Edge, EDGE_TYPE_BEZIER, EDGE_TYPE_DIRECT, EDGE_TYPE_SQUARE
 from nodeeditor.node_graphics_view import QDMGraphicsView
 from nodeeditor.utils import dumpException
+from nodeeditor.node_plugin_registry import NodePluginRegistry
+from nodeeditor.node_scene_evaluator import DELIVERY_EVERY, DELIVERY_LATEST, DELIVERY_BATCH, \
+    OVERFLOW_BLOCK, OVERFLOW_DROP_OLDEST, OVERFLOW_DROP_NEWEST
 from nodeeditor.utils_no_qt import getNodeEditorDirectory, getStartNodeEditorDirectory
 
 
 class NodeEditorWidget(QWidget):
     Scene_class = Scene
     GraphicsView_class = QDMGraphicsView
+    NodePluginRegistry_class = NodePluginRegistry
 
     """The ``NodeEditorWidget`` class"""
     def __init__(self, parent:QWidget=None):
@@ -37,10 +37,14 @@ class NodeEditorWidget(QWidget):
         :Instance Attributes:
 
         - **filename** - currently graph's filename or ``None``
+        - **nodePluginRegistry** - Instance of :class:`~nodeeditor.node_plugin_registry.NodePluginRegistry` indexing the `Node` plugins
         """
         super().__init__(parent)
 
         self.filename = None
+        self.nodePluginRegistry = self.__class__.NodePluginRegistry_class(
+            os.path.relpath(getStartNodeEditorDirectory() + "/nodes", getStartNodeEditorDirectory()),
+            cache_filename=getNodeEditorDirectory() + "/user_res/node_registry_cache.json")
 
         self.initUI()
 
@@ -196,60 +200,52 @@ class NodeEditorWidget(QWidget):
             dumpException(e)
 
     def recursiveDirSearch(self, path, menu: QMenu, mainMenu: QMenu):
-        for d in [name for name in os.listdir(path) if os.path.isdir(os.path.join(path, name))]:
-            allFiles = []
-            for path2, subdirs, files in os.walk(path + "/" + d):
-                allFiles += [f for f in files if os.path.splitext(f)[1] in [".py", ".json"]]
-            if allFiles:
-                tempMenu = QMenu(d, menu)
+        for subpath in self.nodePluginRegistry.getSubdirectories(path):
+            if self.nodePluginRegistry.hasFiles(subpath):
+                tempMenu = QMenu(subpath.split("/")[-1], menu)
                 menu3 = menu.addMenu(tempMenu)
                 menu3.setProperty("menuType", "menu")
-                self.recursiveDirSearch(path + "/" + d, tempMenu, mainMenu)
-
-        for file in [f for f in listdir(path) if isfile(join(path, f)) and os.path.splitext(f)[1] in [".py", ".json"]]:
-            if file != "__init__.py":
-                if os.path.splitext(file)[1] == ".py":
-                    action = menu.addAction(file.replace(".py", "").replace("Node_", ""))
-                    action.setProperty("menuType", "item")
-                    action.setProperty("fileType", "py")
-                    action.setProperty("path", path)
-                    action.setProperty("fileName", file.replace(".py", ""))
-                elif os.path.splitext(file)[1] == ".json":
-                    action = menu.addAction(file.replace(".json", "").replace("Node_", "").replace("Nodes_", ""))
-                    action.setProperty("menuType", "item")
-                    action.setProperty("fileType", "json")
-                    action.setProperty("path", path)
-                    action.setProperty("fileName", file)
+                self.recursiveDirSearch(subpath, tempMenu, mainMenu)
+
+        for file in self.nodePluginRegistry.getFiles(path):
+            if os.path.splitext(file)[1] == ".py":
+                action = menu.addAction(file.replace(".py", "").replace("Node_", ""))
+                action.setProperty("menuType", "item")
+                action.setProperty("fileType", "py")
+                action.setProperty("path", path)
+                action.setProperty("fileName", file.replace(".py", ""))
+            elif os.path.splitext(file)[1] == ".json":
+                action = menu.addAction(file.replace(".json", "").replace("Node_", "").replace("Nodes_", ""))
+                action.setProperty("menuType", "item")
+                action.setProperty("fileType", "json")
+                action.setProperty("path", path)
+                action.setProperty("fileName", file)
         return menu
 
     def secondRecursiveDirSearch(self, path, mainMenu: QMenu):
-        for d in [name for name in os.listdir(path) if os.path.isdir(os.path.join(path, name))]:
-            allFiles = []
-            for path2, subdirs, files in os.walk(path + "/" + d):
-                allFiles += [f for f in files if os.path.splitext(f)[1] == ".py"]
-            if allFiles:
-                self.secondRecursiveDirSearch(path + "/" + d, mainMenu)
+        for subpath in self.nodePluginRegistry.getSubdirectories(path):
+            if self.nodePluginRegistry.hasFiles(subpath, (".py",)):
+                self.secondRecursiveDirSearch(subpath, mainMenu)
 
         section = mainMenu.addSection(path.split("/")[-1])
         section.setProperty("menuType", "section")
-        for file in [f for f in listdir(path) if isfile(join(path, f)) and os.path.splitext(f)[1] in [".py", ".json"]]:
-            if file != "__init__.py":
-                if os.path.splitext(file)[1] == ".py":
-                    action2 = mainMenu.addAction(file.replace(".py", "").replace("Node_", ""))
-                    action2.setVisible(False)
-                    action2.setProperty("menuType", "item")
-                    action2.setProperty("fileType", "py")
-                    action2.setProperty("itemType", "second")
-                    action2.setProperty("path", path)
-                    action2.setProperty("fileName", file.replace(".py", ""))
-                elif os.path.splitext(file)[1] == ".json":
-                    action2 = mainMenu.addAction(file.replace(".json", "").replace("Node_", "").replace("Nodes_", ""))
-                    action2.setVisible(False)
-                    action2.setProperty("menuType", "item")
-                    action2.setProperty("fileType", "json")
-                    action2.setProperty("itemType", "second")
-                    action2.setProperty("path", path)
-                    action2.setProperty("fileName", file)
+        for file in self.nodePluginRegistry.getFiles(path):
+            if os.path.splitext(file)[1] == ".py":
+                action2 = mainMenu.addAction(file.replace(".py", "").replace("Node_", ""))
+                action2.setVisible(False)
+                action2.setProperty("menuType", "item")
+                action2.setProperty("fileType", "py")
+                action2.setProperty("itemType", "second")
+                action2.setProperty("path", path)
+                action2.setProperty("fileName", file.replace(".py", ""))
+            elif os.path.splitext(file)[1] == ".json":
+                action2 = mainMenu.addAction(file.replace(".json", "").replace("Node_", "").replace("Nodes_", ""))
+                action2.setVisible(False)
+                action2.setProperty("menuType", "item")
+                action2.setProperty("fileType", "json")
+                action2.setProperty("itemType", "second")
+                action2.setProperty("path", path)
+                action2.setProperty("fileName", file)
 
         return mainMenu
 
@@ -281,6 +277,7 @@ class NodeEditorWidget(QWidget):
         # path = "../nodeeditor/nodes"
         # path = "nodeeditor/nodes"
 
+        self.nodePluginRegistry.refresh()
         context_menu = self.recursiveDirSearch(path, self.context_menu, self.context_menu)
         self.secondRecursiveDirSearch(path, self.context_menu)
 
@@ -355,23 +352,7 @@ class NodeEditorWidget(QWidget):
                     socket.grSocket.hiddenStatus = False
 
     def getNodeClassFromPath(self, path: str, fileName: str):
-        noteClass = None
-
-        try:
-            keys = list(pyclbr.readmodule(fileName, path=[path]).keys())
-            r = re.compile("Node_.*")
-            noteClasses = list(filter(r.match, keys))
-            if noteClasses:
-                noteClass = noteClasses[0]
-            if noteClass:
-                module = __import__(path.replace(".", "").lstrip("/").replace("/", ".").replace("\\", ".") + "." + fileName, fromlist=[path.replace("/", ".")])
-                node_class = getattr(module, noteClass)
-                return node_class
-        except ImportError:
-            print("ImportError")
-        except Exception as e:
-            dumpException(e)
-        return None
+        return self.nodePluginRegistry.getNodeClass(path, fileName)
 
     def handleEdgeContextMenu(self, event, edge_item):
 
@@ -392,6 +373,37 @@ class NodeEditorWidget(QWidget):
         directAct = typeMenu.addAction("Direct Edge")
         squareAct = typeMenu.addAction("Square Edge")
 
+        act = context_menu.addAction("Feedback (Next Tick)")
+        act.setCheckable(True)
+        act.setChecked(edge_item.edge.is_feedback)
+        act.setProperty("type", "feedback")
+
+        deliveryMenu = context_menu.addMenu("Delivery")
+        for policy, text in ((DELIVERY_EVERY, "Every Value"), (DELIVERY_LATEST, "Latest Value Only"), (DELIVERY_BATCH, "Batched")):
+            act = deliveryMenu.addAction(text)
+            act.setCheckable(True)
+            act.setChecked(edge_item.edge.delivery_policy == policy)
+            act.setProperty("type", "delivery")
+            act.setProperty("policy", policy)
+
+        queueMenu = context_menu.addMenu("Queue")
+        for size in (0, 1, 4, 16, 64, 256, 1024):
+            act = queueMenu.addAction(str(size) if size else "No Queue")
+            act.setCheckable(True)
+            act.setChecked(edge_item.edge.queue_size == size)
+            act.setProperty("type", "queue size")
+            act.setProperty("size", size)
+        queueMenu.addSeparator()
+        for policy, text in ((OVERFLOW_BLOCK, "Block Producer"), (OVERFLOW_DROP_OLDEST, "Drop Oldest"), (OVERFLOW_DROP_NEWEST, "Drop Newest")):
+            act = queueMenu.addAction(text)
+            act.setCheckable(True)
+            act.setChecked(edge_item.edge.overflow_policy == policy)
+            act.setProperty("type", "overflow")
+            act.setProperty("policy", policy)
+        queueMenu.addSeparator()
+        act = queueMenu.addAction("Reset Counters")
+        act.setProperty("type", "reset counters")
+
         action = context_menu.exec_(self.mapToGlobal(event.pos()))
 
         if action:
@@ -409,3 +421,19 @@ class NodeEditorWidget(QWidget):
                 edge_item.edge.edge_type = EDGE_TYPE_DIRECT
             elif action == squareAct:
                 edge_item.edge.edge_type = EDGE_TYPE_SQUARE
+            elif action.property("type") == "delivery":
+                edge_item.edge.setDeliveryPolicy(delivery_policy=action.property("policy"))
+                self.scene.history.storeHistory("Changed delivery policy of edge", setModified=True)
+            elif action.property("type") == "queue size":
+                edge_item.edge.setDeliveryPolicy(queue_size=action.property("size"))
+                self.scene.history.storeHistory("Changed queue size of edge", setModified=True)
+            elif action.property("type") == "overflow":
+                edge_item.edge.setDeliveryPolicy(overflow_policy=action.property("policy"))
+                self.scene.history.storeHistory("Changed overflow policy of edge", setModified=True)
+            elif action.property("type") == "feedback":
+                if edge_item.edge.setFeedback(action.isChecked()):
+                    self.scene.history.storeHistory("Changed feedback of edge", setModified=True)
+                else:
+                    QMessageBox.information(self, "Feedback Edge", "This edge closes a loop and has to stay a feedback edge.")
+            elif action.property("type") == "reset counters":
+                edge_item.edge.resetDeliveryStats()
@@ -3,14 +3,16 @@
 A module containing the Main Window class
 """
 import os, json
-from PyQt5.QtCore import QSize, QSettings, QPoint, Qt
+from PyQt5.QtCore import QSize, QSettings, QPoint, Qt, QTimer
 from PyQt5.QtGui import QColor, QPaintEvent, QPainter, QPen, QKeySequence
 from PyQt5.QtWidgets import QMainWindow, QLabel, QAction, QMessageBox, QFileDialog, QApplication, QGraphicsProxyWidget, \
-    QMenu, QColorDialog, QShortcut
+    QMenu, QColorDialog, QShortcut, QInputDialog
 
 from nodeeditor.appearance_color_widget import AppearanceColorWindow
 from nodeeditor.node_edge import Edge
 from nodeeditor.node_editor_widget import NodeEditorWidget
+from nodeeditor.node_scene_processes import getProcessPoolSize, setProcessPoolSize, shutdownProcessPool
+from nodeeditor.propertyAnimator import getAnimationClock
 from nodeeditor.utils_no_qt import dumpException
 
 from nodeeditor.node_edge_validators import (
@@ -72,9 +74,15 @@ class NodeEditorWindow(QMainWindow):
 
         self.createStatusBar()
 
+        # repaint profiler overlay while profiling
+        self.profilerOverlayTimer = QTimer(self)
+        self.profilerOverlayTimer.setInterval(500)
+        self.profilerOverlayTimer.timeout.connect(self.onProfilerOverlayTimeout)
+
         # set window properties
         # self.setGeometry(200, 200, 800, 600)
         self.setTitle()
+        self.updateMenus()
         self.show()
 
     def sizeHint(self):
@@ -122,6 +130,13 @@ class NodeEditorWindow(QMainWindow):
         self.actSnapToGrid = QAction('Snap To &Grid', self, statusTip="Toggles node snapping to grid", triggered=self.onSnapToGrid, checkable=True)
         self.actSnapToGridSquare = QAction('Snan To Grid &Square', self, statusTip="Toggles node snapping to grid squares", triggered=self.onSnapToGridSquare, checkable=True)
 
+        self.actProfiler = QAction('&Profiler', self, statusTip="Toggles profiling of node evaluation", triggered=self.onProfiler, checkable=True)
+        self.actProfilerReset = QAction('&Reset Profiler', self, statusTip="Reset collected profiling data", triggered=self.onProfilerReset)
+        self.actProfilerExport = QAction('&Export Profiler Trace...', self, statusTip="Save collected profiling data as Chrome trace", triggered=self.onProfilerExport)
+        self.actLazyEvaluation = QAction('&Lazy Evaluation', self, statusTip="Toggles evaluation of observed nodes only", triggered=self.onLazyEvaluation, checkable=True)
+        self.actAnimationRate = QAction('&Animation Rate Limit...', self, statusTip="Set number of evaluation animations per second above which they are skipped", triggered=self.onAnimationRate)
+        self.actProcessPoolSize = QAction('Process Pool &Size...', self, statusTip="Set number of worker processes for nodes running in process", triggered=self.onProcessPoolSize)
+
     def createMenus(self):
         """Create Menus for `File` and `Edit`"""
         self.createFileMenu()
@@ -177,9 +192,39 @@ class NodeEditorWindow(QMainWindow):
     def createToolsMenu(self):
         menubar = self.menuBar()
         self.toolsMenu = menubar.addMenu('&Tools')
+        self.toolsMenu.aboutToShow.connect(self.updateMenus)
         self.toolsMenu.addAction(self.actSnapToGrid)
         self.toolsMenu.addAction(self.actSnapToGridSquare)
 
+        self.toolsMenu.addSeparator()
+        self.toolsMenu.addAction(self.actProfiler)
+        self.toolsMenu.addAction(self.actProfilerReset)
+        self.toolsMenu.addAction(self.actProfilerExport)
+
+        self.toolsMenu.addSeparator()
+        self.toolsMenu.addAction(self.actLazyEvaluation)
+        self.toolsMenu.addAction(self.actProcessPoolSize)
+        self.toolsMenu.addAction(self.actAnimationRate)
+
+    def updateMenus(self):
+        """Update check states of the `Tools` actions from the current :class:`~nodeeditor.node_scene.Scene`.
+        MDI applications should call this when another subwindow gets activated"""
+        current_nodeeditor = self.getCurrentNodeEditorWidget()
+        for action in (self.actProfiler, self.actProfilerReset, self.actProfilerExport, self.actLazyEvaluation):
+            action.setEnabled(current_nodeeditor is not None)
+        if current_nodeeditor is None:
+            self.actProfiler.setChecked(False)
+            self.actLazyEvaluation.setChecked(False)
+            self.profilerOverlayTimer.stop()
+            return
+
+        self.actProfiler.setChecked(current_nodeeditor.scene.profiler.enabled)
+        self.actLazyEvaluation.setChecked(current_nodeeditor.scene.evaluator.lazy)
+        if current_nodeeditor.scene.profiler.enabled:
+            self.profilerOverlayTimer.start()
+        else:
+            self.profilerOverlayTimer.stop()
+
     def setTitle(self):
         """Function responsible for setting window title"""
         title = "Node Editor - "
@@ -195,6 +240,7 @@ class NodeEditorWindow(QMainWindow):
             for node in self.nodeeditor.scene.nodes:
                 if node.content:
                     node.content.removeContent()
+            shutdownProcessPool(wait=False)
             event.accept()
         else:
             event.ignore()
@@ -268,13 +314,14 @@ class NodeEditorWindow(QMainWindow):
 
     def getFileDialogFilter(self):
         """Returns ``str`` standard file open/save filter for ``QFileDialog``"""
-        return 'Graph (*.json);;All files (*)'
+        return 'Graph (*.json *.nedb);;Binary Graph (*.nedb);;All files (*)'
 
     def onFileNew(self):
         """Hande File New operation"""
         if self.maybeSave():
             self.getCurrentNodeEditorWidget().fileNew()
             self.setTitle()
+            self.updateMenus()
 
 
     def onFileOpen(self):
@@ -285,6 +332,7 @@ class NodeEditorWindow(QMainWindow):
             if fname != '' and os.path.isfile(fname):
                 self.getCurrentNodeEditorWidget().fileLoad(fname)
                 self.setTitle()
+                self.updateMenus()
 
     def onFileSave(self):
         """Handle File Save operation"""
@@ -477,6 +525,56 @@ class NodeEditorWindow(QMainWindow):
             self.nodeeditor.scene.grScene.isSnappingToGridSquares = False
         self.nodeeditor.scene.grScene.isSnappingToGrid = False
 
+    def onProfiler(self):
+        current_nodeeditor = self.getCurrentNodeEditorWidget()
+        if current_nodeeditor is None: return
+        current_nodeeditor.scene.profiler.setEnabled(self.actProfiler.isChecked())
+        if self.actProfiler.isChecked():
+            self.profilerOverlayTimer.start()
+        else:
+            self.profilerOverlayTimer.stop()
+        current_nodeeditor.scene.grScene.update()
+
+    def onProfilerReset(self):
+        current_nodeeditor = self.getCurrentNodeEditorWidget()
+        if current_nodeeditor is None: return
+        current_nodeeditor.scene.profiler.clear()
+        current_nodeeditor.scene.grScene.update()
+
+    def onProfilerExport(self):
+        current_nodeeditor = self.getCurrentNodeEditorWidget()
+        if current_nodeeditor is None: return
+        fname, filter = QFileDialog.getSaveFileName(self, 'Save profiler trace', self.getFileDialogDirectory(), "Chrome Trace (*.json);;All files (*)", "", QFileDialog.DontUseNativeDialog)
+        if fname == '': return
+        try:
+            current_nodeeditor.scene.profiler.exportChromeTrace(fname)
+            self.statusBar().showMessage("Successfully saved profiler trace as %s" % fname, 5000)
+        except Exception as e: dumpException(e)
+
+    def onProfilerOverlayTimeout(self):
+        current_nodeeditor = self.getCurrentNodeEditorWidget()
+        if current_nodeeditor is not None:
+            current_nodeeditor.scene.grScene.update()
+
+    def onLazyEvaluation(self):
+        current_nodeeditor = self.getCurrentNodeEditorWidget()
+        if current_nodeeditor is None: return
+        current_nodeeditor.scene.evaluator.setLazy(self.actLazyEvaluation.isChecked())
+        current_nodeeditor.scene.grScene.update()
+
+    def onProcessPoolSize(self):
+        size, ok = QInputDialog.getInt(self, "Process Pool Size", "Number of worker processes:", getProcessPoolSize(), 1, 256)
+        if ok:
+            setProcessPoolSize(size)
+            self.statusBar().showMessage("Process pool size set to %d" % size, 5000)
+
+    def onAnimationRate(self):
+        clock = getAnimationClock()
+        rate, ok = QInputDialog.getInt(self, "Animation Rate Limit", "Evaluation animations per second (0 = no limit):", clock.max_event_rate, 0, 1000000)
+        if ok:
+            clock.max_event_rate = rate
+            self.statusBar().showMessage("Animation rate limit set to %d per second" % rate, 5000)
+
     def onSelectAll(self):
         if self.getCurrentNodeEditorWidget():
             self.getCurrentNodeEditorWidget().scene.doSelectAllItems()
@@ -497,9 +595,14 @@ class NodeEditorWindow(QMainWindow):
         else:
             self.move(settings.value('pos', QPoint(200, 200)))
             self.resize(settings.value('size', QSize(400, 400)))
+        if settings.value('processPoolSize'):
+            setProcessPoolSize(int(settings.value('processPoolSize')))
+        if settings.value('maxAnimationEventRate') is not None:
+            getAnimationClock().max_event_rate = int(settings.value('maxAnimationEventRate'))
         if settings.value('lastFilename'):
             self.getCurrentNodeEditorWidget().fileLoad(settings.value('lastFilename'))
             self.setTitle()
+            self.updateMenus()
 
     def writeSettings(self):
         """Write the permanent profile settings for this app"""
@@ -507,4 +610,6 @@ class NodeEditorWindow(QMainWindow):
         settings.setValue('pos', self.pos())
         settings.setValue('maximized', self.isMaximized())
         settings.setValue('size', self.size())
+        settings.setValue('processPoolSize', getProcessPoolSize())
+        settings.setValue('maxAnimationEventRate', getAnimationClock().max_event_rate)
         settings.setValue('lastFilename', self.getCurrentNodeEditorWidget().filename)
@@ -3,7 +3,7 @@
 A module containing the Graphics representation of an Edge
 """
 from PyQt5.QtWidgets import QGraphicsPathItem, QWidget, QGraphicsItem
-from PyQt5.QtGui import QColor, QPen, QPainterPath
+from PyQt5.QtGui import QColor, QPen, QPainterPath, QFont
 from PyQt5.QtCore import Qt, QRectF, QPointF
 
 from nodeeditor.node_graphics_edge_path import GraphicsEdgePathBezier, GraphicsEdgePathDirect, GraphicsEdgePathSquare
@@ -70,6 +70,10 @@ class QDMGraphicsEdge(QGraphicsPathItem):
         self._pen_hovered.setWidthF(5.0)
         self._pen_hidden.setWidthF(3.0)
 
+        self._color_stats = QColor("#FFDDDDDD")
+        self._color_stats_dropped = QColor("#FFFF7070")
+        self._font_stats = QFont("Ubuntu", 8)
+
     def createEdgePathCalculator(self):
         """Create instance of :class:`~nodeeditor.node_graphics_edge_path.GraphicsEdgePathBase`"""
         self.pathCalculator = self.determineEdgePathClass()(self)
@@ -141,6 +145,14 @@ class QDMGraphicsEdge(QGraphicsPathItem):
     def hoverEnterEvent(self, event: 'QGraphicsSceneHoverEvent') -> None:
         """Handle hover effect"""
         self.hovered = True
+        lines = []
+        if self.edge.is_feedback:
+            lines.append("Feedback: delivered on the next tick")
+        if self.edge.hasDeliveryStats():
+            lines.append("Delivery: %s\nQueue: %d / %s (%s)\nDropped: %d\nBlocked: %d" % (
+                self.edge.delivery_policy, self.edge.queue_depth, self.edge.queue_size or "-",
+                self.edge.overflow_policy, self.edge.dropped_count, self.edge.blocked_count))
+        self.setToolTip("\n".join(lines))
         self.update()
 
     def hoverLeaveEvent(self, event: 'QGraphicsSceneHoverEvent') -> None:
@@ -170,7 +182,27 @@ class QDMGraphicsEdge(QGraphicsPathItem):
 
     def boundingRect(self) -> QRectF:
         """Defining Qt' bounding rectangle"""
-        return self.shape().boundingRect()
+        rect = self.shape().boundingRect()
+        if self.edge.hasDeliveryStats():
+            rect = rect.united(self.getStatsRect())
+        return rect
+
+    def getStatsRect(self) -> QRectF:
+        """Returns rectangle in the middle of the `Edge` where queue depth and drop counter are painted"""
+        center = self.calcPath().pointAtPercent(0.5)
+        return QRectF(center.x() - 40, center.y() - 20, 80, 14)
+
+    def getStatsText(self) -> str:
+        """Returns text with queue depth and drop counter of the `Edge`"""
+        text = "%d/%d" % (self.edge.queue_depth, self.edge.queue_size) if self.edge.queue_size > 0 else self.edge.delivery_policy
+        if self.edge.dropped_count: text += "  -%d" % self.edge.dropped_count
+        return text
+
+    def paintStats(self, painter):
+        """Paint queue depth and drop counter of the `Edge`"""
+        painter.setFont(self._font_stats)
+        painter.setPen(self._color_stats_dropped if self.edge.dropped_count else self._color_stats)
+        painter.drawText(self.getStatsRect(), Qt.AlignCenter, self.getStatsText())
 
     def shape(self) -> QPainterPath:
         """Returns ``QPainterPath`` representation of this `Edge`
@@ -215,8 +247,16 @@ class QDMGraphicsEdge(QGraphicsPathItem):
         else:
             painter.setPen(self._pen_hidden if not self.isSelected() else self._pen_selected)
 
+        if self.edge.is_feedback and self.edge.end_socket is not None:
+            pen = QPen(painter.pen())
+            pen.setStyle(Qt.DashDotLine)
+            painter.setPen(pen)
+
         painter.drawPath(self.path())
 
+        if self.edge.end_socket is not None and not self.hiddenStatus and self.edge.hasDeliveryStats():
+            self.paintStats(painter)
+
     def intersectsWith(self, p1:QPointF, p2:QPointF) -> bool:
         """Does this Graphics Edge intersect with the line between point A and point B ?
 
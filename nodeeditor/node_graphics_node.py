@@ -5,7 +5,7 @@ A module containing Graphics representation of :class:`~nodeeditor.node_node.Nod
 import math
 from turtle import isvisible
 
-from PyQt5.QtWidgets import QGraphicsItem, QWidget, QGraphicsTextItem, QMenu
+from PyQt5.QtWidgets import QGraphicsItem, QWidget, QGraphicsTextItem, QMenu, QInputDialog
 from PyQt5.QtGui import QFont, QColor, QPen, QBrush, QPainterPath, QImage, QFocusEvent, QPixmap, QIcon, \
     QContextMenuEvent
 from PyQt5.QtCore import Qt, QRectF, QPoint, QRect, QPointF, QEvent
@@ -55,7 +55,7 @@ class QDMGraphicsNode(QGraphicsItem):
         self.contextMenuInteractable = False
         self.scaleEvenlyByScaleIcon = False
 
-        self.animation = PropertyAnimator(startValue=0, endValue=1, duration=200, interval=50)
+        self.animation = PropertyAnimator(startValue=0, endValue=1, duration=200, interval=50, throttled=True)
         self.animation.update.connect(self.updateEvaluatedAnimation)
         self.animation.stop.connect(self.stopEvaluatedAnimation)
 
@@ -514,7 +514,8 @@ class QDMGraphicsNode(QGraphicsItem):
         self.showScaleRotResize(False)
 
     def removeGrNode(self):
-        pass
+        self.animation.cancelAnimation()
+        self.errorAnimation.cancelAnimation()
 
     def setLockedStatus(self, value: bool = True):
         if value:
@@ -552,6 +553,29 @@ class QDMGraphicsNode(QGraphicsItem):
         self.setFlag(QGraphicsItem.ItemIsSelectable, True)
         self.node.editNode()
 
+    def getHeatColor(self, heat: float) -> QColor:
+        """Returns color between green (``heat`` = 0) and red (``heat`` = 1) used by the profiler overlay"""
+        return QColor.fromHsvF((1 - min(max(heat, 0.0), 1.0)) / 3, 1.0, 1.0, 0.3 + 0.5 * heat)
+
+    def paintProfilerOverlay(self, painter, path_outline: QPainterPath, profiler: 'SceneProfiler'):
+        """Painting the outline colored by the time spent in this `Node` and its self time into the title"""
+        record = profiler.getNodeStats(self.node)
+        if record is None:
+            return
+        color = self.getHeatColor(profiler.getHeat(self.node))
+        pen = QPen(color)
+        pen.setWidthF(4.0)
+        painter.setPen(pen)
+        painter.setBrush(Qt.NoBrush)
+        painter.drawPath(path_outline.simplified())
+
+        if self.title_item.isVisible():
+            painter.setPen(color)
+            painter.setFont(self._title_font)
+            painter.drawText(QRectF(0, 0, self.width - self.title_horizontal_padding, self.title_height),
+                             Qt.AlignRight | Qt.AlignVCenter,
+                             "%dx %.2f ms" % (record.calls, record.self_time * 1e3))
+
     def paint(self, painter, QStyleOptionGraphicsItem, widget=None):
         """Painting the rounded rectanglar `Node`"""
         if self.title_item.isVisible():
@@ -599,6 +623,11 @@ class QDMGraphicsNode(QGraphicsItem):
             painter.setPen(self._pen_error_evaluated)
             painter.drawPath(path_outline.simplified())
 
+        # profiler heat overlay
+        profiler = self.node.scene.profiler
+        if profiler.enabled and profiler.show_overlay:
+            self.paintProfilerOverlay(painter, path_outline, profiler)
+
         if self.evaluationIconVisibility and self.drawEvaluationIcon:
             # status icon
             offset = 24.0
@@ -660,6 +689,19 @@ class HideIconItem(QGraphicsItem):
         changeAct = context_menu.addAction("Edit")
         changeAct.setProperty("actionType", "edit")
 
+        if self.grNode.node.canRunInProcess():
+            context_menu.addSeparator()
+            processAct = context_menu.addAction("Run in process")
+            processAct.setCheckable(True)
+            processAct.setChecked(self.grNode.node.run_in_process)
+            processAct.setProperty("actionType", "run in process")
+            sandboxAct = context_menu.addAction("Run in sandbox")
+            sandboxAct.setCheckable(True)
+            sandboxAct.setChecked(self.grNode.node.run_in_sandbox)
+            sandboxAct.setProperty("actionType", "run in sandbox")
+            sandboxLimitsAct = context_menu.addAction("Sandbox limits...")
+            sandboxLimitsAct.setProperty("actionType", "sandbox limits")
+
         context_menu.addSeparator()
         show_menu = context_menu.addMenu("Show ...")
         hide_menu = context_menu.addMenu("Hide ...")
@@ -723,6 +765,31 @@ class HideIconItem(QGraphicsItem):
             elif action.property("actionType") == "edit":
                 self.grNode.editNode(toAllSelected=True)
                 self.grNode.node.scene.history.storeHistory("Changed locked status to edit node", setModified=True)
+            elif action.property("actionType") == "run in process":
+                for item in self.grNode.node.scene.grScene.selectedItems():
+                    if isinstance(item, QDMGraphicsNode):
+                        item.node.setRunInProcess(action.isChecked())
+                self.grNode.node.setRunInProcess(action.isChecked())
+                self.grNode.node.scene.history.storeHistory("Changed process execution of node", setModified=True)
+            elif action.property("actionType") == "run in sandbox":
+                for item in self.grNode.node.scene.grScene.selectedItems():
+                    if isinstance(item, QDMGraphicsNode):
+                        item.node.setRunInSandbox(action.isChecked())
+                self.grNode.node.setRunInSandbox(action.isChecked())
+                self.grNode.node.scene.history.storeHistory("Changed sandbox execution of node", setModified=True)
+            elif action.property("actionType") == "sandbox limits":
+                node = self.grNode.node
+                time_budget, ok = QInputDialog.getDouble(None, "Sandbox limits", "Time budget per call in seconds",
+                                                         node.sandbox_time_budget, 0.01, 3600, 2)
+                if not ok: return
+                memory_limit, ok = QInputDialog.getInt(None, "Sandbox limits", "Memory limit in MB (0 = no limit)",
+                                                       (node.sandbox_memory_limit or 0) // 1024**2, 0, 1024**2)
+                if not ok: return
+                for item in node.scene.grScene.selectedItems():
+                    if isinstance(item, QDMGraphicsNode):
+                        item.node.setSandboxLimits(time_budget, memory_limit * 1024**2)
+                node.setSandboxLimits(time_budget, memory_limit * 1024**2)
+                node.scene.history.storeHistory("Changed sandbox limits of node", setModified=True)
             elif action.property("actionType") == "hide eval":
                 if self.grNode.node.scene.grScene.selectedItems() != []:
                     for item in self.grNode.node.scene.grScene.selectedItems():
@@ -0,0 +1,409 @@
+# -*- coding: utf-8 -*-
+"""
+A module containing the headless runtime. It executes graphs saved by :meth:`~nodeeditor.node_scene.Scene.saveToFile`
+without creating any ``QGraphicsItems`` or ``QWidgets``.
+
+`Node` classes support the headless runtime by pointing their ``HeadlessNode_class`` to a subclass of
+:class:`HeadlessNode` implementing the compute part of the `Node`. `Nodes` without headless support are loaded as
+plain :class:`HeadlessNode` which only stores its inputs.
+"""
+import os, json
+from collections import OrderedDict, deque
+
+from nodeeditor.node_serializable import Serializable
+from nodeeditor.node_scene_binary import iterSceneRecords, readBinarySceneRecords, isBinarySceneFile, InvalidBinaryFile
+from nodeeditor.node_scene_evaluator import SceneEvaluator, DELIVERY_EVERY, OVERFLOW_DROP_OLDEST
+from nodeeditor.node_scene_profiler import SceneProfiler
+from nodeeditor.node_scene_topology import SceneTopology
+from nodeeditor.utils_no_qt import dumpException, getNodeClassFromPath
+
+
+DEBUG = False
+
+NODEEDITOR_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+
+
+class InvalidFile(Exception): pass
+
+
+class HeadlessSocket(Serializable):
+    """Class representing compute part of :class:`~nodeeditor.node_socket.Socket`"""
+    def __init__(self, node: 'HeadlessNode', index: int = 0, is_input: bool = False):
+        super().__init__()
+        self.node = node
+        self.index = index
+        self.is_input = is_input
+        self.is_output = not self.is_input
+        self.edges = []
+
+    def addEdge(self, edge: 'HeadlessEdge'):
+        self.edges.append(edge)
+
+    def removeEdge(self, edge: 'HeadlessEdge'):
+        if edge in self.edges: self.edges.remove(edge)
+
+    def serialize(self) -> OrderedDict:
+        return OrderedDict([
+            ('id', self.id),
+            ('index', self.index),
+        ])
+
+    def deserialize(self, data: dict, hashmap: dict={}, restore_id: bool=True) -> bool:
+        if restore_id: self.id = data['id']
+        hashmap[data['id']] = self
+        return True
+
+
+class HeadlessEdge(Serializable):
+    """Class representing compute part of :class:`~nodeeditor.node_edge.Edge`"""
+    def __init__(self, scene: 'HeadlessScene', start_socket: HeadlessSocket = None, end_socket: HeadlessSocket = None):
+        super().__init__()
+        self.scene = scene
+        self.start_socket = start_socket
+        self.end_socket = end_socket
+        self.delivery_policy = DELIVERY_EVERY
+        self.queue_size = 0
+        self.overflow_policy = OVERFLOW_DROP_OLDEST
+        self.queue_depth = 0
+        self.dropped_count = 0
+        self.blocked_count = 0
+        self.is_feedback = False
+        self.scene.addEdge(self)
+
+    def getOtherSocket(self, known_socket: HeadlessSocket):
+        return self.start_socket if known_socket == self.end_socket else self.end_socket
+
+    def onDeliveryStatsChanged(self):
+        pass
+
+    def serialize(self) -> OrderedDict:
+        return OrderedDict([
+            ('id', self.id),
+            ('start', self.start_socket.id if self.start_socket is not None else None),
+            ('end', self.end_socket.id if self.end_socket is not None else None),
+            ('delivery_policy', self.delivery_policy),
+            ('queue_size', self.queue_size),
+            ('overflow_policy', self.overflow_policy),
+            ('is_feedback', self.is_feedback),
+        ])
+
+    def deserialize(self, data: dict, hashmap: dict={}, restore_id: bool=True) -> bool:
+        if restore_id: self.id = data['id']
+        self.start_socket = hashmap[data['start']]
+        self.end_socket = hashmap[data['end']]
+        self.delivery_policy = data.get('delivery_policy', DELIVERY_EVERY)
+        self.queue_size = data.get('queue_size', 0)
+        self.overflow_policy = data.get('overflow_policy', OVERFLOW_DROP_OLDEST)
+        self.is_feedback = data.get('is_feedback', False)
+        self.start_socket.addEdge(self)
+        self.end_socket.addEdge(self)
+        if not self.scene.topology.addEdge(self):
+            self.is_feedback = True
+        return True
+
+
+class HeadlessNode(Serializable):
+    """
+    Class representing compute part of :class:`~nodeeditor.node_node.Node`. It uses the same ``receiveData`` /
+    ``sendDataFromSocket`` interface so the compute code looks the same as in the `Node` classes.
+    """
+    offloadable = False
+    run_in_process = False
+    run_in_sandbox = False
+    process_compute = None
+    memoize = True
+    observed = False
+
+    def __init__(self, scene: 'HeadlessScene', title: str = "Undefined Node"):
+        """
+        :param scene: reference to the :class:`HeadlessScene`
+        :type scene: :class:`HeadlessScene`
+        :param title: Node Title
+        :type title: str
+
+        :Instance Attributes:
+
+            - **scene** - reference to the :class:`HeadlessScene`
+            - **inputs** - list containing Input :class:`HeadlessSocket` instances
+            - **outputs** - list containing Output :class:`HeadlessSocket` instances
+            - **content_data** - serialized content of the `Node` (``content`` entry of the saved `Node`)
+        """
+        super().__init__()
+        self.scene = scene
+        self.title = title
+        self._path = ""
+        self._filename = ""
+
+        self.inputs = []
+        self.outputs = []
+        self.inputValues = []
+        self.content_data = {}
+        self._is_dirty = False
+
+        self.scene.addNode(self)
+
+    def __str__(self):
+        return "<%s:%s %s..%s>" % (self.title, self.__class__.__name__, hex(id(self))[2:5], hex(id(self))[-3:])
+
+    def onIDChanged(self, old_id):
+        self.scene.updateNodeID(self, old_id)
+
+    def start(self):
+        """Called once after the whole graph was loaded. Source `Nodes` can send their initial values here.
+        This is supposed to be overridden"""
+        pass
+
+    def getContentValue(self, contentPartType: str, number: int = 0, default=None):
+        """
+        Helper returning value of a serialized content widget
+
+        :param contentPartType: type of the serialized widget (i.e. ``QSpinBox``, ``QLineEdit``)
+        :type contentPartType: ``str``
+        :param number: which widget of this type if there are multiple ones
+        :type number: ``int``
+        :param default: value returned if there is no such widget
+        :return: stored value of the widget or `default`
+        """
+        parts = [part for part in (self.content_data.get('serializedContent') or [])
+                 if part.get('ContentPartType') == contentPartType]
+        if number < len(parts):
+            return parts[number]['value']
+        return default
+
+    def getChildrenNodes(self) -> list:
+        return [other_node for other_node, index in self.getChildrenNodesAndSockets()]
+
+    def getDescendantNodes(self) -> list:
+        descendants, visited = [], {self}
+        queue = deque(self.getChildrenNodes())
+        while queue:
+            other_node = queue.popleft()
+            if other_node in visited: continue
+            visited.add(other_node)
+            descendants.append(other_node)
+            queue.extend(other_node.getChildrenNodes())
+        return descendants
+
+    def getChildrenEdges(self, index: int = -1) -> list:
+        children_edges = []
+        outputs = self.outputs if index < 0 else self.outputs[index:index+1]
+        for socket in outputs:
+            for edge in socket.edges:
+                other_socket = edge.getOtherSocket(socket)
+                if other_socket:
+                    children_edges.append((edge, other_socket.node, other_socket.index))
+        return children_edges
+
+    def getChildrenNodesAndSockets(self, index: int = -1) -> list:
+        other_nodes_and_sockets = []
+        outputs = self.outputs if index < 0 else self.outputs[index:index+1]
+        for socket in outputs:
+            for edge in socket.edges:
+                other_socket = edge.getOtherSocket(socket)
+                if other_socket:
+                    other_nodes_and_sockets.append([other_socket.node, other_socket.index])
+        return other_nodes_and_sockets
+
+    def sendDataFromSocket(self, data, outputSocketIndex: int = -1):
+        self.scene.evaluator.sendData(self, data, outputSocketIndex)
+
+    def receiveData(self, data, inputSocketIndex):
+        self.inputValues[inputSocketIndex] = data
+
+    def isObserved(self) -> bool:
+        return self.observed or len(self.outputs) == 0
+
+    def isDirty(self) -> bool:
+        return self._is_dirty
+
+    def markDirty(self, new_value: bool = True):
+        self._is_dirty = new_value
+
+    def markDescendantsDirty(self, new_value: bool = True):
+        for other_node in self.getDescendantNodes():
+            other_node.markDirty(new_value)
+
+    def invalidateMemo(self):
+        self.scene.evaluator.forgetInputs(self)
+
+    def compute(self, inputValues: list, inputSocketIndex: int):
+        return None
+
+    def onComputed(self, result):
+        if result is None: return
+        for outputSocketIndex, data in result:
+            self.sendDataFromSocket(data, outputSocketIndex)
+
+    def onComputeError(self, exception: Exception):
+        print("%s: %s" % (self.title, exception))
+
+    def serialize(self) -> OrderedDict:
+        return OrderedDict([
+            ('id', self.id),
+            ('_path', self._path),
+            ('_filename', self._filename),
+            ('title', self.title),
+            ('inputs', [socket.serialize() for socket in self.inputs]),
+            ('outputs', [socket.serialize() for socket in self.outputs]),
+            ('content', self.content_data),
+        ])
+
+    def deserialize(self, data: dict, hashmap: dict={}, restore_id: bool=True) -> bool:
+        if restore_id: self.id = data['id']
+        hashmap[data['id']] = self
+
+        self.title = data['title']
+        self._path = data['_path']
+        self._filename = data['_filename']
+        self.content_data = data.get('content', {})
+
+        self.inputs, self.outputs = [], []
+        for socket_data in sorted(data['inputs'], key=lambda socket: socket['index']):
+            socket = HeadlessSocket(self, socket_data['index'], is_input=True)
+            socket.deserialize(socket_data, hashmap, restore_id)
+            self.inputs.append(socket)
+        for socket_data in sorted(data['outputs'], key=lambda socket: socket['index']):
+            socket = HeadlessSocket(self, socket_data['index'], is_input=False)
+            socket.deserialize(socket_data, hashmap, restore_id)
+            self.outputs.append(socket)
+        self.inputValues = [None] * len(self.inputs)
+        return True
+
+
+class HeadlessScene(Serializable):
+    """Class representing compute part of :class:`~nodeeditor.node_scene.Scene`"""
+    def __init__(self):
+        """
+        :Instance Attributes:
+
+            - **nodes** - list of :class:`HeadlessNode` in this `Scene`
+            - **edges** - list of :class:`HeadlessEdge` in this `Scene`
+            - **evaluator** - Instance of :class:`~nodeeditor.node_scene_evaluator.SceneEvaluator`
+            - **profiler** - Instance of :class:`~nodeeditor.node_scene_profiler.SceneProfiler`
+            - **workers** - always ``None``, offloadable `Nodes` are computed synchronously
+            - **topology** - Instance of :class:`~nodeeditor.node_scene_topology.SceneTopology`
+        """
+        super().__init__()
+        self.nodes = []
+        self.edges = []
+        self._nodes_by_id = {}
+        self.filename = None
+        self.evaluator = SceneEvaluator(self)
+        self.profiler = SceneProfiler(self)
+        self.workers = None
+        self.topology = SceneTopology(self)
+
+    def addNode(self, node: HeadlessNode):
+        self.nodes.append(node)
+        self._nodes_by_id.setdefault(node.id, node)
+
+    def hasNode(self, node: HeadlessNode) -> bool:
+        return node.scene is self
+
+    def hasEdge(self, edge: HeadlessEdge) -> bool:
+        return edge.scene is self
+
+    def updateNodeID(self, node: HeadlessNode, old_id: int):
+        if self._nodes_by_id.get(old_id) is node: del self._nodes_by_id[old_id]
+        self._nodes_by_id.setdefault(node.id, node)
+
+    def addEdge(self, edge: HeadlessEdge):
+        self.edges.append(edge)
+
+    def getNodeByID(self, node_id: int):
+        return self._nodes_by_id.get(node_id)
+
+    def getNodeClassFromData(self, data: dict) -> 'HeadlessNode class':
+        """
+        Determine which :class:`HeadlessNode` class to instantiate for the serialized `Node`
+
+        :param data: serialized `Node` object data
+        :type data: ``dict``
+        :return: ``HeadlessNode_class`` of the `Node` class or :class:`HeadlessNode`
+        """
+        nodeClass = None
+        if data["_path"] != "" and data["_filename"] != "":
+            nodeClass = getNodeClassFromPath(data["_path"], data["_filename"], root=NODEEDITOR_DIRECTORY)
+
+        headlessClass = getattr(nodeClass, 'HeadlessNode_class', None)
+        if headlessClass is None:
+            print("Node '%s' has no headless support, it will only store its inputs" % data["title"])
+            return HeadlessNode
+        return headlessClass
+
+    def loadFromFile(self, filename: str):
+        """
+        Load saved `Scene` from a file on disk
+
+        :param filename: from what file to load the `Scene`
+        :type filename: ``str``
+        :raises: :class:`~nodeeditor.node_headless.InvalidFile` if there was an error decoding JSON or binary file
+        """
+        if isBinarySceneFile(filename):
+            with open(filename, "rb") as file:
+                try:
+                    self.filename = filename
+                    self.deserializeRecords(readBinarySceneRecords(file))
+                except InvalidBinaryFile as e:
+                    raise InvalidFile("%s is not a valid binary scene file: %s" % (os.path.basename(filename), e))
+            return
+
+        with open(filename, "r") as file:
+            raw_data = file.read()
+            try:
+                data = json.loads(raw_data)
+            except json.JSONDecodeError:
+                raise InvalidFile("%s is not a valid JSON file" % os.path.basename(filename))
+            self.filename = filename
+            self.deserialize(data)
+
+    def run(self):
+        """Start all `Nodes` and process the data they sent"""
+        for node in self.nodes:
+            try:
+                node.start()
+            except Exception as e: dumpException(e)
+        self.evaluator.evaluate()
+
+    def feed(self, node_id: int, data, inputSocketIndex: int = 0):
+        """
+        Deliver `data` into input `Socket` of the `Node` with `node_id` and evaluate the graph
+
+        :param node_id: id of the receiving `Node`
+        :type node_id: ``int``
+        :param data: data to be received
+        :param inputSocketIndex: index of the input `Socket`
+        :type inputSocketIndex: ``int``
+        """
+        node = self.getNodeByID(node_id)
+        if node is None:
+            print("Node with id %s not found" % node_id)
+            return
+        self.evaluator.scheduleData(node, data, inputSocketIndex)
+        self.evaluator.evaluate()
+
+    def serialize(self) -> OrderedDict:
+        return OrderedDict([
+            ('id', self.id),
+            ('nodes', [node.serialize() for node in self.nodes]),
+            ('edges', [edge.serialize() for edge in self.edges]),
+        ])
+
+    def deserialize(self, data: dict, hashmap: dict={}, restore_id: bool=True) -> bool:
+        return self.deserializeRecords(iterSceneRecords(data), hashmap, restore_id)
+
+    def deserializeRecords(self, records, hashmap: dict={}, restore_id: bool=True) -> bool:
+        hashmap = {}
+        for kind, record_data in records:
+            try:
+                if kind == 'scene':
+                    if restore_id: self.id = record_data['id']
+                elif kind == 'node':
+                    node = self.getNodeClassFromData(record_data)(self)
+                    node.deserialize(record_data, hashmap, restore_id)
+                elif kind == 'edge':
+                    HeadlessEdge(self).deserialize(record_data, hashmap, restore_id)
+            except InvalidBinaryFile: raise
+            except Exception as e: dumpException(e)
+
+        return True
@@ -2,10 +2,11 @@
 """
 A module containing NodeEditor's class for representing `Node`.
 """
-from collections import OrderedDict
+from collections import OrderedDict, deque
 from nodeeditor.node_graphics_node import QDMGraphicsNode
 from nodeeditor.node_content_widget import QDMNodeContentWidget
 from nodeeditor.node_serializable import Serializable
+from nodeeditor.node_scene_sandbox import SandboxProcess, SANDBOX_TIME_BUDGET, SANDBOX_MEMORY_LIMIT
 from nodeeditor.node_socket import Socket, LEFT_BOTTOM, LEFT_CENTER, LEFT_TOP, RIGHT_BOTTOM, RIGHT_CENTER, RIGHT_TOP
 from nodeeditor.utils_no_qt import dumpException, pp
 
@@ -19,6 +20,11 @@ class Node(Serializable):
     GraphicsNode_class = QDMGraphicsNode
     NodeContent_class = QDMNodeContentWidget
     Socket_class = Socket
+    HeadlessNode_class = None   #: :class:`~nodeeditor.node_headless.HeadlessNode` subclass used by the headless runtime
+    offloadable = False         #: ``True`` if :meth:`compute` can run in a worker thread
+    process_compute = None      #: module level function ``(state, inputValues, inputSocketIndex)`` which can run in a worker process
+    memoize = True              #: ``False`` for side-effecting `Nodes` which have to receive unchanged values again
+    observed = False            #: ``True`` if the outputs are shown or used outside of the graph, see :meth:`isObserved`
 
     def __init__(self, scene: 'Scene', title: str="Undefined Node", inputs: list=[], outputs: list=[]):
         """
@@ -37,6 +43,12 @@ class Node(Serializable):
             - **content** - Instance of :class:`~nodeeditor.node_graphics_content.QDMGraphicsContent` which is child of ``QWidget`` representing container for all inner widgets inside of the Node. Automatically created in the constructor
             - **inputs** - list containin Input :class:`~nodeeditor.node_socket.Socket` instances
             - **outputs** - list containin Output :class:`~nodeeditor.node_socket.Socket` instances
+            - **run_in_process** - ``True`` if ``process_compute`` should run in the process pool of
+              :mod:`~nodeeditor.node_scene_processes`
+            - **run_in_sandbox** - ``True`` if ``process_compute`` should run in own
+              :class:`~nodeeditor.node_scene_sandbox.SandboxProcess`
+            - **sandbox_time_budget** - number of seconds one call of the sandbox may take
+            - **sandbox_memory_limit** - address space limit of the sandbox process in bytes, ``0`` for no limit
 
         """
 
@@ -58,6 +70,11 @@ class Node(Serializable):
         self._path = ""
         self._filename = ""
         self.locked = False
+        self.run_in_process = False
+        self.run_in_sandbox = False
+        self.sandbox = None
+        self.sandbox_time_budget = SANDBOX_TIME_BUDGET
+        self.sandbox_memory_limit = SANDBOX_MEMORY_LIMIT
 
         self.scene.addNode(self)
         self.scene.grScene.addItem(self.grNode)
@@ -78,6 +95,9 @@ class Node(Serializable):
     def __str__(self):
         return "<%s:%s %s..%s>" % (self.title, self.__class__.__name__,hex(id(self))[2:5], hex(id(self))[-3:])
 
+    def onIDChanged(self, old_id):
+        self.scene.updateNodeID(self, old_id)
+
     @property
     def title(self):
         """
@@ -166,6 +186,7 @@ class Node(Serializable):
                 # remove grSockets from scene
                 for socket in (self.inputs+self.outputs):
                     self.scene.grScene.removeItem(socket.grSocket)
+                    self.scene.removeSocket(socket)
                 self.inputs = []
                 self.outputs = []
 
@@ -211,6 +232,8 @@ class Node(Serializable):
         :type socket: :class:`~nodeeditor.node_socket.Socket`
         """
         self.markDirty()
+        self.invalidateMemo()
+        self.scene.evaluator.pullNode(self)
         #self.markDescendantsDirty()
 
     def onOutputChanged(self, socket: 'Socket'):
@@ -330,6 +353,8 @@ class Node(Serializable):
         if DEBUG: print(" - remove grNode")
         self.grNode.removeGrNode()
         if self.content: self.content.removeContent()
+        if self.sandbox is not None: self.sandbox.stop()
+        self.scene.scheduler.cancel(self)
         self.scene.grScene.removeItem(self.grNode)
         self.grNode = None
         if DEBUG: print(" - remove node from the scene")
@@ -353,8 +378,10 @@ class Node(Serializable):
         :param new_value: ``True`` if this `Node` should be `Dirty`. ``False`` if you want to un-dirty this `Node`
         :type new_value: ``bool``
         """
+        changed = self._is_dirty != new_value
         self._is_dirty = new_value
         if self._is_dirty: self.onMarkedDirty()
+        if changed and self.grNode is not None: self.grNode.update()
 
     def onMarkedDirty(self):
         """Called when this `Node` has been marked as `Dirty`. This method is supposed to be overridden"""
@@ -375,9 +402,8 @@ class Node(Serializable):
         :param new_value: ``True`` if children and descendants should be `Dirty`. ``False`` if you want to un-dirty children and descendants
         :type new_value: ``bool``
         """
-        for other_node in self.getChildrenNodes():
+        for other_node in self.getDescendantNodes():
             other_node.markDirty(new_value)
-            other_node.markDescendantsDirty(new_value)
 
     def isInvalid(self) -> bool:
         """Is this node marked as `Invalid`?
@@ -415,9 +441,17 @@ class Node(Serializable):
         :param new_value: ``True`` if children and descendants should be `Invalid`. ``False`` if you want to make children and descendants valid
         :type new_value: ``bool``
         """
-        for other_node in self.getChildrenNodes():
+        for other_node in self.getDescendantNodes():
             other_node.markInvalid(new_value)
-            other_node.markDescendantsInvalid(new_value)
+
+    def isObserved(self) -> bool:
+        """Are the outputs of this `Node` observed? Observed `Nodes` and their ancestors are always evaluated, the
+        other `Nodes` only stay `Dirty` while the :class:`~nodeeditor.node_scene_evaluator.SceneEvaluator` is lazy
+
+        :return: ``True`` if ``observed`` is set or the `Node` has no outputs
+        :rtype: ``bool``
+        """
+        return self.observed or len(self.outputs) == 0
 
     def evalAfterDeserialize(self):
         """Evaluate this `Node` after the deserialize method was called. This is supposed to be overridden."""
@@ -490,6 +524,24 @@ class Node(Serializable):
                 other_nodes.append(other_node)
         return other_nodes
 
+    def getDescendantNodes(self) -> 'List[Node]':
+        """
+        Retrieve all children and descendants of this `Node`. Each `Node` is visited once, even if it can be
+        reached on several paths
+
+        :return: list of descendant `Nodes` in breadth first order, without this `Node`
+        :rtype: List[:class:`~nodeeditor.node_node.Node`]
+        """
+        descendants, visited = [], {self}
+        queue = deque(self.getChildrenNodes())
+        while queue:
+            other_node = queue.popleft()
+            if other_node in visited: continue
+            visited.add(other_node)
+            descendants.append(other_node)
+            queue.extend(other_node.getChildrenNodes())
+        return descendants
+
 
     def getInput(self, index: int=0) -> ['Node', None]:
         """
@@ -602,6 +654,25 @@ class Node(Serializable):
 
     # functions for the newer version... with sendData and receiveData
 
+    def getChildrenEdges(self, index: int = -1) -> list:
+        """
+        Returns `Edges` going from the output `Socket` with `index` (or from all outputs if ``-1``) together with
+        the connected `Nodes`
+
+        :param index: index of the output `Socket` or ``-1`` for all outputs
+        :type index: ``int``
+        :return: list of ``(edge, other_node, inputSocketIndex)``
+        :rtype: ``list``
+        """
+        outputs = self.outputs if index < 0 else self.outputs[index:index+1]
+        children_edges = []
+        for socket in outputs:
+            for edge in socket.edges:
+                other_socket = edge.getOtherSocket(socket)
+                if other_socket:
+                    children_edges.append((edge, other_socket.node, other_socket.index))
+        return children_edges
+
     def getChildrenNodesAndSockets(self, index: int = -1) -> 'List[Node]':
         if self.outputs == []: return []
         other_nodes_and_sockets = []
@@ -622,14 +693,118 @@ class Node(Serializable):
         return other_nodes_and_sockets
 
     def sendDataFromSocket(self, data, outputSocketIndex: int = -1):
-        for nodes_and_sockets in self.getChildrenNodesAndSockets(outputSocketIndex):
-            nodes_and_sockets[0].receiveData(data, nodes_and_sockets[1])
+        """Send `data` to all `Nodes` connected to the output `Socket`. The delivery is scheduled by
+        :class:`~nodeeditor.node_scene_evaluator.SceneEvaluator`
+
+        :param data: data to be sent
+        :param outputSocketIndex: index of the output `Socket` or ``-1`` for all outputs
+        :type outputSocketIndex: ``int``
+        """
+        self.scene.evaluator.sendData(self, data, outputSocketIndex)
 
     def receiveData(self, data, inputSocketIndex):
         self.inputValues[inputSocketIndex] = data
         if self.grNode.showEvaluatedAnimation:
             self.grNode.animation.startAnimation()
 
+    def invalidateMemo(self):
+        """Forget the last inputs of this `Node`, so the next data is evaluated even if it is unchanged. Call this
+        when a parameter of the `Node` changes the result"""
+        self.scene.evaluator.forgetInputs(self)
+
+    def compute(self, inputValues: list, inputSocketIndex: int):
+        """
+        Heavy computation of an ``offloadable`` `Node`. It is called after :meth:`receiveData` and runs in a worker
+        thread of :class:`~nodeeditor.node_scene_workers.SceneWorkerPool`, so it must not touch any widgets or
+        graphics items. This is supposed to be overridden.
+
+        :param inputValues: copy of ``inputValues`` at the time the data arrived
+        :type inputValues: ``list``
+        :param inputSocketIndex: index of the input `Socket` which triggered the computation or ``-1``
+        :type inputSocketIndex: ``int``
+        :return: list of ``(outputSocketIndex, data)`` to be sent or ``None``
+        """
+        if self.run_in_sandbox and self.process_compute is not None:
+            return self.getSandbox().call(self.process_compute, self.getProcessState(), inputValues, inputSocketIndex)
+        if self.process_compute is not None:
+            return self.process_compute(self.getProcessState(), inputValues, inputSocketIndex)
+        return None
+
+    def canRunInProcess(self) -> bool:
+        """Returns ``True`` if this `Node` provides ``process_compute`` and can be moved to the process pool
+
+        :rtype: ``bool``
+        """
+        return self.process_compute is not None
+
+    def setRunInProcess(self, value: bool = True):
+        """Move computation of this `Node` to the process pool or back to the GUI process
+
+        :param value: ``True`` to compute in a worker process
+        :type value: ``bool``
+        """
+        self.run_in_process = value and self.canRunInProcess()
+        if self.run_in_process: self.setRunInSandbox(False)
+
+    def setRunInSandbox(self, value: bool = True):
+        """Move computation of this `Node` to its own sandbox process or back to the GUI process. Switching the
+        sandbox off stops the process
+
+        :param value: ``True`` to compute in a sandbox process
+        :type value: ``bool``
+        """
+        self.run_in_sandbox = value and self.canRunInProcess()
+        if self.run_in_sandbox:
+            self.run_in_process = False
+        elif self.sandbox is not None:
+            self.sandbox.stop()
+            self.sandbox = None
+
+    def setSandboxLimits(self, time_budget: float = SANDBOX_TIME_BUDGET, memory_limit: int = SANDBOX_MEMORY_LIMIT):
+        """Change the limits of the sandbox process. A running process is stopped, the next computation starts a new
+        one with the new limits
+
+        :param time_budget: number of seconds one call may take
+        :type time_budget: ``float``
+        :param memory_limit: address space limit of the process in bytes, ``0`` for no limit
+        :type memory_limit: ``int``
+        """
+        if time_budget == self.sandbox_time_budget and memory_limit == self.sandbox_memory_limit: return
+        self.sandbox_time_budget = time_budget
+        self.sandbox_memory_limit = memory_limit
+        if self.sandbox is not None:
+            self.sandbox.stop()
+            self.sandbox = None
+
+    def getSandbox(self) -> SandboxProcess:
+        """Returns the :class:`~nodeeditor.node_scene_sandbox.SandboxProcess` of this `Node`, it is created with the
+        first call"""
+        if self.sandbox is None:
+            self.sandbox = SandboxProcess(self.sandbox_time_budget, self.sandbox_memory_limit)
+        return self.sandbox
+
+    def getProcessState(self):
+        """
+        Picklable state passed as first argument to ``process_compute`` (i.e. the script of the `Node`). It is
+        collected in the GUI thread when the computation is submitted. This is supposed to be overridden.
+        """
+        return None
+
+    def onComputed(self, result):
+        """
+        Called in the GUI thread with the result of :meth:`compute`. Sends the data to the output `Sockets`
+
+        :param result: list of ``(outputSocketIndex, data)`` or ``None``
+        """
+        if result is None: return
+        for outputSocketIndex, data in result:
+            self.sendDataFromSocket(data, outputSocketIndex)
+
+    def onComputeError(self, exception: Exception):
+        """Called in the GUI thread when :meth:`compute` raised `exception`"""
+        self.grNode.setToolTip(str(exception))
+        self.grNode.errorAnimation.startAnimation()
+
 
     # serialization functions
 
@@ -666,7 +841,11 @@ class Node(Serializable):
             ('inputs', inputs),
             ('outputs', outputs),
             ('content', ser_content),
-            ('showaEvalAnimation', self.grNode.animation.isEnable())
+            ('showaEvalAnimation', self.grNode.animation.isEnable()),
+            ('run_in_process', self.run_in_process),
+            ('run_in_sandbox', self.run_in_sandbox),
+            ('sandbox_time_budget', self.sandbox_time_budget),
+            ('sandbox_memory_limit', self.sandbox_memory_limit),
         ])
 
     def deserialize(self, data: dict, hashmap: dict={}, restore_id: bool=True, *args, **kwargs) -> bool:
@@ -695,6 +874,10 @@ class Node(Serializable):
             self.grNode.showScaleRotResize(data['grnode_show_resize_icon'], "RESIZE")
             self.grNode.showHideIcon(data['hide_item_visibility'])
             self.grNode.animation.setEnable(data['showaEvalAnimation'])
+            self.setRunInProcess(data.get('run_in_process', False))
+            self.setRunInSandbox(data.get('run_in_sandbox', False))
+            self.setSandboxLimits(data.get('sandbox_time_budget', SANDBOX_TIME_BUDGET),
+                                  data.get('sandbox_memory_limit', SANDBOX_MEMORY_LIMIT))
 
             data['inputs'].sort(key=lambda socket: socket['index'] + socket['position'] * 10000 )
             data['outputs'].sort(key=lambda socket: socket['index'] + socket['position'] * 10000 )
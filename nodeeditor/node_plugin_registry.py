@@ -0,0 +1,226 @@
+# -*- coding: utf-8 -*-
+"""
+A module containing the registry of `Node` plugins (``Node_*.py`` modules and ``*.json`` node groups) found in the
+``nodes`` directory
+"""
+import os, re, json, importlib
+from time import monotonic
+
+from nodeeditor.utils_no_qt import dumpException, getNodeClassFromPath, getNodeModuleName
+
+DEBUG = False
+
+NODE_CLASS_PATTERN = re.compile(r"^class\s+(Node_\w+)", re.MULTILINE)
+PLUGIN_EXTENSIONS = (".py", ".json")
+CACHE_VERSION = 1
+
+
+class NodePluginRegistry():
+    """Class indexing the `Node` plugins once and serving the context menu and `Node` class lookups from memory.
+
+    Every directory is stored with its modification time and the modification times of its plugins. :meth:`refresh`
+    only ``stat``-s the directories and plugins and rescans directories where anything changed, so adding, removing,
+    renaming and editing plugins is picked up. Modules are imported lazily when their `Node` class is requested for
+    the first time and reloaded when the file changed since. The index is stored in `cache_filename` so even the
+    first right-click after start doesn't need to walk the whole tree.
+    """
+    def __init__(self, path: str = "nodes", cache_filename: str = None, check_interval: float = 1.0):
+        """
+        :param path: directory with plugins, relative paths are stored in the saved `Nodes` as ``_path``
+        :type path: ``str``
+        :param cache_filename: file where the index is stored between sessions or ``None``
+        :type cache_filename: ``str``
+        :param check_interval: minimal number of seconds between two checks of the directory modification times
+        :type check_interval: ``float``
+
+        :Instance Attributes:
+
+        - **path** - directory with plugins
+        - **directories** - ``dict`` of ``path: {'mtime', 'dirs', 'files'}``
+        """
+        self.path = path
+        self.cache_filename = cache_filename
+        self.check_interval = check_interval
+
+        self.directories = {}
+        self._classes = {}
+        self._last_check = None
+
+        self.loadCache()
+
+    def loadCache(self):
+        """Load the index stored by :meth:`saveCache`"""
+        if self.cache_filename is None or not os.path.isfile(self.cache_filename):
+            return
+        try:
+            with open(self.cache_filename, "r") as file:
+                data = json.loads(file.read())
+            if data.get('version') == CACHE_VERSION and data.get('path') == self.path:
+                self.directories = data['directories']
+        except Exception as e:
+            if DEBUG: print("REGISTRY: invalid cache", self.cache_filename, e)
+            self.directories = {}
+
+    def saveCache(self):
+        """Store the index into `cache_filename`"""
+        if self.cache_filename is None:
+            return
+        try:
+            with open(self.cache_filename, "w") as file:
+                file.write(json.dumps({'version': CACHE_VERSION, 'path': self.path, 'directories': self.directories}))
+        except Exception as e: dumpException(e)
+
+    def refresh(self, force: bool = False) -> bool:
+        """
+        Check modification times of all directories and rescan changed ones. Checks are throttled by
+        `check_interval` unless `force` is ``True``
+
+        :return: ``True`` if the index has changed
+        :rtype: ``bool``
+        """
+        now = monotonic()
+        if not force and self._last_check is not None and now - self._last_check < self.check_interval:
+            return False
+        self._last_check = now
+
+        seen = set()
+        changed = self.refreshDirectory(self.path, seen)
+        for path in [path for path in self.directories if path not in seen]:
+            del self.directories[path]
+            changed = True
+
+        if changed:
+            if DEBUG: print("REGISTRY: index changed, saving cache")
+            self.saveCache()
+        return changed
+
+    def refreshDirectory(self, path: str, seen: set) -> bool:
+        """Rescan `path` if its modification time changed and continue with its subdirectories"""
+        seen.add(path)
+        changed = False
+        try:
+            mtime = os.stat(path).st_mtime
+        except OSError:
+            return False
+
+        entry = self.directories.get(path)
+        if entry is None or entry['mtime'] != mtime or self.filesChanged(path, entry):
+            entry = self.scanDirectory(path, mtime, entry)
+            self.directories[path] = entry
+            changed = True
+
+        for name in entry['dirs']:
+            changed = self.refreshDirectory(path + "/" + name, seen) or changed
+        return changed
+
+    def filesChanged(self, path: str, entry: dict) -> bool:
+        """Returns ``True`` if a plugin of `entry` was modified in place, which doesn't change the directory"""
+        for file in entry['files']:
+            try:
+                if os.stat(path + "/" + file[0]).st_mtime != file[1]:
+                    return True
+            except OSError:
+                return True
+        return False
+
+    def scanDirectory(self, path: str, mtime: float, old_entry: dict = None) -> dict:
+        """
+        List plugins and subdirectories of `path`. Class names of unchanged modules are reused from `old_entry`
+
+        :return: ``{'mtime': float, 'dirs': [name, ...], 'files': [[fileName, mtime, className], ...]}``
+        :rtype: ``dict``
+        """
+        if DEBUG: print("REGISTRY: scanning", path)
+        old_files = {file[0]: file for file in old_entry['files']} if old_entry else {}
+        dirs, files = [], []
+        for entry in sorted(os.scandir(path), key=lambda entry: entry.name):
+            if entry.is_dir():
+                if entry.name != "__pycache__": dirs.append(entry.name)
+            elif os.path.splitext(entry.name)[1] in PLUGIN_EXTENSIONS and entry.name != "__init__.py":
+                file_mtime = entry.stat().st_mtime
+                old_file = old_files.get(entry.name)
+                if old_file is not None and old_file[1] == file_mtime:
+                    files.append(old_file)
+                else:
+                    files.append([entry.name, file_mtime, self.readNodeClassName(entry.path)])
+        return {'mtime': mtime, 'dirs': dirs, 'files': files}
+
+    def readNodeClassName(self, filename: str) -> str:
+        """Returns name of the first class starting with ``Node_`` in python module `filename` or ``None``"""
+        if not filename.endswith(".py"):
+            return None
+        try:
+            with open(filename, "r", encoding="utf-8") as file:
+                match = NODE_CLASS_PATTERN.search(file.read())
+            return match.group(1) if match else None
+        except Exception as e:
+            dumpException(e)
+            return None
+
+    def getSubdirectories(self, path: str) -> list:
+        """Returns list of paths of subdirectories of `path`"""
+        entry = self.directories.get(path)
+        return [path + "/" + name for name in entry['dirs']] if entry else []
+
+    def getFiles(self, path: str, extensions: tuple = PLUGIN_EXTENSIONS) -> list:
+        """Returns list of plugin file names with one of the `extensions` directly in `path`"""
+        entry = self.directories.get(path)
+        if entry is None:
+            return []
+        return [file[0] for file in entry['files'] if os.path.splitext(file[0])[1] in extensions]
+
+    def hasFiles(self, path: str, extensions: tuple = PLUGIN_EXTENSIONS) -> bool:
+        """Returns ``True`` if `path` or any of its subdirectories contains a plugin with one of the `extensions`"""
+        if self.getFiles(path, extensions):
+            return True
+        return any(self.hasFiles(subpath, extensions) for subpath in self.getSubdirectories(path))
+
+    def getFileEntry(self, path: str, fileName: str) -> list:
+        """Returns ``[fileName, mtime, className]`` of module `fileName` located in `path` or ``None``"""
+        entry = self.directories.get(path)
+        if entry is None:
+            return None
+        for file in entry['files']:
+            if file[0] == fileName + ".py":
+                return file
+        return None
+
+    def getNodeClassName(self, path: str, fileName: str) -> str:
+        """Returns name of the `Node` class in module `fileName` located in `path` or ``None``"""
+        file = self.getFileEntry(path, fileName)
+        return file[2] if file else None
+
+    def getNodeClass(self, path: str, fileName: str):
+        """
+        Import the module `fileName` located in `path` if needed and return its `Node` class. Falls back to
+        :func:`~nodeeditor.utils_no_qt.getNodeClassFromPath` for modules outside of the index
+
+        :param path: path of the node module (i.e. ``nodes/Math``)
+        :type path: ``str``
+        :param fileName: module name without extension
+        :type fileName: ``str``
+        :return: `Node` class or ``None``
+        """
+        self.refresh()
+        file = self.getFileEntry(path, fileName)
+        if file is None or file[2] is None:
+            return getNodeClassFromPath(path, fileName)
+        mtime, className = file[1], file[2]
+
+        key = (path, fileName)
+        cached = self._classes.get(key)
+        if cached is not None and cached[1] == mtime and cached[0].__name__ == className:
+            return cached[0]
+
+        try:
+            module = importlib.import_module(getNodeModuleName(path, fileName))
+            if cached is not None:
+                module = importlib.reload(module)
+            node_class = getattr(module, className)
+            self._classes[key] = (node_class, mtime)
+            return node_class
+        except ImportError:
+            print("ImportError")
+        except Exception as e:
+            dumpException(e)
+        return None
@@ -4,9 +4,10 @@ A module containing the representation of the NodeEditor's Scene
 """
 import os, sys, json
 from collections import OrderedDict
+from functools import partial
 from random import randint
 
-from PyQt5.QtCore import QPointF
+from PyQt5.QtCore import QPointF, QTimer
 from PyQt5.QtGui import QColor
 
 from nodeeditor.utils_no_qt import dumpException, pp
@@ -16,6 +17,13 @@ from nodeeditor.node_node import Node
 from nodeeditor.node_edge import Edge
 from nodeeditor.node_scene_history import SceneHistory
 from nodeeditor.node_scene_clipboard import SceneClipboard
+from nodeeditor.node_scene_binary import iterSceneRecords, readBinarySceneRecords, writeBinaryScene, \
+    isBinarySceneFile, InvalidBinaryFile, BINARY_FILE_EXTENSION
+from nodeeditor.node_scene_evaluator import SceneEvaluator
+from nodeeditor.node_scene_profiler import SceneProfiler
+from nodeeditor.node_scene_scheduler import SceneScheduler
+from nodeeditor.node_scene_topology import SceneTopology
+from nodeeditor.node_scene_workers import SceneWorkerPool
 from nodeeditor.var_type_conf import TYPE_COLORS, EDGE_COLOR, EVAL_HIGHLIGHT_COLOR
 
 
@@ -35,12 +43,23 @@ class Scene(Serializable):
             - **edges** - list of `Edges` in this `Scene`
             - **history** - Instance of :class:`~nodeeditor.node_scene_history.SceneHistory`
             - **clipboard** - Instance of :class:`~nodeeditor.node_scene_clipboard.SceneClipboard`
+            - **evaluator** - Instance of :class:`~nodeeditor.node_scene_evaluator.SceneEvaluator`
+            - **profiler** - Instance of :class:`~nodeeditor.node_scene_profiler.SceneProfiler`
+            - **workers** - Instance of :class:`~nodeeditor.node_scene_workers.SceneWorkerPool`
+            - **topology** - Instance of :class:`~nodeeditor.node_scene_topology.SceneTopology`
+            - **scheduler** - Instance of :class:`~nodeeditor.node_scene_scheduler.SceneScheduler`
             - **scene_width** - width of this `Scene` in pixels
             - **scene_height** - height of this `Scene` in pixels
         """
         super().__init__()
-        self.nodes = []
-        self.edges = []
+        # ordered membership of nodes/edges and indexes by id. Lists are built lazily for the nodes/edges properties
+        self._nodes = OrderedDict()
+        self._edges = OrderedDict()
+        self._nodes_list = []
+        self._edges_list = []
+        self._nodes_by_id = {}
+        self._edges_by_id = {}
+        self._sockets_by_id = {}
 
         # current filename assigned to this scene
         self.filename = None
@@ -66,10 +85,41 @@ class Scene(Serializable):
         self.initGlobalColors()
         self.history = SceneHistory(self)
         self.clipboard = SceneClipboard(self)
+        self.evaluator = SceneEvaluator(self, deferCall=partial(QTimer.singleShot, 0))
+        self.profiler = SceneProfiler(self)
+        self.workers = SceneWorkerPool(self)
+        self.topology = SceneTopology(self)
+        self.scheduler = SceneScheduler(self)
 
         self.grScene.itemSelected.connect(self.onItemSelected)
         self.grScene.itemsDeselected.connect(self.onItemsDeselected)
 
+    @property
+    def nodes(self) -> list:
+        """
+        `Nodes` in this `Scene` in order of their addition
+
+        :getter: Returns list of :class:`~nodeeditor.node_node.Node`. Don't modify it, use :meth:`addNode` and
+            :meth:`removeNode`
+        :type: ``list``
+        """
+        if self._nodes_list is None:
+            self._nodes_list = list(self._nodes)
+        return self._nodes_list
+
+    @property
+    def edges(self) -> list:
+        """
+        `Edges` in this `Scene` in order of their addition
+
+        :getter: Returns list of :class:`~nodeeditor.node_edge.Edge`. Don't modify it, use :meth:`addEdge` and
+            :meth:`removeEdge`
+        :type: ``list``
+        """
+        if self._edges_list is None:
+            self._edges_list = list(self._edges)
+        return self._edges_list
+
     @property
     def has_been_modified(self):
         """
@@ -129,10 +179,41 @@ class Scene(Serializable):
         :type node_id: ``int``
         :return: Found ``Node`` or ``None``
         """
-        for node in self.nodes:
-            if node.id == node_id:
-                return node
-        return None
+        return self._nodes_by_id.get(node_id)
+
+    def getEdgeByID(self, edge_id: int):
+        """
+        Find edge in the scene according to provided `edge_id`
+
+        :param edge_id: ID of the edge we are looking for
+        :type edge_id: ``int``
+        :return: Found ``Edge`` or ``None``
+        """
+        return self._edges_by_id.get(edge_id)
+
+    def getSocketByID(self, socket_id: int):
+        """
+        Find socket of any node in the scene according to provided `socket_id`
+
+        :param socket_id: ID of the socket we are looking for
+        :type socket_id: ``int``
+        :return: Found ``Socket`` or ``None``
+        """
+        return self._sockets_by_id.get(socket_id)
+
+    def hasNode(self, node: Node) -> bool:
+        """Returns ``True`` if `node` is part of this `Scene`
+
+        :rtype: ``bool``
+        """
+        return node in self._nodes
+
+    def hasEdge(self, edge: Edge) -> bool:
+        """Returns ``True`` if `edge` is part of this `Scene`
+
+        :rtype: ``bool``
+        """
+        return edge in self._edges
 
 
     def setSilentSelectionEvents(self, value: bool=True):
@@ -296,7 +377,9 @@ class Scene(Serializable):
         :param node: :class:`~nodeeditor.node_node.Node` to be added to this `Scene`
         :type node: :class:`~nodeeditor.node_node.Node`
         """
-        self.nodes.append(node)
+        self._nodes[node] = None
+        self._nodes_by_id.setdefault(node.id, node)
+        self._nodes_list = None
 
     def addEdge(self, edge: Edge):
         """Add :class:`~nodeeditor.node_edge.Edge` to this `Scene`
@@ -304,7 +387,17 @@ class Scene(Serializable):
         :param edge: :class:`~nodeeditor.node_edge.Edge` to be added to this `Scene`
         :return: :class:`~nodeeditor.node_edge.Edge`
         """
-        self.edges.append(edge)
+        self._edges[edge] = None
+        self._edges_by_id.setdefault(edge.id, edge)
+        self._edges_list = None
+
+    def addSocket(self, socket: 'Socket'):
+        """Add :class:`~nodeeditor.node_socket.Socket` of a `Node` to the id index of this `Scene`
+
+        :param socket: :class:`~nodeeditor.node_socket.Socket` to be indexed
+        :type socket: :class:`~nodeeditor.node_socket.Socket`
+        """
+        self._sockets_by_id.setdefault(socket.id, socket)
 
     def removeNode(self, node: Node):
         """Remove :class:`~nodeeditor.node_node.Node` from this `Scene`
@@ -312,7 +405,11 @@ class Scene(Serializable):
         :param node: :class:`~nodeeditor.node_node.Node` to be removed from this `Scene`
         :type node: :class:`~nodeeditor.node_node.Node`
         """
-        if node in self.nodes: self.nodes.remove(node)
+        if node in self._nodes:
+            del self._nodes[node]
+            if self._nodes_by_id.get(node.id) is node: del self._nodes_by_id[node.id]
+            self._nodes_list = None
+            for socket in (node.inputs + node.outputs): self.removeSocket(socket)
         else:
             if DEBUG_REMOVE_WARNINGS: print("!W:", "Scene::removeNode", "wanna remove nodeeditor", node,
                                             "from self.nodes but it's not in the list!")
@@ -323,16 +420,50 @@ class Scene(Serializable):
         :param edge: :class:`~nodeeditor.node_edge.Edge` to be remove from this `Scene`
         :return: :class:`~nodeeditor.node_edge.Edge`
         """
-        if edge in self.edges: self.edges.remove(edge)
+        if edge in self._edges:
+            del self._edges[edge]
+            if self._edges_by_id.get(edge.id) is edge: del self._edges_by_id[edge.id]
+            self._edges_list = None
         else:
             if DEBUG_REMOVE_WARNINGS: print("!W:", "Scene::removeEdge", "wanna remove edge", edge,
                                             "from self.edges but it's not in the list!")
 
+    def removeSocket(self, socket: 'Socket'):
+        """Remove :class:`~nodeeditor.node_socket.Socket` from the id index of this `Scene`
+
+        :param socket: :class:`~nodeeditor.node_socket.Socket` to be removed from the index
+        :type socket: :class:`~nodeeditor.node_socket.Socket`
+        """
+        if self._sockets_by_id.get(socket.id) is socket: del self._sockets_by_id[socket.id]
+
+    def updateNodeID(self, node: Node, old_id: int):
+        """Move `node` in the id index after its ``id`` has changed from `old_id`"""
+        if node not in self._nodes: return
+        if self._nodes_by_id.get(old_id) is node: del self._nodes_by_id[old_id]
+        self._nodes_by_id.setdefault(node.id, node)
+
+    def updateEdgeID(self, edge: Edge, old_id: int):
+        """Move `edge` in the id index after its ``id`` has changed from `old_id`"""
+        if edge not in self._edges: return
+        if self._edges_by_id.get(old_id) is edge: del self._edges_by_id[old_id]
+        self._edges_by_id.setdefault(edge.id, edge)
+
+    def updateSocketID(self, socket: 'Socket', old_id: int):
+        """Move `socket` in the id index after its ``id`` has changed from `old_id`"""
+        if self._sockets_by_id.get(old_id) is not socket: return
+        del self._sockets_by_id[old_id]
+        self._sockets_by_id.setdefault(socket.id, socket)
+
 
     def clear(self):
         """Remove all `Nodes` from this `Scene`. This causes also to remove all `Edges`"""
-        while len(self.nodes) > 0:
-            self.nodes[0].remove()
+        for node in self.nodes.copy():
+            node.remove()
+        self.evaluator.clear()
+        self.profiler.clear()
+        self.workers.clear()
+        self.topology.clear()
+        self.scheduler.clear()
 
         self.has_been_modified = False
 
@@ -344,6 +475,10 @@ class Scene(Serializable):
         :param filename: where to save this scene
         :type filename: ``str``
         """
+        if os.path.splitext(filename)[1].lower() == BINARY_FILE_EXTENSION:
+            self.saveToBinaryFile(filename)
+            return
+
         with open(filename, "w") as file:
             file.write( json.dumps( self.serialize(), indent=4 ) )
             print("saving to", filename, "was successfull.")
@@ -351,6 +486,21 @@ class Scene(Serializable):
             self.has_been_modified = False
             self.filename = filename
 
+    def saveToBinaryFile(self, filename: str):
+        """
+        Save this `Scene` to the file on disk in the compact binary format.
+        See :mod:`~nodeeditor.node_scene_binary`
+
+        :param filename: where to save this scene
+        :type filename: ``str``
+        """
+        with open(filename, "wb") as file:
+            writeBinaryScene(file, self.serialize())
+            print("saving to", filename, "was successfull.")
+
+            self.has_been_modified = False
+            self.filename = filename
+
     def saveToFileAsNodeGroup(self, filename: str):
         """
         Save all nodes to the file on disk.
@@ -369,8 +519,11 @@ class Scene(Serializable):
 
         :param filename: from what file to load the `Scene`
         :type filename: ``str``
-        :raises: :class:`~nodeeditor.node_scene.InvalidFile` if there was an error decoding JSON file
+        :raises: :class:`~nodeeditor.node_scene.InvalidFile` if there was an error decoding JSON or binary file
         """
+        if isBinarySceneFile(filename):
+            self.loadFromBinaryFile(filename)
+            return
 
         with open(filename, "r") as file:
             raw_data = file.read()
@@ -387,6 +540,24 @@ class Scene(Serializable):
             except Exception as e:
                 dumpException(e)
 
+    def loadFromBinaryFile(self, filename: str):
+        """
+        Load `Scene` from a file saved by :meth:`saveToBinaryFile`. `Nodes` are created while the file is read
+
+        :param filename: from what file to load the `Scene`
+        :type filename: ``str``
+        :raises: :class:`~nodeeditor.node_scene.InvalidFile` if there was an error decoding the binary file
+        """
+        with open(filename, "rb") as file:
+            try:
+                self.filename = filename
+                self.deserializeRecords(readBinarySceneRecords(file))
+                self.has_been_modified = False
+            except InvalidBinaryFile as e:
+                raise InvalidFile("%s is not a valid binary scene file: %s" % (os.path.basename(filename), e))
+            except Exception as e:
+                dumpException(e)
+
     def getEdgeClass(self):
         """Return the class representing Edge. Override me if needed"""
         return Edge
@@ -461,55 +632,128 @@ class Scene(Serializable):
         ])
 
     def deserialize(self, data: dict, hashmap: dict={}, restore_id: bool=True, *args, **kwargs) -> bool:
+        return self.deserializeRecords(iterSceneRecords(data), hashmap, restore_id, *args, **kwargs)
+
+    def deserializeRecords(self, records, hashmap: dict={}, restore_id: bool=True, *args, **kwargs) -> bool:
+        """
+        Deserialize `Scene` from ``(kind, data)`` records. The records come either from serialized data or are
+        streamed from the binary file, so `Nodes` are instantiated while the file is being read.
+
+        :param records: iterable of ``('scene', properties)``, ``('node', node_data)`` and ``('edge', edge_data)``
+            in this order. See :func:`~nodeeditor.node_scene_binary.iterSceneRecords`
+        :return: ``True`` if deserialization was successful
+        :rtype: ``bool``
+        """
         hashmap = {}
+        scene_data = {}
+
+        ## Instead of recreating all the nodes and edges, reuse existing ones...
+        # get all current nodes by their id:
+        all_nodes = dict(self._nodes_by_id)
+        all_edges = None
+
+        for kind, record_data in records:
+            if kind == 'scene':
+                scene_data = record_data
+                if restore_id: self.id = scene_data['id']
+
+            # -- deserialize NODES
+            elif kind == 'node':
+                self.deserializeNodeRecord(record_data, all_nodes, hashmap, restore_id, *args, **kwargs)
+
+            # -- deserialize EDGES
+            elif kind == 'edge':
+                if all_edges is None:
+                    all_edges = self.finishNodeRecords(all_nodes, scene_data)
+
+                # can we find this edge in the scene?
+                found = all_edges.pop(record_data['id'], False)
+
+                if not found:
+                    new_edge = Edge(self).deserialize(record_data, hashmap, restore_id, *args, **kwargs)
+                    # print("New edge for", edge_data)
+                else:
+                    found.deserialize(record_data, hashmap, restore_id, *args, **kwargs)
+
+        if all_edges is None:
+            all_edges = self.finishNodeRecords(all_nodes, scene_data)
+
+        # remove edges which are left in the scene and were NOT in the serialized data!
+        # that means they were not in the graph before...
+        for edge in all_edges.values():
+            edge.remove()
+
+        # update edges colors
+        self.deserializeEdgeColor(scene_data)
+
+        for node in self.nodes:
+            node.evalAfterDeserialize()
+
+
+        return True
+
+    def deserializeNodeRecord(self, node_data: dict, all_nodes: dict, hashmap: dict, restore_id: bool=True, *args, **kwargs):
+        """
+        Deserialize one `Node`. Reuses the `Node` with the same id from `all_nodes` if there is one
+
+        :param node_data: serialized `Node`
+        :type node_data: ``dict``
+        :param all_nodes: ``{id: Node}`` of existing `Nodes` which were not deserialized yet
+        :type all_nodes: ``dict``
+        """
+        # can we find this node in the scene?
+        found = all_nodes.get(node_data['id'], False)
 
-        if restore_id: self.id = data['id']
-
-        # -- deserialize NODES
-
-        ## Instead of recreating all the nodes, reuse existing ones...
-        # get list of all current nodes:
-        all_nodes = self.nodes.copy()
-
-        # go through deserialized nodes:
-        for node_data in data['nodes']:
-            # can we find this node in the scene?
-            found = False
-            for node in all_nodes:
-                if node.id == node_data['id']:
-                    found = node
-                    break
-
-            if not found:
-                try:
-                    new_node = self.getNodeClassFromData(node_data)(self)
-                    new_node.deserialize(node_data, hashmap, restore_id, *args, **kwargs)
-                    new_node.onDeserialized(node_data)
-                    # print("New node for", node_data['title'])
-                except:
-                    dumpException()
-            else:
-                try:
-                    found.deserialize(node_data, hashmap, restore_id, *args, **kwargs)
-                    found.onDeserialized(node_data)
-                    all_nodes.remove(found)
-                    # print("Reused", node_data['title'])
-                except: dumpException()
+        if not found:
+            try:
+                new_node = self.getNodeClassFromData(node_data)(self)
+                new_node.deserialize(node_data, hashmap, restore_id, *args, **kwargs)
+                new_node.onDeserialized(node_data)
+                # print("New node for", node_data['title'])
+            except:
+                dumpException()
+        else:
+            try:
+                found.deserialize(node_data, hashmap, restore_id, *args, **kwargs)
+                found.onDeserialized(node_data)
+                del all_nodes[node_data['id']]
+                # print("Reused", node_data['title'])
+            except: dumpException()
+
+    def finishNodeRecords(self, all_nodes: dict, scene_data: dict) -> dict:
+        """
+        Called after all `Nodes` were deserialized. Removes `Nodes` which were not deserialized and restores colors
 
+        :param all_nodes: ``{id: Node}`` of existing `Nodes` which were not deserialized
+        :type all_nodes: ``dict``
+        :param scene_data: serialized `Scene` properties
+        :type scene_data: ``dict``
+        :return: ``{id: Edge}`` of all current edges which can be reused by the following `Edges`
+        :rtype: ``dict``
+        """
         # remove nodes which are left in the scene and were NOT in the serialized data!
         # that means they were not in the graph before...
-        while all_nodes != []:
-            node = all_nodes.pop()
+        for node in all_nodes.values():
             node.remove()
 
+        self.deserializeEvalHighlightColor(scene_data)
+
+        # update sockets colors
+        self.deserializeSocketColors(scene_data)
+
+        # get all current edges by their id:
+        return dict(self._edges_by_id)
+
+    def deserializeEvalHighlightColor(self, data: dict):
+        """Restore evaluation highlight color from serialized `Scene` `data`"""
         try:
             self.evalHighlightColor = QColor(data['eval_highlight_color'])
             self.evalHighlightColor.setAlpha(data['eval_highlight_color_alpha'])
             self.updateEvalHighlightColors()
         except Exception as e: dumpException(e)
 
-
-        # update sockets colors
+    def deserializeSocketColors(self, data: dict):
+        """Restore socket colors from serialized `Scene` `data`"""
         count = 0
         try:
             for color in data['socket_colors']:
@@ -520,46 +764,11 @@ class Scene(Serializable):
         except Exception as e:
             dumpException(e)
 
-
-        # -- deserialize EDGES
-
-
-        ## Instead of recreating all the edges, reuse existing ones...
-        # get list of all current edges:
-        all_edges = self.edges.copy()
-
-        # go through deserialized edges:
-        for edge_data in data['edges']:
-            # can we find this node in the scene?
-            found = False
-            for edge in all_edges:
-                if edge.id == edge_data['id']:
-                    found = edge
-                    break
-
-            if not found:
-                new_edge = Edge(self).deserialize(edge_data, hashmap, restore_id, *args, **kwargs)
-                # print("New edge for", edge_data)
-            else:
-                found.deserialize(edge_data, hashmap, restore_id, *args, **kwargs)
-                all_edges.remove(found)
-
-        # remove nodes which are left in the scene and were NOT in the serialized data!
-        # that means they were not in the graph before...
-        while all_edges != []:
-            edge = all_edges.pop()
-            edge.remove()
-
-        # update edges colors
+    def deserializeEdgeColor(self, data: dict):
+        """Restore edge color settings from serialized `Scene` `data`"""
         try:
             self.edgeColor = QColor(data['edge_color'])
             self.edgeColor.setAlpha(data['edge_color_alpha'])
             self.isGetEdgeColorFromSocket = data['is_get_edge_color_from_socket']
             self.updateEdgeColors()
-        except Exception as e: dumpException(e)
-
-        for node in self.nodes:
-            node.evalAfterDeserialize()
-
-
-        return True
\ No newline at end of file
+        except Exception as e: dumpException(e)
\ No newline at end of file
@@ -0,0 +1,271 @@
+# -*- coding: utf-8 -*-
+"""
+A module containing the compact binary file format for serialized `Scenes`.
+
+Layout of the file:
+
+- header: magic ``NEDB``, format version (``uint16``) and number of strings in the string table (``uint32``)
+- string table: every distinct string (keys like ``grnode_shown_width`` and string values) stored once
+- records: one record per `Scene` properties, `Node` and `Edge` in this order, terminated by an end record
+
+Each record consists of a kind byte, a varint length of the payload and the payload itself. Values are encoded
+msgpack-style with a one byte tag, integers as zigzag varints and strings as indexes into the string table. The
+reader yields the records one by one, so `Nodes` can be instantiated while the file is being read.
+"""
+import struct
+from collections import OrderedDict
+
+DEBUG = False
+
+BINARY_FILE_MAGIC = b"NEDB"
+BINARY_FILE_VERSION = 1
+BINARY_FILE_EXTENSION = ".nedb"
+
+RECORD_SCENE = b"S"
+RECORD_NODE = b"N"
+RECORD_EDGE = b"E"
+RECORD_END = b"Z"
+
+RECORD_KINDS = {RECORD_SCENE: 'scene', RECORD_NODE: 'node', RECORD_EDGE: 'edge'}
+
+TAG_NONE = 0x00
+TAG_FALSE = 0x01
+TAG_TRUE = 0x02
+TAG_INT = 0x03
+TAG_FLOAT = 0x04
+TAG_STRING = 0x05
+TAG_LIST = 0x06
+TAG_DICT = 0x07
+TAG_BYTES = 0x08
+
+_header = struct.Struct("<4sHI")
+_double = struct.Struct("<d")
+
+
+class InvalidBinaryFile(Exception): pass
+
+
+def isBinarySceneFile(filename: str) -> bool:
+    """
+    Check whether the file starts with the binary `Scene` magic
+
+    :param filename: file to check
+    :type filename: ``str``
+    :rtype: ``bool``
+    """
+    with open(filename, "rb") as file:
+        return file.read(len(BINARY_FILE_MAGIC)) == BINARY_FILE_MAGIC
+
+
+def iterSceneRecords(data: dict):
+    """
+    Split serialized `Scene` into ``(kind, data)`` records in the order they are stored in the binary file
+
+    :param data: serialized :class:`~nodeeditor.node_scene.Scene`
+    :type data: ``dict``
+    :return: generator of ``('scene', properties)``, ``('node', node_data)`` and ``('edge', edge_data)``
+    """
+    yield 'scene', OrderedDict((key, value) for key, value in data.items() if key not in ('nodes', 'edges'))
+    for node_data in data.get('nodes', []):
+        yield 'node', node_data
+    for edge_data in data.get('edges', []):
+        yield 'edge', edge_data
+
+
+def _writeVarint(buffer: bytearray, value: int):
+    while value > 0x7f:
+        buffer.append((value & 0x7f) | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def _collectStrings(value, strings: dict):
+    if isinstance(value, str):
+        if value not in strings: strings[value] = len(strings)
+    elif isinstance(value, dict):
+        for key, item in value.items():
+            _collectStrings(key, strings)
+            _collectStrings(item, strings)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            _collectStrings(item, strings)
+
+
+def _encodeValue(buffer: bytearray, value, strings: dict):
+    if value is None:
+        buffer.append(TAG_NONE)
+    elif value is True:
+        buffer.append(TAG_TRUE)
+    elif value is False:
+        buffer.append(TAG_FALSE)
+    elif isinstance(value, int):
+        buffer.append(TAG_INT)
+        _writeVarint(buffer, (value << 1) if value >= 0 else ((-value << 1) - 1))
+    elif isinstance(value, float):
+        buffer.append(TAG_FLOAT)
+        buffer += _double.pack(value)
+    elif isinstance(value, str):
+        buffer.append(TAG_STRING)
+        _writeVarint(buffer, strings[value])
+    elif isinstance(value, dict):
+        buffer.append(TAG_DICT)
+        _writeVarint(buffer, len(value))
+        for key, item in value.items():
+            _encodeValue(buffer, key, strings)
+            _encodeValue(buffer, item, strings)
+    elif isinstance(value, (list, tuple)):
+        buffer.append(TAG_LIST)
+        _writeVarint(buffer, len(value))
+        for item in value:
+            _encodeValue(buffer, item, strings)
+    elif isinstance(value, (bytes, bytearray)):
+        buffer.append(TAG_BYTES)
+        _writeVarint(buffer, len(value))
+        buffer += value
+    else:
+        raise TypeError("Object of type %s can't be stored in binary scene file" % value.__class__.__name__)
+
+
+def writeBinaryScene(file, data: dict):
+    """
+    Write serialized `Scene` into the binary file
+
+    :param file: file opened in binary write mode
+    :param data: serialized :class:`~nodeeditor.node_scene.Scene`
+    :type data: ``dict``
+    """
+    records = list(iterSceneRecords(data))
+
+    strings = {}
+    for kind, record_data in records:
+        _collectStrings(record_data, strings)
+
+    buffer = bytearray(_header.pack(BINARY_FILE_MAGIC, BINARY_FILE_VERSION, len(strings)))
+    for string in strings:
+        encoded = string.encode('utf-8')
+        _writeVarint(buffer, len(encoded))
+        buffer += encoded
+    file.write(buffer)
+
+    kind_bytes = {kind: record for record, kind in RECORD_KINDS.items()}
+    for kind, record_data in records:
+        payload = bytearray()
+        _encodeValue(payload, record_data, strings)
+        buffer = bytearray(kind_bytes[kind])
+        _writeVarint(buffer, len(payload))
+        file.write(buffer)
+        file.write(payload)
+    file.write(RECORD_END)
+
+    if DEBUG: print("BINARY: written %d records, %d strings" % (len(records), len(strings)))
+
+
+class _Reader():
+    """Helper decoding values from a file opened in binary mode"""
+    def __init__(self, file):
+        self.file = file
+
+    def read(self, size: int) -> bytes:
+        data = self.file.read(size)
+        if len(data) != size:
+            raise InvalidBinaryFile("Unexpected end of binary scene file")
+        return data
+
+    def readVarint(self) -> int:
+        result, shift = 0, 0
+        while True:
+            byte = self.read(1)[0]
+            result |= (byte & 0x7f) << shift
+            if byte < 0x80:
+                return result
+            shift += 7
+
+
+class _PayloadDecoder():
+    """Helper decoding one record payload from memory"""
+    def __init__(self, payload: bytes, strings: list):
+        self.payload = payload
+        self.strings = strings
+        self.position = 0
+
+    def readVarint(self) -> int:
+        result, shift = 0, 0
+        while True:
+            byte = self.payload[self.position]
+            self.position += 1
+            result |= (byte & 0x7f) << shift
+            if byte < 0x80:
+                return result
+            shift += 7
+
+    def decodeValue(self):
+        tag = self.payload[self.position]
+        self.position += 1
+        if tag == TAG_NONE:
+            return None
+        elif tag == TAG_FALSE:
+            return False
+        elif tag == TAG_TRUE:
+            return True
+        elif tag == TAG_INT:
+            value = self.readVarint()
+            return (value >> 1) if not value & 1 else -((value + 1) >> 1)
+        elif tag == TAG_FLOAT:
+            value = _double.unpack_from(self.payload, self.position)[0]
+            self.position += _double.size
+            return value
+        elif tag == TAG_STRING:
+            return self.strings[self.readVarint()]
+        elif tag == TAG_DICT:
+            value = OrderedDict()
+            for i in range(self.readVarint()):
+                key = self.decodeValue()
+                value[key] = self.decodeValue()
+            return value
+        elif tag == TAG_LIST:
+            return [self.decodeValue() for i in range(self.readVarint())]
+        elif tag == TAG_BYTES:
+            length = self.readVarint()
+            value = bytes(self.payload[self.position:self.position + length])
+            self.position += length
+            return value
+        raise InvalidBinaryFile("Unknown value tag 0x%02x in binary scene file" % tag)
+
+
+def readBinarySceneRecords(file):
+    """
+    Read records from the binary file one by one
+
+    :param file: file opened in binary read mode
+    :return: generator of ``(kind, data)`` records, see :func:`iterSceneRecords`
+    :raises: :class:`InvalidBinaryFile` if the file is damaged or not a binary scene file
+    """
+    reader = _Reader(file)
+    try:
+        magic, version, string_count = _header.unpack(reader.read(_header.size))
+    except struct.error:
+        raise InvalidBinaryFile("Binary scene file has invalid header")
+    if magic != BINARY_FILE_MAGIC:
+        raise InvalidBinaryFile("Not a binary scene file")
+    if version > BINARY_FILE_VERSION:
+        raise InvalidBinaryFile("Binary scene file version %d is not supported" % version)
+
+    strings = []
+    try:
+        for i in range(string_count):
+            strings.append(reader.read(reader.readVarint()).decode('utf-8'))
+    except UnicodeDecodeError:
+        raise InvalidBinaryFile("Binary scene file has invalid string table")
+
+    while True:
+        kind = reader.read(1)
+        if kind == RECORD_END:
+            return
+        payload = reader.read(reader.readVarint())
+        if kind not in RECORD_KINDS:
+            if DEBUG: print("BINARY: skipping unknown record", kind)
+            continue
+        try:
+            yield RECORD_KINDS[kind], _PayloadDecoder(payload, strings).decodeValue()
+        except (IndexError, struct.error):
+            raise InvalidBinaryFile("Binary scene file has damaged %s record" % RECORD_KINDS[kind])
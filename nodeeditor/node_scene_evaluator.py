@@ -0,0 +1,538 @@
+# -*- coding: utf-8 -*-
+"""
+A module containing the scheduler which drives the dataflow (sendData/receiveData) between `Nodes`
+"""
+import math
+import hashlib
+from weakref import WeakKeyDictionary
+from collections import OrderedDict, deque
+from nodeeditor.utils_no_qt import dumpException
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+DEBUG = False
+
+DELIVERY_EVERY = "every"        #: every value is delivered
+DELIVERY_LATEST = "latest"      #: only the latest value since the last delivery is delivered, older ones are dropped
+DELIVERY_BATCH = "batch"        #: all values since the last delivery are delivered together as one list
+DELIVERY_POLICIES = (DELIVERY_EVERY, DELIVERY_LATEST, DELIVERY_BATCH)
+
+OVERFLOW_BLOCK = "block"                #: a full queue is delivered before the producer continues
+OVERFLOW_DROP_OLDEST = "drop oldest"    #: the oldest value of a full queue is dropped
+OVERFLOW_DROP_NEWEST = "drop newest"    #: the new value is dropped if the queue is full
+OVERFLOW_POLICIES = (OVERFLOW_BLOCK, OVERFLOW_DROP_OLDEST, OVERFLOW_DROP_NEWEST)
+
+EVALUATOR_MAX_FEEDBACK_TICKS = 1000     #: deliveries of deferred data per :meth:`SceneEvaluator.evaluate` without `deferCall`
+
+
+def fingerprint(value):
+    """
+    Cheap fingerprint of `value` used to detect unchanged inputs. Scalars are used directly, NumPy arrays are
+    represented by shape, dtype and a hash of their content, objects with ``cacheKey()`` (``QPixmap``, ``QImage``) by
+    their cache key which changes with every modification. Lists, tuples and dicts are fingerprinted element by element
+
+    :param value: data received by a `Node`
+    :return: hashable fingerprint or ``None`` if `value` can't be fingerprinted and has to be treated as changed
+    """
+    if value is None or isinstance(value, (bool, int, str, bytes, complex)):
+        return type(value), value
+    if isinstance(value, float):
+        return float, "nan" if math.isnan(value) else value
+    if np is not None and isinstance(value, np.ndarray):
+        if value.dtype.hasobject: return None
+        digest = hashlib.blake2b(memoryview(np.ascontiguousarray(value)).cast("B"), digest_size=16).digest()
+        return np.ndarray, value.shape, value.dtype.str, digest
+    if np is not None and isinstance(value, np.generic):
+        return fingerprint(value.item())
+    if isinstance(value, (list, tuple)):
+        items = tuple(fingerprint(item) for item in value)
+        if None in items: return None
+        return type(value), items
+    if isinstance(value, dict):
+        items = tuple((fingerprint(key), fingerprint(item)) for key, item in value.items())
+        if any(None in item for item in items): return None
+        return dict, items
+    cacheKey = getattr(value, "cacheKey", None)
+    if callable(cacheKey):
+        return type(value), cacheKey()
+    return None
+
+
+class SceneEvaluator():
+    """Class contains all the code for scheduling the evaluation of `Nodes` in the `Scene`.
+
+    Data sent from an output `Socket` is not passed recursively to the children anymore. Instead every write to an
+    input `Socket` is collected as pending and all affected `Nodes` are evaluated in topological order. This way
+    each `Node` is evaluated at most once per `tick` with all of its fresh inputs and deep chains don't grow
+    the Python stack.
+
+    Data sent over `Edges` with the :data:`DELIVERY_LATEST` or :data:`DELIVERY_BATCH` policy is not delivered
+    immediately. It is kept per `Edge` and delivered later through `deferCall` (i.e. on the next turn of the Qt event
+    loop), so a slow consumer gets only the latest value or one batch instead of every intermediate value. `Edges`
+    with ``queue_size`` bigger than ``0`` keep the values in a bounded queue, when the queue is full the
+    ``overflow_policy`` of the `Edge` decides between blocking the producer and dropping values. Data sent over
+    feedback `Edges` (see :mod:`~nodeeditor.node_scene_topology`) is deferred the same way, so loops run one
+    iteration per tick without growing the stack or blocking the event loop. Without `deferCall` (headless) the
+    deferred data is delivered by the running :meth:`evaluate`, at most ``max_feedback_ticks`` times, so a loop
+    which never settles doesn't block the caller. The rest is delivered by the next :meth:`evaluate`, i.e. with the
+    next external input.
+
+    The evaluator remembers a :func:`fingerprint` of the last value of every input `Socket`. If all values of a
+    `receiveData` call are unchanged, the call is skipped together with the computation and the propagation to the
+    descendants. Side-effecting `Nodes` opt out by setting their ``memoize`` class attribute to ``False``.
+
+    In the ``lazy`` mode only `Nodes` whose outputs are observed (see :meth:`~nodeeditor.node_node.Node.isObserved`)
+    and their ancestors are evaluated. Data for other `Nodes` is kept as the latest value per input `Socket`, the
+    `Node` and its descendants are marked `Dirty` and the data is evaluated when an observed `Node` pulls it by
+    getting connected downstream (:meth:`pullNode`).
+    """
+    def __init__(self, scene: 'Scene', deferCall: 'function' = None):
+        """
+        :param scene: Reference to the :class:`~nodeeditor.node_scene.Scene`
+        :type scene: :class:`~nodeeditor.node_scene.Scene`
+        :param deferCall: function ``deferCall(callback)`` calling `callback` later or ``None`` to deliver the deferred
+            data at the end of the running evaluation
+        :type deferCall: ``function``
+
+        :Instance Attributes:
+
+        - **scene** - reference to the :class:`~nodeeditor.node_scene.Scene`
+        - **deferCall** - function used to schedule the delivery of deferred data
+        - **tick_count** - number of evaluation ticks processed so far
+        - **evaluation_count** - number of `receiveData` calls done by this evaluator
+        - **memoize** - ``False`` to disable skipping of unchanged inputs for all `Nodes`
+        - **memoized_count** - number of `receiveData` calls skipped because the inputs were unchanged
+        - **lazy** - ``True`` if only observed `Nodes` and their ancestors are evaluated, see :meth:`setLazy`
+        - **max_feedback_ticks** - maximal number of deliveries of deferred data per :meth:`evaluate` if there is no
+          `deferCall`
+        """
+        self.scene = scene
+        self.deferCall = deferCall
+        self.max_feedback_ticks = EVALUATOR_MAX_FEEDBACK_TICKS
+        self.memoize = True
+        self.lazy = False
+
+        self.clear()
+
+    def clear(self):
+        """Reset pending socket writes and statistics"""
+        self._pending = OrderedDict()
+        self._deferred = OrderedDict()
+        self._flush_scheduled = False
+        self._is_evaluating = False
+        self._fingerprints = WeakKeyDictionary()
+        self._stale = WeakKeyDictionary()
+        self.tick_count = 0
+        self.evaluation_count = 0
+        self.memoized_count = 0
+
+    def isEvaluating(self) -> bool:
+        """Returns ``True`` if we are currently inside of an evaluation tick
+
+        :rtype: ``bool``
+        """
+        return self._is_evaluating
+
+    def hasPendingData(self) -> bool:
+        """Returns ``True`` if there are socket writes waiting for evaluation
+
+        :rtype: ``bool``
+        """
+        return len(self._pending) > 0 or len(self._deferred) > 0
+
+    def setLazy(self, value: bool = True):
+        """
+        Switch the lazy evaluation on or off. Switching it off evaluates all data kept for unobserved `Nodes`
+
+        :param value: ``True`` to evaluate only observed `Nodes` and their ancestors
+        :type value: ``bool``
+        """
+        self.lazy = value
+        if not self.lazy and len(self._stale) > 0:
+            stale, self._stale = self._stale, WeakKeyDictionary()
+            for node, values in stale.items():
+                self._pending.setdefault(node, []).extend(values.items())
+            self.evaluate()
+
+    def pullNode(self, node: 'Node'):
+        """
+        Evaluate data kept for `node` and its ancestors, which is needed for the observed descendants of `node`. Called
+        when an input `Edge` of `node` changes
+
+        :param node: :class:`~nodeeditor.node_node.Node` which needs up to date inputs
+        :type node: :class:`~nodeeditor.node_node.Node`
+        """
+        if len(self._stale) == 0: return
+        visited = {node}
+        queue = deque([node])
+        while queue:
+            current = queue.popleft()
+            values = self._stale.pop(current, None)
+            if values:
+                self._pending.setdefault(current, []).extend(values.items())
+            for socket in current.inputs:
+                for edge in socket.edges:
+                    other_socket = edge.getOtherSocket(socket)
+                    if other_socket is not None and other_socket.node not in visited:
+                        visited.add(other_socket.node)
+                        queue.append(other_socket.node)
+        if not self._is_evaluating:
+            self.evaluate()
+
+    def keepStale(self, node: 'Node', values: list):
+        """Keep the latest of `values` per input `Socket` of an unobserved `node` until it is pulled"""
+        stale = self._stale.get(node)
+        if stale is None:
+            stale = self._stale[node] = OrderedDict()
+        for inputSocketIndex, data in values:
+            stale[inputSocketIndex] = data
+
+    def getObservedAncestors(self, order: list) -> set:
+        """
+        Get `Nodes` of the topologically ordered `order` which are observed or have an observed descendant
+
+        :param order: list of :class:`~nodeeditor.node_node.Node` returned by :meth:`getTopologicalOrder`
+        :type order: ``list``
+        :rtype: ``set``
+        """
+        needed = set()
+        changed = True
+        while changed:
+            # repeated because `Nodes` in cycles are not ordered
+            changed = False
+            for node in reversed(order):
+                if node in needed: continue
+                if node.isObserved() or any(child in needed for child in node.getChildrenNodes()):
+                    needed.add(node)
+                    changed = True
+        return needed
+
+    def isUnchanged(self, node: 'Node', values: dict) -> bool:
+        """
+        Compare fingerprints of `values` with the last values received by `node` and remember the new ones
+
+        :param node: receiving :class:`~nodeeditor.node_node.Node`
+        :type node: :class:`~nodeeditor.node_node.Node`
+        :param values: dict of ``inputSocketIndex: data``
+        :type values: ``dict``
+        :return: ``True`` if memoization is enabled and every value is equal to the last value of its `Socket`
+        :rtype: ``bool``
+        """
+        if not self.memoize or not node.memoize: return False
+        fingerprints = self._fingerprints.get(node)
+        if fingerprints is None:
+            fingerprints = self._fingerprints[node] = {}
+        unchanged = True
+        for inputSocketIndex, data in values.items():
+            value_fingerprint = fingerprint(data)
+            if value_fingerprint is None or fingerprints.get(inputSocketIndex) != value_fingerprint:
+                unchanged = False
+            fingerprints[inputSocketIndex] = value_fingerprint
+        return unchanged
+
+    def forgetInputs(self, node: 'Node' = None):
+        """
+        Forget the fingerprints of the last inputs, so the next values are evaluated even if they are unchanged (i.e.
+        after a parameter of the `Node` changed)
+
+        :param node: :class:`~nodeeditor.node_node.Node` or ``None`` for all `Nodes`
+        :type node: :class:`~nodeeditor.node_node.Node`
+        """
+        if node is None:
+            self._fingerprints.clear()
+        else:
+            self._fingerprints.pop(node, None)
+
+    def sendData(self, node: 'Node', data, outputSocketIndex: int = -1):
+        """
+        Schedule `data` for all `Nodes` connected to the output `Socket` of `node`. If no evaluation is running,
+        the evaluation starts immediately, otherwise the data will be picked up by the running evaluation.
+
+        :param node: :class:`~nodeeditor.node_node.Node` which is sending the data
+        :type node: :class:`~nodeeditor.node_node.Node`
+        :param data: data to be sent
+        :param outputSocketIndex: index of the output `Socket` or ``-1`` for all outputs
+        :type outputSocketIndex: ``int``
+        """
+        profiler = self.scene.profiler if self.scene.profiler.enabled else None
+        if profiler: profiler.beginSpan(node, "sendDataFromSocket", outputSocketIndex, data, is_input=False)
+        try:
+            for edge, other_node, inputSocketIndex in node.getChildrenEdges(outputSocketIndex):
+                if edge.delivery_policy == DELIVERY_EVERY and edge.queue_size <= 0 and not edge.is_feedback:
+                    self.scheduleData(other_node, data, inputSocketIndex)
+                else:
+                    self.deferData(edge, other_node, data, inputSocketIndex)
+        finally:
+            if profiler: profiler.endSpan()
+
+        if not self._is_evaluating:
+            self.evaluate()
+
+    def scheduleData(self, node: 'Node', data, inputSocketIndex: int):
+        """
+        Store pending write of `data` into the input `Socket` of `node`
+
+        :param node: receiving :class:`~nodeeditor.node_node.Node`
+        :type node: :class:`~nodeeditor.node_node.Node`
+        :param data: data to be received
+        :param inputSocketIndex: index of the input `Socket`
+        :type inputSocketIndex: ``int``
+        """
+        if node not in self._pending:
+            self._pending[node] = []
+        self._pending[node].append((inputSocketIndex, data))
+        if self.lazy and not node.isDirty():
+            # descendants of a dirty `Node` are already dirty
+            node.markDirty()
+            node.markDescendantsDirty()
+
+    def deferData(self, edge: 'Edge', node: 'Node', data, inputSocketIndex: int):
+        """
+        Keep `data` sent over `edge` until the next delivery according to ``edge.delivery_policy``. If the queue of
+        the `edge` is full, ``edge.overflow_policy`` is applied
+
+        :param edge: :class:`~nodeeditor.node_edge.Edge` the data is sent over
+        :type edge: :class:`~nodeeditor.node_edge.Edge`
+        :param node: receiving :class:`~nodeeditor.node_node.Node`
+        :type node: :class:`~nodeeditor.node_node.Node`
+        :param data: data to be received
+        :param inputSocketIndex: index of the input `Socket`
+        :type inputSocketIndex: ``int``
+        """
+        entry = self._deferred.get(edge)
+        if entry is None:
+            entry = self._deferred[edge] = [node, inputSocketIndex, edge.delivery_policy, deque()]
+        values = entry[3]
+        if entry[2] == DELIVERY_LATEST and values:
+            values[0] = data
+            edge.dropped_count += 1
+        else:
+            if 0 < edge.queue_size <= len(values):
+                if edge.overflow_policy == OVERFLOW_DROP_NEWEST:
+                    edge.dropped_count += 1
+                    edge.onDeliveryStatsChanged()
+                    return
+                elif edge.overflow_policy == OVERFLOW_DROP_OLDEST:
+                    values.popleft()
+                    edge.dropped_count += 1
+                else:
+                    edge.blocked_count += 1
+                    self.drainEdge(edge)
+                    return self.deferData(edge, node, data, inputSocketIndex)
+            values.append(data)
+        edge.queue_depth = len(values)
+        edge.onDeliveryStatsChanged()
+
+        if not self._flush_scheduled and self.deferCall is not None:
+            self._flush_scheduled = True
+            self.deferCall(self.flushDeferred)
+
+    def scheduleDeferredEdge(self, edge: 'Edge', entry: list):
+        node, inputSocketIndex, policy, values = entry
+        edge.queue_depth = 0
+        if not self.scene.hasEdge(edge) or not self.scene.hasNode(node):
+            if DEBUG: print("SceneEvaluator: dropping deferred data of removed edge", edge)
+            return
+        edge.onDeliveryStatsChanged()
+        if policy == DELIVERY_LATEST:
+            self.scheduleData(node, values[0], inputSocketIndex)
+        elif policy == DELIVERY_BATCH:
+            self.scheduleData(node, list(values), inputSocketIndex)
+        else:
+            for data in values:
+                self.scheduleData(node, data, inputSocketIndex)
+
+    def scheduleDeferred(self):
+        """Move all deferred data to the pending writes. Latest values are passed as they are, batches as lists and
+        queued values one by one"""
+        deferred, self._deferred = self._deferred, OrderedDict()
+        for edge, entry in deferred.items():
+            self.scheduleDeferredEdge(edge, entry)
+
+    def drainEdge(self, edge: 'Edge'):
+        """
+        Deliver the queue of `edge` immediately, this blocks the producer until the consumer has processed it. Inside
+        of a running evaluation the values are moved to the pending writes of the current evaluation
+
+        :param edge: :class:`~nodeeditor.node_edge.Edge` with full queue
+        :type edge: :class:`~nodeeditor.node_edge.Edge`
+        """
+        entry = self._deferred.pop(edge, None)
+        if entry is not None:
+            self.scheduleDeferredEdge(edge, entry)
+        if not self._is_evaluating:
+            self.evaluate()
+
+    def flushDeferred(self):
+        """Deliver all deferred data, called through `deferCall`"""
+        self._flush_scheduled = False
+        if self._is_evaluating:
+            # picked up by the running evaluation
+            return
+        self.scheduleDeferred()
+        self.evaluate()
+
+    def evaluate(self):
+        """Process ticks until there is no pending data left"""
+        if self._is_evaluating: return
+
+        self._is_evaluating = True
+        feedback_ticks = 0
+        try:
+            while True:
+                while self._pending:
+                    self.evaluateTick()
+                if not self._deferred or (self.deferCall is not None and self._flush_scheduled):
+                    break
+                if self.deferCall is None:
+                    if feedback_ticks >= self.max_feedback_ticks:
+                        print("EVALUATOR: deferred data kept for the next evaluation, loop didn't settle within %d ticks"
+                              % self.max_feedback_ticks)
+                        break
+                    feedback_ticks += 1
+                self.scheduleDeferred()
+        finally:
+            self._is_evaluating = False
+
+    def evaluateTick(self):
+        """
+        Evaluate one `tick`. All `Nodes` with pending data and their descendants are ordered topologically and each
+        `Node` is evaluated at most once. Data which arrives at an already evaluated `Node` (feedback) stays
+        pending for the next tick. In the ``lazy`` mode data of `Nodes` without observed descendants is kept and
+        the evaluated `Nodes` are marked clean.
+        """
+        self.tick_count += 1
+        evaluated = set()
+
+        order = self.getTopologicalOrder(list(self._pending.keys()))
+        needed = self.getObservedAncestors(order) if self.lazy else None
+
+        for node in order:
+            if node in evaluated or node not in self._pending:
+                continue
+            values = self._pending.pop(node)
+            evaluated.add(node)
+            if not self.scene.hasNode(node):
+                if DEBUG: print("SceneEvaluator: skipping removed node", node)
+                continue
+            if needed is not None and node not in needed:
+                self.keepStale(node, values)
+                continue
+            self.evaluateNode(node, values)
+
+        if needed is not None:
+            for node in order:
+                if node in needed and node not in self._pending and node not in self._stale:
+                    node.markDirty(False)
+
+    def evaluateNode(self, node: 'Node', values: list):
+        """
+        Pass pending `values` to the `node`. Values for different input `Sockets` are merged into one
+        `receiveData` call. Multiple values for the same `Socket` are separate messages and are delivered one by one.
+        Calls with unchanged values are skipped, see :meth:`isUnchanged`.
+
+        :param node: :class:`~nodeeditor.node_node.Node` to evaluate
+        :type node: :class:`~nodeeditor.node_node.Node`
+        :param values: list of ``(inputSocketIndex, data)`` in order of arrival
+        :type values: ``list``
+        """
+        rounds = []
+        for inputSocketIndex, data in values:
+            for current_round in rounds:
+                if inputSocketIndex not in current_round:
+                    current_round[inputSocketIndex] = data
+                    break
+            else:
+                rounds.append(OrderedDict([(inputSocketIndex, data)]))
+
+        profiler = self.scene.profiler if self.scene.profiler.enabled else None
+        for current_round in rounds:
+            if self.isUnchanged(node, current_round):
+                self.memoized_count += 1
+                continue
+            items = list(current_round.items())
+            for inputSocketIndex, data in items[:-1]:
+                node.inputValues[inputSocketIndex] = data
+            inputSocketIndex, data = items[-1]
+            self.evaluation_count += 1
+            if profiler: profiler.beginSpan(node, "receiveData", inputSocketIndex, data, is_input=True)
+            try:
+                node.receiveData(data, inputSocketIndex)
+            except Exception as e:
+                self.forgetInputs(node)
+                dumpException(e)
+            finally:
+                if profiler: profiler.endSpan()
+
+            if node.offloadable or node.run_in_process or node.run_in_sandbox:
+                self.computeNode(node, inputSocketIndex)
+
+    def computeNode(self, node: 'Node', inputSocketIndex: int = -1):
+        """
+        Run :meth:`~nodeeditor.node_node.Node.compute` of an offloadable `node`. The computation is dispatched to
+        the :class:`~nodeeditor.node_scene_workers.SceneWorkerPool` of the `Scene` if there is one (worker thread,
+        worker process if ``run_in_process`` or sandbox process if ``run_in_sandbox`` is enabled), otherwise it
+        runs synchronously. The result is passed to :meth:`~nodeeditor.node_node.Node.onComputed`
+
+        :param node: :class:`~nodeeditor.node_node.Node` to compute
+        :type node: :class:`~nodeeditor.node_node.Node`
+        :param inputSocketIndex: index of the input `Socket` which triggered the computation or ``-1``
+        :type inputSocketIndex: ``int``
+        """
+        workers = self.scene.workers
+        if workers is not None and workers.enabled:
+            workers.submit(node, inputSocketIndex)
+            return
+
+        try:
+            result = node.compute(list(node.inputValues), inputSocketIndex)
+        except Exception as e:
+            node.onComputeError(e)
+            return
+        try:
+            node.onComputed(result)
+        except Exception as e: dumpException(e)
+
+    def getTopologicalOrder(self, start_nodes: list) -> list:
+        """
+        Get all `start_nodes` and their descendants ordered topologically. Feedback `Edges` are not followed.
+        `Nodes` which are part of a cycle are appended at the end in order of their discovery.
+
+        :param start_nodes: list of :class:`~nodeeditor.node_node.Node`
+        :type start_nodes: ``list``
+        :return: topologically ordered list of :class:`~nodeeditor.node_node.Node`
+        :rtype: ``list``
+        """
+        # collect the affected subgraph
+        discovered = OrderedDict()
+        queue = deque(start_nodes)
+        while queue:
+            node = queue.popleft()
+            if node in discovered: continue
+            discovered[node] = [child for edge, child, inputSocketIndex in node.getChildrenEdges() if not edge.is_feedback]
+            for child in discovered[node]:
+                if child not in discovered: queue.append(child)
+
+        in_degree = dict.fromkeys(discovered, 0)
+        for node, children in discovered.items():
+            for child in children:
+                in_degree[child] += 1
+
+        # Kahn's algorithm
+        order = []
+        queue = deque([node for node in discovered if in_degree[node] == 0])
+        while queue:
+            node = queue.popleft()
+            order.append(node)
+            for child in discovered[node]:
+                in_degree[child] -= 1
+                if in_degree[child] == 0: queue.append(child)
+
+        if len(order) < len(discovered):
+            ordered = set(order)
+            order += [node for node in discovered if node not in ordered]
+
+        return order
@@ -2,6 +2,10 @@
 """
 A module containing all code for working with History (Undo/Redo)
 """
+import json
+from copy import deepcopy
+from collections import OrderedDict
+from nodeeditor.node_edge import Edge
 from nodeeditor.utils import dumpException
 
 DEBUG = False
@@ -9,7 +13,12 @@ DEBUG_SELECTION = False
 
 
 class SceneHistory():
-    """Class contains all the code for undo/redo operations"""
+    """Class contains all the code for undo/redo operations.
+
+    History stamps don't contain a snapshot of the whole `Scene`. Each stamp stores only the difference (`delta`)
+    to the previous stamp: added, removed and changed `Nodes` and `Edges` and changed `Scene` properties. The last
+    stored state is kept to create the next delta. Undo applies the delta backward, redo forward.
+    """
     def __init__(self, scene: 'Scene'):
         """
         :param scene: Reference to the :class:`~nodeeditor.node_scene.Scene`
@@ -18,12 +27,14 @@ class SceneHistory():
         :Instance Attributes:
 
         - **scene** - reference to the :class:`~nodeeditor.node_scene.Scene`
-        - **history_limit** - number of history steps that can be stored
+        - **history_max_bytes** - approximate number of bytes all history stamps can occupy. Oldest stamps are
+          dropped above this limit
+        - **history_bytes** - approximate number of bytes occupied by the current history stamps
         """
         self.scene = scene
 
         self.clear()
-        self.history_limit = 128
+        self.history_max_bytes = 32 * 1024 * 1024
 
         self.undo_selection_has_changed = False
 
@@ -36,6 +47,8 @@ class SceneHistory():
         """Reset the history stack"""
         self.history_stack = []
         self.history_current_step = -1
+        self.history_bytes = 0
+        self._state = None
 
     def storeInitialHistoryStamp(self):
         """Helper function usually used when new or open file requested"""
@@ -85,8 +98,9 @@ class SceneHistory():
         if DEBUG: print("UNDO")
 
         if self.canUndo():
+            undone_stamp = self.history_stack[self.history_current_step]
             self.history_current_step -= 1
-            self.restoreHistory()
+            self.restoreHistory(undone_stamp, backward=True)
             self.scene.has_been_modified = True
 
     def redo(self):
@@ -94,13 +108,18 @@ class SceneHistory():
         if DEBUG: print("REDO")
         if self.canRedo():
             self.history_current_step += 1
-            self.restoreHistory()
+            self.restoreHistory(self.history_stack[self.history_current_step])
             self.scene.has_been_modified = True
 
 
-    def restoreHistory(self):
+    def restoreHistory(self, history_stamp: dict, backward: bool=False):
         """
-        Restore `History Stamp` from `History stack`.
+        Apply `History Stamp` from `History stack` so the `Scene` matches the current step.
+
+        :param history_stamp: History Stamp to apply. When undoing it is the stamp which was just undone
+        :type history_stamp: ``dict``
+        :param backward: ``True`` for undo
+        :type backward: ``bool``
 
         Triggers:
 
@@ -110,7 +129,7 @@ class SceneHistory():
         if DEBUG: print("Restoring history",
                         ".... current_step: @%d" % self.history_current_step,
                         "(%d)" % len(self.history_stack))
-        self.restoreHistoryStamp(self.history_stack[self.history_current_step])
+        self.restoreHistoryStamp(history_stamp, backward)
         for callback in self._history_modified_listeners: callback()
         for callback in self._history_restored_listeners: callback()
 
@@ -139,17 +158,24 @@ class SceneHistory():
         # if the pointer (history_current_step) is not at the end of history_stack
         if self.history_current_step+1 < len(self.history_stack):
             self.history_stack = self.history_stack[0:self.history_current_step+1]
-
-        # history is outside of the limits
-        if self.history_current_step+1 >= self.history_limit:
-            self.history_stack = self.history_stack[1:]
-            self.history_current_step -= 1
+            self.history_bytes = sum(stamp['size'] for stamp in self.history_stack)
 
         hs = self.createHistoryStamp(desc)
 
         self.history_stack.append(hs)
         self.history_current_step += 1
-        if DEBUG: print("  -- setting step to:", self.history_current_step)
+        self.history_bytes += hs['size']
+        if DEBUG: print("  -- setting step to:", self.history_current_step, "history bytes:", self.history_bytes)
+
+        # history is outside of the limits
+        while self.history_bytes > self.history_max_bytes and len(self.history_stack) > 1:
+            self.history_bytes -= self.history_stack[0]['size']
+            self.history_stack = self.history_stack[1:]
+            self.history_current_step -= 1
+            # the oldest stamp can't be undone anymore, we don't need its delta
+            self.history_bytes -= self.history_stack[0]['size']
+            self.history_stack[0]['delta'] = None
+            self.history_stack[0]['size'] = 0
 
         # always trigger history modified (for i.e. updateEditMenu)
         for callback in self._history_modified_listeners: callback()
@@ -173,55 +199,214 @@ class SceneHistory():
 
     def createHistoryStamp(self, desc: str) -> dict:
         """
-        Create History Stamp. Internally serialize whole scene and the current selection
+        Create History Stamp. Internally serialize whole scene, compare it with the last stored state and keep only
+        the difference and the current selection
 
         :param desc: Descriptive label for the History Stamp
-        :return: History stamp serializing state of `Scene` and current selection
+        :return: History stamp containing delta to the previous History Stamp and current selection
         :rtype: ``dict``
         """
+        new_state = self.createState(self.scene.serialize())
+        delta = None if self._state is None else self.createDelta(self._state, new_state)
+        self._state = new_state
+
         history_stamp = {
             'desc': desc,
-            'snapshot': self.scene.serialize(),
+            'delta': delta,
             'selection': self.captureCurrentSelection(),
+            'size': 0 if delta is None else self.getDeltaSize(delta),
         }
 
         return history_stamp
 
-    def restoreHistoryStamp(self, history_stamp: dict):
+    def createState(self, snapshot: dict) -> dict:
+        """
+        Split serialized `Scene` into `Scene` properties and `Nodes` and `Edges` indexed by their ids
+
+        :param snapshot: serialized :class:`~nodeeditor.node_scene.Scene`
+        :type snapshot: ``dict``
+        :return: ``dict`` with ``scene``, ``nodes`` and ``edges``
+        :rtype: ``dict``
+        """
+        return {
+            'scene': OrderedDict((key, value) for key, value in snapshot.items() if key not in ('nodes', 'edges')),
+            'nodes': OrderedDict((node_data['id'], node_data) for node_data in snapshot['nodes']),
+            'edges': OrderedDict((edge_data['id'], edge_data) for edge_data in snapshot['edges']),
+        }
+
+    def createDelta(self, old_state: dict, new_state: dict) -> dict:
+        """
+        Create difference between two states created by :meth:`createState`
+
+        :return: ``dict`` with changed ``scene`` properties ``{key: [old, new]}`` and for ``nodes`` and ``edges``
+            ``added`` and ``removed`` data and ``changed`` properties ``{id: {key: [old, new]}}``
+        :rtype: ``dict``
+        """
+        return {
+            'scene': self.createPropertiesDelta(old_state['scene'], new_state['scene']),
+            'nodes': self.createItemsDelta(old_state['nodes'], new_state['nodes']),
+            'edges': self.createItemsDelta(old_state['edges'], new_state['edges']),
+        }
+
+    def createPropertiesDelta(self, old_data: dict, new_data: dict) -> dict:
+        """Returns ``{key: [old, new]}`` for all properties which differ"""
+        delta = {}
+        for key in set(old_data) | set(new_data):
+            old_value, new_value = old_data.get(key), new_data.get(key)
+            if old_value != new_value:
+                delta[key] = [old_value, new_value]
+        return delta
+
+    def createItemsDelta(self, old_items: dict, new_items: dict) -> dict:
+        """Returns added, removed and changed items between two ``{id: data}`` dictionaries"""
+        delta = {'added': OrderedDict(), 'removed': OrderedDict(), 'changed': OrderedDict()}
+        for item_id, old_data in old_items.items():
+            if item_id not in new_items:
+                delta['removed'][item_id] = old_data
+        for item_id, new_data in new_items.items():
+            old_data = old_items.get(item_id)
+            if old_data is None:
+                delta['added'][item_id] = new_data
+            elif old_data != new_data:
+                delta['changed'][item_id] = self.createPropertiesDelta(old_data, new_data)
+        return delta
+
+    def getDeltaSize(self, delta: dict) -> int:
+        """Returns approximate size of the `delta` in bytes"""
+        try:
+            return len(json.dumps(delta, default=str))
+        except Exception as e:
+            dumpException(e)
+            return 0
+
+    def applyDeltaToState(self, delta: dict, backward: bool=False):
+        """
+        Apply `delta` to the stored state
+
+        :param delta: delta created by :meth:`createDelta`
+        :type delta: ``dict``
+        :param backward: ``True`` to revert the `delta`
+        :type backward: ``bool``
+        """
+        old, new = (1, 0) if backward else (0, 1)
+        for key, values in delta['scene'].items():
+            self._state['scene'][key] = values[new]
+
+        for kind in ('nodes', 'edges'):
+            items = self._state[kind]
+            added, removed = delta[kind]['added'], delta[kind]['removed']
+            if backward: added, removed = removed, added
+            for item_id in removed:
+                items.pop(item_id, None)
+            for item_id, data in added.items():
+                items[item_id] = data
+            for item_id, properties in delta[kind]['changed'].items():
+                data = OrderedDict(items[item_id])
+                for key, values in properties.items():
+                    data[key] = values[new]
+                items[item_id] = data
+
+    def applyDeltaToScene(self, delta: dict, backward: bool=False):
+        """
+        Apply `delta` to the `Scene`. Only `Nodes` and `Edges` which differ are created, removed or deserialized.
+        Has to be called after :meth:`applyDeltaToState`, because it reads the full data of changed items from the
+        stored state.
+
+        :param delta: delta created by :meth:`createDelta`
+        :type delta: ``dict``
+        :param backward: ``True`` to revert the `delta`
+        :type backward: ``bool``
+        """
+        nodes_added, nodes_removed = delta['nodes']['added'], delta['nodes']['removed']
+        edges_added, edges_removed = delta['edges']['added'], delta['edges']['removed']
+        if backward:
+            nodes_added, nodes_removed = nodes_removed, nodes_added
+            edges_added, edges_removed = edges_removed, edges_added
+
+        hashmap = {}
+
+        for edge_id in edges_removed:
+            edge = self.scene.getEdgeByID(edge_id)
+            if edge is not None: edge.remove()
+
+        for node_id in nodes_removed:
+            node = self.scene.getNodeByID(node_id)
+            if node is not None: node.remove()
+
+        deserialized_nodes = []
+        for node_id in list(nodes_added) + list(delta['nodes']['changed']):
+            node_data = deepcopy(self._state['nodes'][node_id])
+            try:
+                node = self.scene.getNodeByID(node_id)
+                if node is None:
+                    node = self.scene.getNodeClassFromData(node_data)(self.scene)
+                node.deserialize(node_data, hashmap, True)
+                node.onDeserialized(node_data)
+                deserialized_nodes.append(node)
+            except: dumpException()
+
+        for edge_id in list(edges_added) + list(delta['edges']['changed']):
+            edge_data = self._state['edges'][edge_id]
+            try:
+                for socket_id in (edge_data['start'], edge_data['end']):
+                    if socket_id not in hashmap: hashmap[socket_id] = self.scene.getSocketByID(socket_id)
+                edge = self.scene.getEdgeByID(edge_id)
+                if edge is None:
+                    Edge(self.scene).deserialize(edge_data, hashmap, True)
+                else:
+                    edge.deserialize(edge_data, hashmap, True)
+            except: dumpException()
+
+        scene_properties = delta['scene']
+        if 'id' in scene_properties:
+            self.scene.id = self._state['scene']['id']
+        if 'eval_highlight_color' in scene_properties or 'eval_highlight_color_alpha' in scene_properties:
+            self.scene.deserializeEvalHighlightColor(self._state['scene'])
+        if 'socket_colors' in scene_properties or 'socket_colors_alpha' in scene_properties:
+            self.scene.deserializeSocketColors(self._state['scene'])
+        if 'edge_color' in scene_properties or 'edge_color_alpha' in scene_properties or \
+                'is_get_edge_color_from_socket' in scene_properties or edges_added:
+            self.scene.deserializeEdgeColor(self._state['scene'])
+
+        for node in deserialized_nodes:
+            node.evalAfterDeserialize()
+
+    def restoreHistoryStamp(self, history_stamp: dict, backward: bool=False):
         """
-        Restore History Stamp to current `Scene` with selection of items included
+        Apply delta of the History Stamp to current `Scene` and restore selection of the current step
 
-        :param history_stamp: History Stamp to restore
+        :param history_stamp: History Stamp to apply. When undoing it is the stamp which was just undone
         :type history_stamp: ``dict``
+        :param backward: ``True`` for undo
+        :type backward: ``bool``
         """
-        if DEBUG: print("RHS: ", history_stamp['desc'])
+        if DEBUG: print("RHS: ", history_stamp['desc'], "backward" if backward else "forward")
 
         try:
             self.undo_selection_has_changed = False
             previous_selection = self.captureCurrentSelection()
             if DEBUG_SELECTION: print("selected nodes before restore:", previous_selection['nodes'])
 
-            self.scene.deserialize(history_stamp['snapshot'])
+            if history_stamp['delta'] is not None:
+                self.applyDeltaToState(history_stamp['delta'], backward)
+                self.applyDeltaToScene(history_stamp['delta'], backward)
 
             # restore selection
+            selection = self.history_stack[self.history_current_step]['selection']
 
             # first clear all selection on edges
             for edge in self.scene.edges: edge.grEdge.setSelected(False)
             # now restore selected edges from history_stamp
-            for edge_id in history_stamp['selection']['edges']:
-                for edge in self.scene.edges:
-                    if edge.id == edge_id:
-                        edge.grEdge.setSelected(True)
-                        break
+            for edge_id in selection['edges']:
+                edge = self.scene.getEdgeByID(edge_id)
+                if edge is not None: edge.grEdge.setSelected(True)
 
             # first clear all selection on nodes
             for node in self.scene.nodes: node.grNode.setSelected(False)
             # now restore selected nodes from history_stamp
-            for node_id in history_stamp['selection']['nodes']:
-                for node in self.scene.nodes:
-                    if node.id == node_id:
-                        node.grNode.setSelected(True)
-                        break
+            for node_id in selection['nodes']:
+                node = self.scene.getNodeByID(node_id)
+                if node is not None: node.grNode.setSelected(True)
 
             current_selection = self.captureCurrentSelection()
             if DEBUG_SELECTION: print("selected nodes after restore:", current_selection['nodes'])
@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+"""
+A module containing the process pool which runs the computations of `Nodes` with ``run_in_process`` enabled.
+
+NumPy arrays bigger than :data:`SHARED_MEMORY_THRESHOLD` are transferred between the processes through
+``multiprocessing.shared_memory`` blocks, everything else is pickled. The pool is shared by all `Scenes` and its
+size can be changed with :func:`setProcessPoolSize`.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing.shared_memory import SharedMemory
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+DEBUG = False
+
+SHARED_MEMORY_THRESHOLD = 64 * 1024     #: NumPy arrays with at least this many bytes are sent through shared memory
+
+_process_pool = None
+_process_pool_size = None
+
+
+class SharedArray():
+    """Picklable reference to a NumPy array stored in a shared memory block"""
+    __slots__ = ('name', 'shape', 'dtype')
+
+    def __init__(self, name: str, shape: tuple, dtype: str):
+        self.name = name
+        self.shape = shape
+        self.dtype = dtype
+
+    def __getstate__(self):
+        return self.name, self.shape, self.dtype
+
+    def __setstate__(self, state):
+        self.name, self.shape, self.dtype = state
+
+
+def getProcessPoolSize() -> int:
+    """Returns number of worker processes used by the process pool
+
+    :rtype: ``int``
+    """
+    return _process_pool_size or os.cpu_count() or 1
+
+
+def setProcessPoolSize(size: int = None):
+    """
+    Change number of worker processes. Running computations are finished by the old pool
+
+    :param size: number of worker processes or ``None`` for the number of CPU cores
+    :type size: ``int``
+    """
+    global _process_pool_size
+    if size is not None and size < 1: size = None
+    if size == _process_pool_size: return
+    _process_pool_size = size
+    shutdownProcessPool(wait=False)
+
+
+def getProcessPool() -> ProcessPoolExecutor:
+    """Returns the shared ``ProcessPoolExecutor``. It is created with the first computation"""
+    global _process_pool
+    if _process_pool is None:
+        if DEBUG: print("PROCESSES: starting pool with %d processes" % getProcessPoolSize())
+        _process_pool = ProcessPoolExecutor(max_workers=getProcessPoolSize())
+    return _process_pool
+
+
+def shutdownProcessPool(wait: bool = True):
+    """Stop the worker processes. A new pool is started with the next computation"""
+    global _process_pool
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=wait)
+        _process_pool = None
+
+
+def isBrokenProcessPool(exception: Exception) -> bool:
+    """Returns ``True`` if `exception` means that a worker process died and the pool has to be restarted"""
+    return isinstance(exception, BrokenProcessPool)
+
+
+def packPayload(value, blocks: list):
+    """
+    Replace big NumPy arrays in `value` (also inside of lists, tuples and dicts) with :class:`SharedArray`
+
+    :param value: payload to be sent to another process
+    :param blocks: list where created ``SharedMemory`` blocks are appended
+    :type blocks: ``list``
+    :return: payload which can be pickled cheaply
+    """
+    if np is not None and isinstance(value, np.ndarray):
+        if value.nbytes < SHARED_MEMORY_THRESHOLD or value.dtype.hasobject:
+            return value
+        block = SharedMemory(create=True, size=value.nbytes)
+        blocks.append(block)
+        np.ndarray(value.shape, dtype=value.dtype, buffer=block.buf)[...] = value
+        return SharedArray(block.name, value.shape, value.dtype.str)
+    if type(value) is list:
+        return [packPayload(item, blocks) for item in value]
+    if type(value) is tuple:
+        return tuple(packPayload(item, blocks) for item in value)
+    if type(value) is dict:
+        return {key: packPayload(item, blocks) for key, item in value.items()}
+    return value
+
+
+def unpackPayload(value, blocks: list, copy: bool = False):
+    """
+    Replace :class:`SharedArray` references in `value` with NumPy arrays
+
+    :param value: payload created by :func:`packPayload`
+    :param blocks: list where attached ``SharedMemory`` blocks are appended
+    :type blocks: ``list``
+    :param copy: ``True`` if the arrays should be copied out of the shared memory, ``False`` for views
+    :type copy: ``bool``
+    """
+    if isinstance(value, SharedArray):
+        block = SharedMemory(name=value.name)
+        blocks.append(block)
+        array = np.ndarray(value.shape, dtype=np.dtype(value.dtype), buffer=block.buf)
+        return array.copy() if copy else array
+    if type(value) is list:
+        return [unpackPayload(item, blocks, copy) for item in value]
+    if type(value) is tuple:
+        return tuple(unpackPayload(item, blocks, copy) for item in value)
+    if type(value) is dict:
+        return {key: unpackPayload(item, blocks, copy) for key, item in value.items()}
+    return value
+
+
+def releaseBlocks(blocks: list, unlink: bool = False):
+    """
+    Close ``SharedMemory`` blocks and optionally free them
+
+    :param blocks: list of ``SharedMemory``
+    :type blocks: ``list``
+    :param unlink: ``True`` if the blocks are not needed by any process anymore
+    :type unlink: ``bool``
+    """
+    for block in blocks:
+        try:
+            block.close()
+        except BufferError:
+            # views on the block still exist, the mapping is released with them
+            pass
+        if unlink:
+            try:
+                block.unlink()
+            except FileNotFoundError:
+                pass
+    del blocks[:]
+
+
+def runProcessCompute(function, state, inputValues: list, inputSocketIndex: int):
+    """
+    Entry point executed in the worker process. Arrays from shared memory are passed to `function` as views,
+    arrays in the result are put into new shared memory blocks which are freed by the GUI process
+
+    :param function: module level function ``function(state, inputValues, inputSocketIndex)``
+    :param state: picklable state of the `Node` returned by :meth:`~nodeeditor.node_node.Node.getProcessState`
+    :param inputValues: payload created by :func:`packPayload`
+    :type inputValues: ``list``
+    :param inputSocketIndex: index of the input `Socket` which triggered the computation
+    :type inputSocketIndex: ``int``
+    :return: result packed by :func:`packPayload`
+    """
+    blocks, result_blocks = [], []
+    try:
+        inputValues = unpackPayload(inputValues, blocks)
+        result = function(state, inputValues, inputSocketIndex)
+        inputValues = None
+        try:
+            result = packPayload(result, result_blocks)
+        except Exception:
+            releaseBlocks(result_blocks, unlink=True)
+            raise
+        releaseBlocks(result_blocks)
+        return result
+    finally:
+        inputValues = None
+        releaseBlocks(blocks)
@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+"""
+A module containing the opt-in profiler which measures the dataflow (receiveData/sendDataFromSocket) of `Nodes`
+"""
+import os, sys, json, threading
+from collections import OrderedDict, deque
+from time import perf_counter
+
+DEBUG = False
+
+
+def getPayloadSize(data) -> int:
+    """
+    Estimate size of `data` in bytes. Uses ``nbytes`` for NumPy arrays, length for bytes and strings and a shallow
+    ``sys.getsizeof`` otherwise.
+
+    :param data: payload sent between `Nodes`
+    :return: estimated size in bytes
+    :rtype: ``int``
+    """
+    nbytes = getattr(data, 'nbytes', None)
+    if isinstance(nbytes, int):
+        return nbytes
+    if isinstance(data, (bytes, bytearray, str)):
+        return len(data)
+    if isinstance(data, (list, tuple)):
+        return sys.getsizeof(data) + sum(sys.getsizeof(item) for item in data)
+    if isinstance(data, dict):
+        return sys.getsizeof(data) + sum(sys.getsizeof(key) + sys.getsizeof(value) for key, value in data.items())
+    return sys.getsizeof(data)
+
+
+class ProfileRecord():
+    """Class holding accumulated statistics of one `Node` or one `Socket`"""
+    def __init__(self, title: str = ""):
+        """
+        :param title: title of the profiled `Node`
+        :type title: ``str``
+
+        :Instance Attributes:
+
+        - **calls** - number of measured calls
+        - **total_time** - cumulative time in seconds including nested calls
+        - **self_time** - time in seconds without nested calls
+        - **payload_bytes** - sum of estimated payload sizes in bytes
+        - **max_payload_bytes** - biggest payload in bytes
+        """
+        self.title = title
+        self.calls = 0
+        self.total_time = 0.0
+        self.self_time = 0.0
+        self.payload_bytes = 0
+        self.max_payload_bytes = 0
+
+    def add(self, total_time: float, self_time: float, payload_bytes: int):
+        self.calls += 1
+        self.total_time += total_time
+        self.self_time += self_time
+        self.payload_bytes += payload_bytes
+        if payload_bytes > self.max_payload_bytes: self.max_payload_bytes = payload_bytes
+
+    def serialize(self) -> OrderedDict:
+        return OrderedDict([
+            ('title', self.title),
+            ('calls', self.calls),
+            ('total_time', self.total_time),
+            ('self_time', self.self_time),
+            ('payload_bytes', self.payload_bytes),
+            ('max_payload_bytes', self.max_payload_bytes),
+        ])
+
+
+class SceneProfiler():
+    """Class contains all the code for profiling the evaluation of `Nodes` in the `Scene`.
+
+    The :class:`~nodeeditor.node_scene_evaluator.SceneEvaluator` opens a span for every ``receiveData`` and
+    ``sendDataFromSocket`` hop while the profiler is enabled. Spans are accumulated per `Node` and per `Socket` and
+    stored as Chrome trace events (``chrome://tracing`` / Perfetto).
+    """
+    def __init__(self, scene: 'Scene'):
+        """
+        :param scene: Reference to the :class:`~nodeeditor.node_scene.Scene`
+        :type scene: :class:`~nodeeditor.node_scene.Scene`
+
+        :Instance Attributes:
+
+        - **scene** - reference to the :class:`~nodeeditor.node_scene.Scene`
+        - **enabled** - ``True`` if the evaluator should report spans to this profiler
+        - **show_overlay** - ``True`` if the `Graphics Nodes` should paint their heat overlay
+        - **max_trace_events** - number of newest trace events which are kept in memory
+        """
+        self.scene = scene
+        self.enabled = False
+        self.show_overlay = True
+        self.max_trace_events = 100000
+
+        self.clear()
+
+    def clear(self):
+        """Reset all collected statistics and trace events"""
+        self.node_stats = OrderedDict()
+        self.socket_stats = OrderedDict()
+        self.trace_events = deque(maxlen=self.max_trace_events)
+        self.max_self_time = 0.0
+        self._stack = []
+        self._start_time = perf_counter()
+
+    def setEnabled(self, value: bool = True):
+        """Enable or disable the profiler. Collected statistics are kept
+
+        :param value: new state
+        :type value: ``bool``
+        """
+        self.enabled = value
+
+    def beginSpan(self, node: 'Node', name: str, socketIndex: int = -1, data=None, is_input: bool = True):
+        """
+        Start measuring a hop of `node`. Every call has to be followed by :meth:`endSpan`
+
+        :param node: profiled `Node`
+        :type node: :class:`~nodeeditor.node_node.Node`
+        :param name: name of the hop (i.e. ``receiveData``)
+        :type name: ``str``
+        :param socketIndex: index of the `Socket` the data goes through or ``-1`` for all output `Sockets`
+        :type socketIndex: ``int``
+        :param data: transferred payload
+        :param is_input: ``True`` if `socketIndex` is an input `Socket` index
+        :type is_input: ``bool``
+        """
+        self._stack.append([node, name, socketIndex, is_input, getPayloadSize(data), perf_counter(), 0.0])
+
+    def endSpan(self):
+        """Stop measuring the innermost hop and accumulate its statistics"""
+        if not self._stack: return
+        end_time = perf_counter()
+        node, name, socketIndex, is_input, payload_bytes, start_time, child_time = self._stack.pop()
+        total_time = end_time - start_time
+        self_time = total_time - child_time
+        if self._stack: self._stack[-1][6] += total_time
+
+        record = self.node_stats.get(node)
+        if record is None:
+            record = self.node_stats[node] = ProfileRecord(node.title)
+        record.add(total_time, self_time, payload_bytes)
+        if record.self_time > self.max_self_time: self.max_self_time = record.self_time
+
+        socket_key = (node, "input" if is_input else "output", socketIndex)
+        socket_record = self.socket_stats.get(socket_key)
+        if socket_record is None:
+            socket_record = self.socket_stats[socket_key] = ProfileRecord(node.title)
+        socket_record.add(total_time, self_time, payload_bytes)
+
+        self.trace_events.append({
+            'name': "%s.%s" % (node.title, name),
+            'cat': name,
+            'ph': 'X',
+            'ts': (start_time - self._start_time) * 1e6,
+            'dur': total_time * 1e6,
+            'pid': os.getpid(),
+            'tid': threading.get_ident(),
+            'args': {
+                'node': str(node.id),
+                'socket': "%s %d" % ("input" if is_input else "output", socketIndex),
+                'bytes': payload_bytes,
+            },
+        })
+
+    def getNodeStats(self, node: 'Node') -> ProfileRecord:
+        """Return :class:`ProfileRecord` of `node` or ``None`` if it was not measured yet"""
+        return self.node_stats.get(node)
+
+    def getHeat(self, node: 'Node') -> float:
+        """
+        Return self time of `node` relative to the slowest `Node`
+
+        :return: value between ``0.0`` (no time spent) and ``1.0`` (slowest `Node`)
+        :rtype: ``float``
+        """
+        record = self.node_stats.get(node)
+        if record is None or self.max_self_time <= 0.0:
+            return 0.0
+        return record.self_time / self.max_self_time
+
+    def getReport(self) -> list:
+        """
+        Return statistics of all measured `Nodes` sorted by self time
+
+        :return: list of serialized :class:`ProfileRecord` with added ``id`` and ``sockets``
+        :rtype: ``list``
+        """
+        sockets = {}
+        for (node, direction, socketIndex), record in self.socket_stats.items():
+            entry = OrderedDict([('direction', direction), ('index', socketIndex)])
+            entry.update(record.serialize())
+            del entry['title']
+            sockets.setdefault(node, []).append(entry)
+        report = []
+        for node, record in sorted(self.node_stats.items(), key=lambda item: item[1].self_time, reverse=True):
+            entry = record.serialize()
+            entry['id'] = node.id
+            entry['sockets'] = sockets.get(node, [])
+            report.append(entry)
+        return report
+
+    def printReport(self):
+        """Print table of the measured `Nodes` to the console"""
+        print("%-30s %10s %12s %12s %14s" % ("Node", "calls", "total [ms]", "self [ms]", "payload [B]"))
+        for entry in self.getReport():
+            print("%-30s %10d %12.3f %12.3f %14d" % (entry['title'][:30], entry['calls'], entry['total_time'] * 1e3,
+                                                     entry['self_time'] * 1e3, entry['payload_bytes']))
+
+    def exportChromeTrace(self, filename: str):
+        """
+        Save collected trace events as Chrome trace-event JSON which can be opened in ``chrome://tracing``
+
+        :param filename: where to save the trace
+        :type filename: ``str``
+        """
+        with open(filename, "w") as file:
+            file.write(json.dumps({
+                'traceEvents': list(self.trace_events),
+                'displayTimeUnit': 'ms',
+                'otherData': {'nodes': self.getReport()},
+            }, default=str))
+        if DEBUG: print("PROFILER: exported %d events to %s" % (len(self.trace_events), filename))
@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+"""
+A module containing the sandbox which runs :attr:`~nodeeditor.node_node.Node.process_compute` of one `Node` in a
+dedicated long-lived subprocess with a time budget per call and a memory limit
+"""
+import importlib
+import threading
+import multiprocessing
+
+from nodeeditor.node_scene_processes import packPayload, unpackPayload, releaseBlocks, runProcessCompute
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+DEBUG = False
+
+SANDBOX_TIME_BUDGET = 1.0               #: default number of seconds one call may take
+SANDBOX_MEMORY_LIMIT = 1024 * 1024**2   #: default address space limit of the sandbox process in bytes
+SANDBOX_START_TIMEOUT = 60.0            #: seconds the process may take to start and import the module of the `Node`
+SANDBOX_SETUP_BUDGET = 10.0             #: additional seconds for the first call of a new process (i.e. script setup)
+
+
+class SandboxError(Exception): pass
+class SandboxTimeout(SandboxError): pass
+
+
+def sandboxMain(connection, memory_limit: int, warmup_module: str = None):
+    """Loop of the sandbox process. Imports `warmup_module` (the module of the computed function), applies the memory
+    limit and sends ``"ready"``. Then it receives ``(function, state, inputValues, inputSocketIndex)`` and sends back
+    ``(True, result)`` or ``(False, exception)`` until it receives ``None``"""
+    # imports reserve a lot of address space (i.e. NumPy, Qt), so they happen before the limit is applied
+    if warmup_module:
+        try:
+            importlib.import_module(warmup_module)
+        except Exception as e:
+            if DEBUG: print("SANDBOX: warm-up import of %s failed" % warmup_module, e)
+    if resource is not None and memory_limit:
+        try:
+            resource.setrlimit(resource.RLIMIT_AS, (memory_limit, memory_limit))
+        except (ValueError, OSError) as e:
+            if DEBUG: print("SANDBOX: memory limit not supported", e)
+    connection.send("ready")
+
+    while True:
+        try:
+            message = connection.recv()
+        except EOFError:
+            return
+        if message is None:
+            return
+        try:
+            connection.send((True, runProcessCompute(*message)))
+        except Exception as e:
+            try:
+                connection.send((False, e))
+            except Exception:
+                connection.send((False, SandboxError("%s: %s" % (e.__class__.__name__, e))))
+
+
+class SandboxProcess():
+    """Class owning the subprocess of one `Node`.
+
+    The process is started with the first call and kept alive, so the state of the computation (i.e. the namespace of
+    a script) survives between calls. The start, including the import of the module of the computed function, may
+    take up to :data:`SANDBOX_START_TIMEOUT` seconds and the first call gets :data:`SANDBOX_SETUP_BUDGET` seconds
+    on top of `time_budget`. A call which exceeds its budget kills the process and raises
+    :class:`SandboxTimeout`, the next call starts a fresh one. Inputs and results are transferred through a pipe,
+    big NumPy arrays through shared memory.
+    """
+    def __init__(self, time_budget: float = SANDBOX_TIME_BUDGET, memory_limit: int = SANDBOX_MEMORY_LIMIT):
+        """
+        :param time_budget: number of seconds one call may take
+        :type time_budget: ``float``
+        :param memory_limit: address space limit of the process in bytes or ``None``. Only supported on POSIX
+        :type memory_limit: ``int``
+
+        :Instance Attributes:
+
+        - **time_budget** - number of seconds one call may take
+        - **memory_limit** - address space limit of the process in bytes
+        - **call_count** - number of calls since the process was started
+        """
+        self.time_budget = time_budget
+        self.memory_limit = memory_limit
+
+        self.process = None
+        self.connection = None
+        self.call_count = 0
+        self._lock = threading.Lock()
+
+    def isAlive(self) -> bool:
+        """Returns ``True`` if the subprocess is running
+
+        :rtype: ``bool``
+        """
+        return self.process is not None and self.process.is_alive()
+
+    def start(self, warmup_module: str = None):
+        """
+        Start the subprocess if it is not running and wait until it is ready
+
+        :param warmup_module: name of the module imported by the process before it gets ready
+        :type warmup_module: ``str``
+        :raises: :class:`SandboxError` if the process didn't get ready within :data:`SANDBOX_START_TIMEOUT`
+        """
+        if self.isAlive(): return
+        self.kill()
+        context = multiprocessing.get_context("spawn")
+        self.connection, child_connection = context.Pipe()
+        self.process = context.Process(target=sandboxMain, args=(child_connection, self.memory_limit, warmup_module), daemon=True)
+        self.process.start()
+        child_connection.close()
+        self.call_count = 0
+        try:
+            ready = self.connection.poll(SANDBOX_START_TIMEOUT) and self.connection.recv() == "ready"
+        except (EOFError, OSError):
+            ready = False
+        if not ready:
+            self.kill()
+            raise SandboxError("Sandbox process didn't start within %g s" % SANDBOX_START_TIMEOUT)
+        if DEBUG: print("SANDBOX: started process", self.process.pid)
+
+    def stop(self):
+        """Ask the subprocess to finish and kill it if it doesn't"""
+        if self.process is None: return
+        try:
+            self.connection.send(None)
+        except (OSError, ValueError):
+            pass
+        self.process.join(0.5)
+        self.kill()
+
+    def kill(self):
+        """Kill the subprocess immediately"""
+        if self.process is not None:
+            if self.process.is_alive():
+                if DEBUG: print("SANDBOX: killing process", self.process.pid)
+                self.process.kill()
+            self.process.join()
+        if self.connection is not None:
+            self.connection.close()
+        self.process = None
+        self.connection = None
+
+    def call(self, function, state, inputValues: list, inputSocketIndex: int):
+        """
+        Run ``function(state, inputValues, inputSocketIndex)`` in the subprocess. Blocks the calling thread, so
+        it is supposed to be called from a worker thread
+
+        :param function: module level function
+        :param state: picklable state of the `Node`
+        :param inputValues: input values of the `Node`
+        :type inputValues: ``list``
+        :param inputSocketIndex: index of the input `Socket` which triggered the computation
+        :type inputSocketIndex: ``int``
+        :return: result of `function`
+        :raises: :class:`SandboxTimeout` if the call exceeded `time_budget`, :class:`SandboxError` if the process
+            died (i.e. because of the memory limit)
+        """
+        with self._lock:
+            self.start(getattr(function, "__module__", None))
+            time_budget = self.time_budget + (SANDBOX_SETUP_BUDGET if self.call_count == 0 else 0)
+            self.call_count += 1
+            blocks = []
+            try:
+                self.connection.send((function, state, packPayload(inputValues, blocks), inputSocketIndex))
+                if not self.connection.poll(time_budget):
+                    self.kill()
+                    raise SandboxTimeout("Computation exceeded time budget of %g s" % time_budget)
+                ok, result = self.connection.recv()
+            except (EOFError, OSError) as e:
+                self.kill()
+                raise SandboxError("Sandbox process died: %s" % e)
+            finally:
+                releaseBlocks(blocks, unlink=True)
+
+        if not ok:
+            raise result
+        result_blocks = []
+        try:
+            return unpackPayload(result, result_blocks, copy=True)
+        finally:
+            releaseBlocks(result_blocks, unlink=True)
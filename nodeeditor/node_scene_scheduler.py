@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""
+A module containing the scheduler of delayed callbacks used by delay-type `Nodes`. All delayed calls of a `Scene`
+are kept in one heap and driven by a single ``QTimer``, instead of one timer per message.
+"""
+import heapq
+from itertools import count
+from time import monotonic
+
+from PyQt5.QtCore import QObject, QTimer, Qt
+
+from nodeeditor.utils_no_qt import dumpException
+
+DEBUG = False
+
+SCHEDULER_MAX_IN_FLIGHT = 100000    #: default maximal number of pending calls per owner
+
+
+class SceneScheduler(QObject):
+    """Class calling callbacks after a delay.
+
+    Calls of one owner (i.e. a `Node`) are delivered in the order in which they were scheduled, even if the delay is
+    reduced in between. The number of pending calls per owner is bounded, calls over the limit are dropped. All calls
+    of an owner are cancelled with :meth:`cancel`, which is done when a `Node` is removed.
+    """
+    def __init__(self, scene: 'Scene'):
+        """
+        :param scene: Reference to the :class:`~nodeeditor.node_scene.Scene`
+        :type scene: :class:`~nodeeditor.node_scene.Scene`
+
+        :Instance Attributes:
+
+        - **scene** - reference to the :class:`~nodeeditor.node_scene.Scene`
+        - **timer** - single-shot ``QTimer`` started for the next due call
+        - **dropped_count** - number of calls dropped because their owner had too many pending calls
+        """
+        super().__init__()
+        self.scene = scene
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setTimerType(Qt.PreciseTimer)
+        self.timer.timeout.connect(self.onTimeout)
+
+        self._sequence = count()
+        self.clear()
+
+    def clear(self):
+        """Cancel all pending calls"""
+        self.timer.stop()
+        self._heap = []
+        self._owners = {}       # owner: [unique generation, pending count, due time of the last call]
+        self.dropped_count = 0
+
+    def getPendingCount(self, owner) -> int:
+        """Returns number of pending calls of `owner`
+
+        :rtype: ``int``
+        """
+        state = self._owners.get(owner)
+        return state[1] if state is not None else 0
+
+    def schedule(self, owner, delay: int, callback: 'function', args: tuple = (), max_in_flight: int = SCHEDULER_MAX_IN_FLIGHT) -> bool:
+        """
+        Call ``callback(*args)`` after `delay` milliseconds
+
+        :param owner: object the call belongs to, i.e. the `Node`
+        :param delay: delay in milliseconds
+        :type delay: ``int``
+        :param callback: function to be called
+        :type callback: ``function``
+        :param args: arguments of `callback`
+        :type args: ``tuple``
+        :param max_in_flight: maximal number of pending calls of `owner`
+        :type max_in_flight: ``int``
+        :return: ``False`` if the call was dropped because `owner` has too many pending calls
+        :rtype: ``bool``
+        """
+        state = self._owners.get(owner)
+        if state is None:
+            state = self._owners[owner] = [next(self._sequence), 0, 0.0]
+        if state[1] >= max_in_flight:
+            self.dropped_count += 1
+            return False
+
+        # never before the last call of the same owner
+        due = max(monotonic() + delay / 1000.0, state[2])
+        state[1] += 1
+        state[2] = due
+        sequence = next(self._sequence)
+        heapq.heappush(self._heap, (due, sequence, owner, state[0], callback, args))
+        if self._heap[0][1] == sequence or not self.timer.isActive():
+            self.restartTimer()
+        return True
+
+    def cancel(self, owner):
+        """Cancel all pending calls of `owner`. Cancelled entries are skipped when they get due"""
+        state = self._owners.pop(owner, None)
+        if state is not None and state[1] > 0 and DEBUG:
+            print("SCHEDULER: cancelled %d calls of %s" % (state[1], owner))
+
+    def restartTimer(self):
+        """Start the timer for the earliest pending call"""
+        if not self._heap:
+            self.timer.stop()
+            return
+        msec = max(0, int((self._heap[0][0] - monotonic()) * 1000.0 + 0.5))
+        self.timer.start(msec)
+
+    def onTimeout(self):
+        now = monotonic() + 0.0005
+        while self._heap and self._heap[0][0] <= now:
+            due, sequence, owner, generation, callback, args = heapq.heappop(self._heap)
+            state = self._owners.get(owner)
+            if state is None or state[0] != generation:
+                continue
+            state[1] -= 1
+            if state[1] == 0:
+                del self._owners[owner]
+            try:
+                callback(*args)
+            except Exception as e: dumpException(e)
+        self.restartTimer()
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+"""
+A module containing the incremental cycle detection of the `Scene`. It keeps a topological order of all `Nodes`
+which is updated with every new `Edge` (Pearce-Kelly algorithm), so only the `Nodes` between the two ends of a new
+`Edge` have to be searched instead of the whole graph.
+
+`Edges` with ``is_feedback`` enabled are ignored. They close loops and the
+:class:`~nodeeditor.node_scene_evaluator.SceneEvaluator` delivers data sent over them on the next tick.
+"""
+from weakref import WeakKeyDictionary
+
+DEBUG = False
+
+
+class SceneTopology():
+    """Class maintaining the topological order of `Nodes` connected by non-feedback `Edges`"""
+    def __init__(self, scene: 'Scene'):
+        """
+        :param scene: Reference to the :class:`~nodeeditor.node_scene.Scene`
+        :type scene: :class:`~nodeeditor.node_scene.Scene`
+
+        :Instance Attributes:
+
+        - **scene** - reference to the :class:`~nodeeditor.node_scene.Scene`
+        """
+        self.scene = scene
+        self.clear()
+
+    def clear(self):
+        """Forget the order of all `Nodes`"""
+        self._order = WeakKeyDictionary()
+        self._next_order = 0
+
+    def getOrder(self, node: 'Node') -> int:
+        """Returns position of `node` in the topological order. New `Nodes` are appended at the end
+
+        :rtype: ``int``
+        """
+        order = self._order.get(node)
+        if order is None:
+            order = self._order[node] = self._next_order
+            self._next_order += 1
+        return order
+
+    @staticmethod
+    def getEdgeNodes(edge: 'Edge') -> tuple:
+        """Returns ``(producer, consumer)`` `Nodes` of `edge` or ``None`` if it isn't connected on both sides
+
+        :rtype: ``tuple``
+        """
+        if edge.start_socket is None or edge.end_socket is None: return None
+        if edge.start_socket.is_output:
+            return edge.start_socket.node, edge.end_socket.node
+        return edge.end_socket.node, edge.start_socket.node
+
+    @staticmethod
+    def getSuccessors(node: 'Node') -> list:
+        return [edge.getOtherSocket(socket).node for socket in node.outputs for edge in socket.edges
+                if not edge.is_feedback and edge.getOtherSocket(socket) is not None]
+
+    @staticmethod
+    def getPredecessors(node: 'Node') -> list:
+        return [edge.getOtherSocket(socket).node for socket in node.inputs for edge in socket.edges
+                if not edge.is_feedback and edge.getOtherSocket(socket) is not None]
+
+    def searchForward(self, node: 'Node', upper_bound: int, target: 'Node') -> list:
+        """Nodes reachable from `node` with order below `upper_bound` or ``None`` if `target` is reachable"""
+        visited, stack = {node}, [node]
+        while stack:
+            current = stack.pop()
+            for successor in self.getSuccessors(current):
+                if successor is target: return None
+                if successor not in visited and self.getOrder(successor) < upper_bound:
+                    visited.add(successor)
+                    stack.append(successor)
+        return list(visited)
+
+    def searchBackward(self, node: 'Node', lower_bound: int) -> list:
+        """Nodes reaching `node` with order above `lower_bound`"""
+        visited, stack = {node}, [node]
+        while stack:
+            current = stack.pop()
+            for predecessor in self.getPredecessors(current):
+                if predecessor not in visited and self.getOrder(predecessor) > lower_bound:
+                    visited.add(predecessor)
+                    stack.append(predecessor)
+        return list(visited)
+
+    def wouldCreateCycle(self, producer: 'Node', consumer: 'Node') -> bool:
+        """
+        Check if a new non-feedback `Edge` from `producer` to `consumer` would close a loop
+
+        :param producer: `Node` with the output `Socket`
+        :type producer: :class:`~nodeeditor.node_node.Node`
+        :param consumer: `Node` with the input `Socket`
+        :type consumer: :class:`~nodeeditor.node_node.Node`
+        :rtype: ``bool``
+        """
+        if producer is consumer: return True
+        upper_bound = self.getOrder(producer)
+        if self.getOrder(consumer) > upper_bound: return False
+        return self.searchForward(consumer, upper_bound, producer) is None
+
+    def addEdge(self, edge: 'Edge') -> bool:
+        """
+        Update the order for new `edge`. Feedback `Edges` and `Edges` which are not connected on both sides are
+        accepted without changes
+
+        :param edge: new :class:`~nodeeditor.node_edge.Edge`
+        :type edge: :class:`~nodeeditor.node_edge.Edge`
+        :return: ``False`` if `edge` closes a loop and has to be a feedback `Edge`
+        :rtype: ``bool``
+        """
+        if edge.is_feedback: return True
+        nodes = self.getEdgeNodes(edge)
+        if nodes is None: return True
+        producer, consumer = nodes
+        if producer is consumer: return False
+
+        lower_bound, upper_bound = self.getOrder(consumer), self.getOrder(producer)
+        if lower_bound > upper_bound: return True
+
+        forward = self.searchForward(consumer, upper_bound, producer)
+        if forward is None:
+            if DEBUG: print("TOPOLOGY: edge closes a loop", edge)
+            return False
+        backward = self.searchBackward(producer, lower_bound)
+
+        # producer and its ancestors move in front of consumer and its descendants, using the same positions
+        forward.sort(key=self.getOrder)
+        backward.sort(key=self.getOrder)
+        positions = sorted(self.getOrder(node) for node in backward + forward)
+        for node, position in zip(backward + forward, positions):
+            self._order[node] = position
+        return True
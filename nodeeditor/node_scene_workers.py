@@ -0,0 +1,223 @@
+# -*- coding: utf-8 -*-
+"""
+A module containing the worker pool which runs :meth:`~nodeeditor.node_node.Node.compute` of offloadable `Nodes`
+outside of the GUI thread or in the worker processes of :mod:`~nodeeditor.node_scene_processes`
+"""
+import traceback
+from collections import deque
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal, pyqtSlot
+
+from nodeeditor.node_scene_processes import getProcessPool, shutdownProcessPool, isBrokenProcessPool, \
+    packPayload, unpackPayload, releaseBlocks, runProcessCompute
+from nodeeditor.utils_no_qt import dumpException
+
+DEBUG = False
+
+
+class ComputeSignals(QObject):
+    """Signals of :class:`ComputeJob`. They are emitted from the worker thread and delivered to the GUI thread"""
+    finished = pyqtSignal(object, object)
+    error = pyqtSignal(object, object)
+
+
+class ComputeJob(QRunnable):
+    """One :meth:`~nodeeditor.node_node.Node.compute` call running in the ``QThreadPool``"""
+    def __init__(self, node: 'Node', inputValues: list, inputSocketIndex: int, signals: ComputeSignals):
+        """
+        :param node: `Node` to compute
+        :type node: :class:`~nodeeditor.node_node.Node`
+        :param inputValues: copy of the input values of the `Node` at the time the job was submitted
+        :type inputValues: ``list``
+        :param inputSocketIndex: index of the input `Socket` which triggered the computation
+        :type inputSocketIndex: ``int``
+        :param signals: signals used to report the result
+        :type signals: :class:`ComputeSignals`
+        """
+        super().__init__()
+        self.node = node
+        self.inputValues = inputValues
+        self.inputSocketIndex = inputSocketIndex
+        self.signals = signals
+        self.setAutoDelete(True)
+
+    def compute(self):
+        return self.node.compute(self.inputValues, self.inputSocketIndex)
+
+    @pyqtSlot()
+    def run(self):
+        try:
+            result = self.compute()
+        except Exception as e:
+            if DEBUG: traceback.print_exc()
+            self.signals.error.emit(self, e)
+            return
+        self.signals.finished.emit(self, result)
+
+
+class SandboxComputeJob(ComputeJob):
+    """One :attr:`~nodeeditor.node_node.Node.process_compute` call running in the sandbox process of the `Node`. The
+    worker thread waits for the sandbox, so the GUI thread is never blocked by the script"""
+    def __init__(self, node: 'Node', inputValues: list, inputSocketIndex: int, signals: ComputeSignals):
+        super().__init__(node, inputValues, inputSocketIndex, signals)
+        self.sandbox = node.getSandbox()
+        self.state = node.getProcessState()
+
+    def compute(self):
+        return self.sandbox.call(self.node.process_compute, self.state, self.inputValues, self.inputSocketIndex)
+
+
+class ProcessComputeJob():
+    """One :attr:`~nodeeditor.node_node.Node.process_compute` call running in the process pool"""
+    def __init__(self, node: 'Node', inputValues: list, inputSocketIndex: int, signals: ComputeSignals):
+        """
+        :param node: `Node` to compute
+        :type node: :class:`~nodeeditor.node_node.Node`
+        :param inputValues: copy of the input values of the `Node` at the time the job was submitted
+        :type inputValues: ``list``
+        :param inputSocketIndex: index of the input `Socket` which triggered the computation
+        :type inputSocketIndex: ``int``
+        :param signals: signals used to report the result
+        :type signals: :class:`ComputeSignals`
+        """
+        self.node = node
+        self.inputValues = inputValues
+        self.inputSocketIndex = inputSocketIndex
+        self.signals = signals
+        self.blocks = []
+
+    def start(self):
+        """Send the job to the process pool. Has to be called from the GUI thread"""
+        try:
+            packed = packPayload(self.inputValues, self.blocks)
+            self.inputValues = None
+            future = getProcessPool().submit(runProcessCompute, self.node.process_compute,
+                                             self.node.getProcessState(), packed, self.inputSocketIndex)
+        except Exception as e:
+            releaseBlocks(self.blocks, unlink=True)
+            if isBrokenProcessPool(e): shutdownProcessPool(wait=False)
+            self.signals.error.emit(self, e)
+            return
+        future.add_done_callback(self.onDone)
+
+    def onDone(self, future):
+        releaseBlocks(self.blocks, unlink=True)
+        try:
+            result = future.result()
+        except Exception as e:
+            if DEBUG: traceback.print_exc()
+            if isBrokenProcessPool(e): shutdownProcessPool(wait=False)
+            self.signals.error.emit(self, e)
+            return
+
+        blocks = []
+        try:
+            result = unpackPayload(result, blocks, copy=True)
+        except Exception as e:
+            self.signals.error.emit(self, e)
+            return
+        finally:
+            releaseBlocks(blocks, unlink=True)
+        self.signals.finished.emit(self, result)
+
+
+class SceneWorkerPool(QObject):
+    """Class dispatching computations of offloadable `Nodes` to a ``QThreadPool``.
+
+    Every `Node` has its own queue of pending computations and at most one computation running, so results of one
+    `Node` are delivered in the order in which the data arrived. `Nodes` with ``run_in_process`` enabled are computed
+    in the shared process pool, `Nodes` with ``run_in_sandbox`` enabled in their own sandbox process. Results are passed to
+    :meth:`~nodeeditor.node_node.Node.onComputed` in the GUI thread, where they are propagated downstream as usual.
+    """
+    def __init__(self, scene: 'Scene', maxThreadCount: int = None):
+        """
+        :param scene: Reference to the :class:`~nodeeditor.node_scene.Scene`
+        :type scene: :class:`~nodeeditor.node_scene.Scene`
+        :param maxThreadCount: number of worker threads or ``None`` for the number of CPU cores
+        :type maxThreadCount: ``int``
+
+        :Instance Attributes:
+
+        - **scene** - reference to the :class:`~nodeeditor.node_scene.Scene`
+        - **threadPool** - ``QThreadPool`` running the computations
+        - **enabled** - if ``False`` the :class:`~nodeeditor.node_scene_evaluator.SceneEvaluator` computes
+          synchronously in the GUI thread
+        """
+        super().__init__()
+        self.scene = scene
+        self.enabled = True
+
+        self.threadPool = QThreadPool()
+        if maxThreadCount is not None: self.threadPool.setMaxThreadCount(maxThreadCount)
+
+        self.signals = ComputeSignals()
+        self.signals.finished.connect(self.onJobFinished)
+        self.signals.error.connect(self.onJobError)
+
+        self.clear()
+
+    def clear(self):
+        """Forget all pending computations. Results of running computations of removed `Nodes` are ignored"""
+        self._queues = {}
+        self._running = set()
+
+    def isBusy(self, node: 'Node' = None) -> bool:
+        """Returns ``True`` if `node` (or any `Node` if ``None``) has a running or pending computation
+
+        :rtype: ``bool``
+        """
+        if node is None:
+            return len(self._running) > 0
+        return node in self._running or len(self._queues.get(node, ())) > 0
+
+    def submit(self, node: 'Node', inputSocketIndex: int = -1):
+        """
+        Queue computation of `node` with its current input values
+
+        :param node: offloadable `Node`
+        :type node: :class:`~nodeeditor.node_node.Node`
+        :param inputSocketIndex: index of the input `Socket` which triggered the computation
+        :type inputSocketIndex: ``int``
+        """
+        if node not in self._queues:
+            self._queues[node] = deque()
+        self._queues[node].append((list(node.inputValues), inputSocketIndex))
+        if node not in self._running:
+            self.startNext(node)
+
+    def startNext(self, node: 'Node'):
+        """Start the oldest pending computation of `node`"""
+        queue = self._queues.get(node)
+        if not queue:
+            self._queues.pop(node, None)
+            return
+        inputValues, inputSocketIndex = queue.popleft()
+        self._running.add(node)
+        if node.run_in_sandbox and node.process_compute is not None:
+            self.threadPool.start(SandboxComputeJob(node, inputValues, inputSocketIndex, self.signals))
+        elif node.run_in_process and node.process_compute is not None:
+            ProcessComputeJob(node, inputValues, inputSocketIndex, self.signals).start()
+        else:
+            self.threadPool.start(ComputeJob(node, inputValues, inputSocketIndex, self.signals))
+
+    def onJobFinished(self, job: ComputeJob, result):
+        node = job.node
+        self._running.discard(node)
+        if self.scene.hasNode(node):
+            try:
+                node.onComputed(result)
+            except Exception as e: dumpException(e)
+            self.startNext(node)
+        else:
+            self._queues.pop(node, None)
+
+    def onJobError(self, job: ComputeJob, error: Exception):
+        node = job.node
+        self._running.discard(node)
+        if self.scene.hasNode(node):
+            try:
+                node.onComputeError(error)
+            except Exception as e: dumpException(e)
+            self.startNext(node)
+        else:
+            self._queues.pop(node, None)
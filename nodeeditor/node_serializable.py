@@ -13,6 +13,32 @@ class Serializable():
         """
         self.id = id(self)
 
+    @property
+    def id(self):
+        """
+        Unique identifier of this object, used as key in serialized data
+
+        :getter: Returns current id
+        :setter: Sets new id and notifies :meth:`onIDChanged` so indexes keyed by id can be updated
+        :type: ``int``
+        """
+        return self._id
+
+    @id.setter
+    def id(self, value):
+        old_id = self.__dict__.get('_id')
+        self._id = value
+        if old_id is not None and old_id != value:
+            self.onIDChanged(old_id)
+
+    def onIDChanged(self, old_id):
+        """
+        Event called when ``id`` of this object was changed, i.e. by deserialization
+
+        :param old_id: previous id
+        """
+        pass
+
     def serialize(self) -> OrderedDict:
         """
         Serialization method to serialize this class data into ``OrderedDict`` which can be easily stored
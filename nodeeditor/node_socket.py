@@ -78,11 +78,16 @@ class Socket(Serializable):
 
         self.edges = []
 
+        self.node.scene.addSocket(self)
+
     def __str__(self):
         return "<Socket #%d %s %s..%s>" % (
             self.index, "ME" if self.is_multi_edges else "SE", hex(id(self))[2:5], hex(id(self))[-3:]
         )
 
+    def onIDChanged(self, old_id):
+        self.node.scene.updateSocketID(self, old_id)
+
     def delete(self):
         """Delete this `Socket` from graphics scene for sure"""
         self.grSocket.setParentItem(None)
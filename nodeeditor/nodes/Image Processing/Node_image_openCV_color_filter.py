@@ -43,9 +43,11 @@ class Content(QDMNodeContentWidget):
 
     def changeColor(self, color: QColor):
         self.thresholdColor = color
+        self.node.invalidateMemo()
 
     def changeThreshold(self):
         self.threshold = self.thresholdSlider.value()
+        self.node.invalidateMemo()
 
     def serialize(self) -> OrderedDict:
         orderedDict = super().serialize()
@@ -74,19 +74,7 @@ class Content(QDMNodeContentWidget):
         self.setLabelPixmap()
 
     def checkForTemplate(self):
-        if self.node.inputValues[0] is not None and self.node.inputValues[1] is not None:
-            result = cv2.matchTemplate(self.node.inputValues[0], self.node.inputValues[1], cv2.TM_CCOEFF_NORMED)
-
-            y, x = np.unravel_index(np.argmax(result), result.shape)
-            maxValue = np.max(result)
-
-            self.node.sendDataFromSocket(maxValue, 0)
-            self.node.sendDataFromSocket([x,y], 1)
-
-            # threshold = .9
-            # loc = np.where(result >= threshold)
-            # for pt in zip(*loc[::-1]):  # Switch collumns and rows
-            #     pass
+        self.node.scene.evaluator.computeNode(self.node)
 
     def sendData(self, data):
         self.node.sendDataFromSocket(data)
@@ -110,6 +98,8 @@ class GraphicsNode(QDMGraphicsNode):
 
 
 class Node_ImageOpenCVTemplateMatching(Abstract_Node):
+    offloadable = True
+
     def __init__(self, scene: 'Scene', title: str = "Template Matching", inputs: list = [VAR_TYPE_LIST, VAR_TYPE_LIST], outputs: list = [VAR_TYPE_FLOAT, VAR_TYPE_LIST]):
         super().__init__(scene, title, inputs, outputs)
 
@@ -128,7 +118,21 @@ class Node_ImageOpenCVTemplateMatching(Abstract_Node):
             self.content.small_image = data
             self.content.pixmap = self.openCVToQPixmap(data)
             self.content.setLabelPixmap()
-        self.content.checkForTemplate()
+
+    def compute(self, inputValues, inputSocketIndex):
+        if inputValues[0] is None or inputValues[1] is None:
+            return None
+        result = cv2.matchTemplate(inputValues[0], inputValues[1], cv2.TM_CCOEFF_NORMED)
+
+        y, x = np.unravel_index(np.argmax(result), result.shape)
+        maxValue = np.max(result)
+
+        # threshold = .9
+        # loc = np.where(result >= threshold)
+        # for pt in zip(*loc[::-1]):  # Switch collumns and rows
+        #     pass
+
+        return [(0, maxValue), (1, [x, y])]
 
     def openCVToQPixmap(self, data):
         data = np.require(data, np.uint8, 'C')
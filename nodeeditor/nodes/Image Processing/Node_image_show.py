@@ -104,6 +104,8 @@ class GraphicsNode(QDMGraphicsNode):
 
 
 class Node_ImageShowNode(Abstract_Node):
+    observed = True
+
     def __init__(self, scene: 'Scene', title: str = "Image Show", inputs: list = [VAR_TYPE_PIXMAP], outputs: list = [VAR_TYPE_PIXMAP]):
         super().__init__(scene, title, inputs, outputs)
 
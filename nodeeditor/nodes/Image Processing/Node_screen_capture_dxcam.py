@@ -366,6 +366,8 @@ class GraphicsNode(QDMGraphicsNode):
 
 
 class Node_ScreenCaptureDXcamNode(Abstract_Node):
+    memoize = False
+
     def __init__(self, scene: 'Scene', title: str = "Screen Capture DXcam", inputs: list = [VAR_TYPE_NOT_DEFINED],
                  outputs: list = [VAR_TYPE_PIXMAP, VAR_TYPE_LIST]):
         super().__init__(scene, title, inputs, outputs)
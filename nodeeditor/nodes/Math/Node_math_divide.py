@@ -2,9 +2,20 @@ from PyQt5.QtWidgets import QLabel, QVBoxLayout
 from nodeeditor.Abstract_Node import Abstract_Node
 from nodeeditor.node_content_widget import QDMNodeContentWidget
 from nodeeditor.node_graphics_node import QDMGraphicsNode
+from nodeeditor.node_headless import HeadlessNode
+from nodeeditor.utils_math import divide, formatValue
 from nodeeditor.var_type_conf import *
 
 
+def computeDivide(node):
+    """Send the quotient of both inputs of `node` (the `Node` or its `HeadlessNode`) once both inputs are set.
+    Divisions by 0 are reported with ``onComputeError`` of `node`, the result is ``nan`` there"""
+    if node.inputValues[0] is not None and node.inputValues[1] is not None:
+        result, zero_count = divide(node.inputValues[0], node.inputValues[1])
+        if zero_count:
+            node.onComputeError(ZeroDivisionError("Division by 0 (%d times)" % zero_count))
+        node.sendDataFromSocket(result)
+
 
 class Content(QDMNodeContentWidget):
     def initUI(self):
@@ -35,8 +46,17 @@ class GraphicsNode(QDMGraphicsNode):
         self.setShowAndHiddenSameSize = True
 
 
+class Headless(HeadlessNode):
+    def receiveData(self, data, inputSocketIndex):
+        super().receiveData(data, inputSocketIndex)
+
+        computeDivide(self)
+
+
 class Node_MathDivideNode(Abstract_Node):
-    def __init__(self, scene: 'Scene', title: str = "Divide", inputs: list = [[VAR_TYPE_FLOAT, VAR_TYPE_INT], [VAR_TYPE_FLOAT, VAR_TYPE_INT]], outputs: list = [[VAR_TYPE_FLOAT, VAR_TYPE_INT]]):
+    HeadlessNode_class = Headless
+
+    def __init__(self, scene: 'Scene', title: str = "Divide", inputs: list = [[VAR_TYPE_FLOAT, VAR_TYPE_INT, VAR_TYPE_LIST], [VAR_TYPE_FLOAT, VAR_TYPE_INT, VAR_TYPE_LIST]], outputs: list = [[VAR_TYPE_FLOAT, VAR_TYPE_INT, VAR_TYPE_LIST]]):
         super().__init__(scene, title, inputs, outputs)
 
     def initInnerClasses(self):
@@ -52,13 +72,8 @@ class Node_MathDivideNode(Abstract_Node):
         super().receiveData(data, inputSocketIndex)
 
         if self.inputValues[0] is not None:
-            self.content.input1Label.setText(str(self.inputValues[0]))
+            self.content.input1Label.setText(formatValue(self.inputValues[0]))
         if self.inputValues[1] is not None:
-            self.content.input2Label.setText(str(self.inputValues[1]))
-
-        if self.inputValues[0] is not None and self.inputValues[1] is not None:
-            if self.inputValues[1] != 0:
-                self.sendDataFromSocket(self.inputValues[0] / self.inputValues[1])
-            else:
-                self.grNode.setToolTip("Division by 0")
-                self.grNode.errorAnimation.startAnimation()
+            self.content.input2Label.setText(formatValue(self.inputValues[1]))
+
+        computeDivide(self)
@@ -1,17 +1,84 @@
+import math
 from collections import OrderedDict
+from functools import lru_cache
 from io import StringIO
 from contextlib import redirect_stdout
 
 from PyQt5.QtCore import QRegExp
 from PyQt5.QtGui import QTextDocument, QSyntaxHighlighter, QFont, QTextCharFormat
 
-from PyQt5.QtWidgets import QLabel, QLineEdit, QHBoxLayout, QVBoxLayout
+from PyQt5.QtWidgets import QLabel, QLineEdit, QHBoxLayout, QVBoxLayout, QCheckBox
 from nodeeditor.Abstract_Node import Abstract_Node
 from nodeeditor.node_content_widget import QDMNodeContentWidget
 from nodeeditor.node_graphics_node import QDMGraphicsNode
+from nodeeditor.node_headless import HeadlessNode
 from nodeeditor.var_type_conf import *
-from math import *
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+EXPRESSION_NAMES = {name: getattr(math, name) for name in dir(math) if not name.startswith("_")}
+EXPRESSION_NAMES.update({"abs": abs, "min": min, "max": max, "round": round, "int": int, "float": float})
+EXPRESSION_NAMES["__builtins__"] = {}
+
+VECTORIZED_NAMES = dict(EXPRESSION_NAMES)
+if np is not None:
+    for name in ("sin", "cos", "tan", "sinh", "cosh", "tanh", "exp", "expm1", "log10", "log2", "log1p", "sqrt",
+                 "floor", "ceil", "trunc", "fabs", "hypot", "copysign", "fmod", "degrees", "radians",
+                 "isnan", "isinf", "isfinite", "round"):
+        VECTORIZED_NAMES[name] = getattr(np, name)
+    VECTORIZED_NAMES.update({
+        "asin": np.arcsin, "acos": np.arccos, "atan": np.arctan, "atan2": np.arctan2,
+        "asinh": np.arcsinh, "acosh": np.arccosh, "atanh": np.arctanh,
+        "pow": np.power, "abs": np.absolute, "min": np.minimum, "max": np.maximum,
+        "log": lambda x, base=None: np.log(x) if base is None else np.log(x) / np.log(base),
+    })
+
+
+def getExpressionNames(code) -> set:
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if hasattr(const, "co_names"):
+            names |= getExpressionNames(const)
+    return names
+
+
+@lru_cache(maxsize=256)
+def compileExpression(text: str):
+    """Compile `text` once into a code object. Only ``x`` and the names of the ``math`` module are allowed"""
+    code = compile(text, "<expression>", "eval")
+    for name in getExpressionNames(code):
+        if name != "x" and (name.startswith("_") or name not in EXPRESSION_NAMES):
+            raise NameError("name '%s' is not allowed in expression" % name)
+    return code
+
+
+def evaluateExpression(text: str, x, vectorized: bool = False):
+    """
+    Evaluate expression `text` for `x`. In `vectorized` mode lists and NumPy arrays are evaluated element-wise in one
+    call with the NumPy counterparts of the ``math`` functions
+    """
+    code = compileExpression(text)
+    if vectorized and np is not None and isinstance(x, (list, tuple, np.ndarray)):
+        result = eval(code, VECTORIZED_NAMES, {"x": np.asarray(x, dtype=float)})
+        if not isinstance(x, np.ndarray) and isinstance(result, np.ndarray):
+            return result.tolist()
+        return result
+    return eval(code, EXPRESSION_NAMES, {"x": x})
+
+
+def computeExpression(node, text: str, vectorized: bool = False):
+    """Send expression `text` evaluated for the input of `node` (the `Node` or its `HeadlessNode`). Errors are
+    reported with ``onComputeError`` of `node`"""
+    if node.inputValues[0] is None:
+        return
+    try:
+        node.sendDataFromSocket(evaluateExpression(text, node.inputValues[0], vectorized))
+    except Exception as e:
+        node.onComputeError(e)
 
 
 class Content(QDMNodeContentWidget):
@@ -22,32 +89,32 @@ class Content(QDMNodeContentWidget):
         self.evalLineEdit.setStyleSheet("#evalLineEditObj {background-color: #111111; color: #eeeeee}")
         # self.evalLineEdit.setTabStopDistance(20)
         self.evalLineEdit.setText("x**2")
+        self.evalLineEdit.textChanged.connect(self.changeExpression)
 
         label = QLabel("y(x)=")
 
+        self.vectorizedCheckBox = QCheckBox()
+        self.vectorizedCheckBox.setToolTip("Evaluate lists and arrays element-wise with NumPy")
+        self.vectorizedCheckBox.stateChanged.connect(self.changeExpression)
 
         layout = QHBoxLayout()
         layout.setContentsMargins(0, 0, 0, 0)
         layout.addSpacing(3)
         layout.addWidget(label)
         layout.addWidget(self.evalLineEdit)
+        layout.addWidget(self.vectorizedCheckBox)
 
         self.setLayout(layout)
 
     def sendData(self, data):
         self.node.sendDataFromSocket(data)
 
+    def changeExpression(self):
+        self.node.invalidateMemo()
+        self.evaluateScript()
+
     def evaluateScript(self, obj=None):
-        if self.node.inputValues[0] is None:
-            return
-        
-        x = self.node.inputValues[0]
-        text = self.evalLineEdit.text()
-        try:
-            self.sendData(eval(text))
-        except Exception as e:
-            self.node.grNode.setToolTip(str(e))
-            self.node.grNode.errorAnimation.startAnimation()
+        computeExpression(self.node, self.evalLineEdit.text(), self.vectorizedCheckBox.isChecked())
 
     def serialize(self) -> OrderedDict:
         orderedDict = super().serialize()
@@ -73,8 +140,18 @@ class GraphicsNode(QDMGraphicsNode):
         self.setShowAndHiddenSameSize = True
 
 
+class Headless(HeadlessNode):
+    def receiveData(self, data, inputSocketIndex):
+        super().receiveData(data, inputSocketIndex)
+
+        computeExpression(self, self.getContentValue("QLineEdit", default="x"),
+                          self.getContentValue("QCheckBox", default=False))
+
+
 class Node_MathExpressionNode(Abstract_Node):
-    def __init__(self, scene: 'Scene', title: str = "Math Expression", inputs: list = [[VAR_TYPE_FLOAT, VAR_TYPE_INT]], outputs: list = [[VAR_TYPE_FLOAT, VAR_TYPE_INT]]):
+    HeadlessNode_class = Headless
+
+    def __init__(self, scene: 'Scene', title: str = "Math Expression", inputs: list = [[VAR_TYPE_FLOAT, VAR_TYPE_INT, VAR_TYPE_LIST]], outputs: list = [[VAR_TYPE_FLOAT, VAR_TYPE_INT, VAR_TYPE_LIST]]):
         super().__init__(scene, title, inputs, outputs)
 
     def initInnerClasses(self):
@@ -58,6 +58,8 @@ class GraphicsNode(QDMGraphicsNode):
 
 
 class Node_MathInputRandomFloat(Abstract_Node):
+    memoize = False
+
     def __init__(self, scene: 'Scene', title: str = "Random Float", inputs: list = [VAR_TYPE_NOT_DEFINED], outputs: list = [VAR_TYPE_FLOAT]):
         super().__init__(scene, title, inputs, outputs)
 
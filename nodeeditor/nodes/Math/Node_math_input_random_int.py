@@ -56,6 +56,8 @@ class GraphicsNode(QDMGraphicsNode):
 
 
 class Node_MathInputRandomInt(Abstract_Node):
+    memoize = False
+
     def __init__(self, scene: 'Scene', title: str = "Random Int", inputs: list = [VAR_TYPE_NOT_DEFINED], outputs: list = [VAR_TYPE_INT]):
         super().__init__(scene, title, inputs, outputs)
 
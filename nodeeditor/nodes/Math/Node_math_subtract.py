@@ -1,10 +1,19 @@
+from operator import sub
+
 from PyQt5.QtWidgets import QLabel, QVBoxLayout
 from nodeeditor.Abstract_Node import Abstract_Node
 from nodeeditor.node_content_widget import QDMNodeContentWidget
 from nodeeditor.node_graphics_node import QDMGraphicsNode
+from nodeeditor.node_headless import HeadlessNode
+from nodeeditor.utils_math import applyOperation, formatValue
 from nodeeditor.var_type_conf import *
 
 
+def computeSubtract(node):
+    """Send the difference of both inputs of `node` (the `Node` or its `HeadlessNode`) once both inputs are set"""
+    if node.inputValues[0] is not None and node.inputValues[1] is not None:
+        node.sendDataFromSocket(applyOperation(sub, node.inputValues[0], node.inputValues[1]))
+
 
 class Content(QDMNodeContentWidget):
     def initUI(self):
@@ -35,8 +44,17 @@ class GraphicsNode(QDMGraphicsNode):
         self.setShowAndHiddenSameSize = True
 
 
+class Headless(HeadlessNode):
+    def receiveData(self, data, inputSocketIndex):
+        super().receiveData(data, inputSocketIndex)
+
+        computeSubtract(self)
+
+
 class Node_MathSubtractNode(Abstract_Node):
-    def __init__(self, scene: 'Scene', title: str = "Subtract", inputs: list = [[VAR_TYPE_FLOAT, VAR_TYPE_INT], [VAR_TYPE_FLOAT, VAR_TYPE_INT]], outputs: list = [[VAR_TYPE_FLOAT, VAR_TYPE_INT]]):
+    HeadlessNode_class = Headless
+
+    def __init__(self, scene: 'Scene', title: str = "Subtract", inputs: list = [[VAR_TYPE_FLOAT, VAR_TYPE_INT, VAR_TYPE_LIST], [VAR_TYPE_FLOAT, VAR_TYPE_INT, VAR_TYPE_LIST]], outputs: list = [[VAR_TYPE_FLOAT, VAR_TYPE_INT, VAR_TYPE_LIST]]):
         super().__init__(scene, title, inputs, outputs)
 
     def initInnerClasses(self):
@@ -52,9 +70,8 @@ class Node_MathSubtractNode(Abstract_Node):
         super().receiveData(data, inputSocketIndex)
 
         if self.inputValues[0] is not None:
-            self.content.input1Label.setText(str(self.inputValues[0]))
+            self.content.input1Label.setText(formatValue(self.inputValues[0]))
         if self.inputValues[1] is not None:
-            self.content.input2Label.setText(str(self.inputValues[1]))
+            self.content.input2Label.setText(formatValue(self.inputValues[1]))
 
-        if self.inputValues[0] is not None and self.inputValues[1] is not None:
-            self.sendDataFromSocket(self.inputValues[0] - self.inputValues[1])
+        computeSubtract(self)
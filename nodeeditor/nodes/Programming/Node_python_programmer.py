@@ -1,16 +1,106 @@
+import re
+import builtins
+from collections import OrderedDict
 from io import StringIO
 from contextlib import redirect_stdout
 
-from PyQt5.QtCore import QRegExp
+from PyQt5.QtCore import QRegExp, QTimer
 from PyQt5.QtGui import QTextDocument, QSyntaxHighlighter, QFont, QTextCharFormat, QColor
 
 from PyQt5.QtWidgets import QLabel, QTextEdit, QVBoxLayout
 from nodeeditor.Abstract_Node import Abstract_Node
 from nodeeditor.node_content_widget import QDMNodeContentWidget
 from nodeeditor.node_graphics_node import QDMGraphicsNode
+from nodeeditor.node_headless import HeadlessNode
 from nodeeditor.var_type_conf import *
 
 
+SECTION_PATTERN = re.compile(r"^#\s*%%\s*(setup|process)\s*$", re.IGNORECASE)
+CONSOLE_UPDATE_INTERVAL = 100   # ms between two updates of the console and error labels
+MAX_CACHED_SCRIPTS = 16         # scripts kept compiled in one worker process
+
+
+def splitScript(text: str):
+    """
+    Split `text` into the ``#%% setup`` and ``#%% process`` sections. Code before the first marker belongs to the
+    process section. Lines of the other section are blanked, so line numbers in tracebacks match the editor
+    """
+    setup, process = [], []
+    current = process
+    for line in text.split("\n"):
+        match = SECTION_PATTERN.match(line.strip())
+        if match:
+            current = setup if match.group(1).lower() == "setup" else process
+        current.append(line)
+        (process if current is setup else setup).append("")
+    return "\n".join(setup), "\n".join(process)
+
+
+class PythonScript():
+    """Script compiled once per edit with a persistent namespace. The setup section runs before the first input,
+    the process section for every input with the incoming data in ``input``"""
+    def __init__(self, text: str, namespace: dict):
+        setup, process = splitScript(text)
+        self.setupCode = compile(setup, "<setup>", "exec")
+        self.processCode = compile(process, "<process>", "exec")
+        self.namespace = namespace
+        self.isSetUp = False
+
+    def run(self, data):
+        if not self.isSetUp:
+            exec(self.setupCode, self.namespace)
+            self.isSetUp = True
+        self.namespace["input"] = data
+        exec(self.processCode, self.namespace)
+
+
+def createScript(text: str, owner) -> PythonScript:
+    """Compile `text` with a namespace of the globals of this module, ``self`` is `owner` (the `Content` of the
+    `Node` or its `HeadlessNode`) which provides ``sendData``"""
+    namespace = dict(globals())
+    namespace["self"] = owner
+    return PythonScript(text, namespace)
+
+
+def executeScript(script: PythonScript, data) -> str:
+    """Run `script` for `data` and return the console output. Exceptions of the script are passed on"""
+    with redirect_stdout(StringIO()) as f:
+        script.run(data)
+    return f.getvalue()
+
+
+class ScriptOutput():
+    """Replacement of ``self`` in scripts running in a worker process, collects the sent data"""
+    def __init__(self):
+        self.outputs = []
+
+    def sendData(self, data):
+        self.outputs.append(data)
+
+
+_worker_scripts = OrderedDict()
+
+
+def runScript(state, inputValues, inputSocketIndex):
+    """Executes the script of `state` ``(node id, script)`` in a worker process, returns the sent data and the
+    console output. Compiled scripts and their namespaces are kept per `Node` and worker process, so two `Nodes`
+    with the same script don't share their variables.
+
+    In the process pool consecutive calls of one `Node` may run in different worker processes, each with its own
+    namespace, so the setup section may run more than once and variables don't persist reliably between inputs.
+    Scripts which keep state should run in the sandbox (``run_in_sandbox``), which is one process per `Node`."""
+    compiled = _worker_scripts.pop(state, None)
+    if compiled is None:
+        compiled = PythonScript(state[1], {"__builtins__": builtins})
+    _worker_scripts[state] = compiled
+    while len(_worker_scripts) > MAX_CACHED_SCRIPTS:
+        _worker_scripts.popitem(last=False)
+
+    output = ScriptOutput()
+    compiled.namespace["self"] = output
+    console = executeScript(compiled, inputValues[inputSocketIndex])
+    return output.outputs, console
+
 
 class Content(QDMNodeContentWidget):
     def initUI(self):
@@ -19,8 +109,18 @@ class Content(QDMNodeContentWidget):
         self.editorTextEdit.setStyleSheet("#editorTextEditObj {background-color: #111111; color: #eeeeee}")
         self.editorTextEdit.setTabStopDistance(20)
         self.editorTextEdit.setTextColor(QColor(200, 200, 200))
-        self.editorTextEdit.setPlainText("# comment\n#incoming data == \"input\"\n#outgoing data == \"self.sendData(...)\"")
+        self.editorTextEdit.setPlainText("# comment\n#incoming data == \"input\"\n#outgoing data == \"self.sendData(...)\"\n"
+                                         "#code after \"#%% setup\" runs once, after \"#%% process\" for every input")
+        self.editorTextEdit.textChanged.connect(self.onScriptChanged)
         self.highlight = PythonHighlighter(self.editorTextEdit.document())
+        self.script = None
+
+        self.consoleText = ""
+        self.errorText = None
+        self.consoleTimer = QTimer(self)
+        self.consoleTimer.setSingleShot(True)
+        self.consoleTimer.setInterval(CONSOLE_UPDATE_INTERVAL)
+        self.consoleTimer.timeout.connect(self.updateConsole)
 
         self.consoleLabel = QLabel("")
         self.consoleLabel.setStyleSheet("color: gray")
@@ -41,25 +141,43 @@ class Content(QDMNodeContentWidget):
     def sendData(self, data):
         self.node.sendDataFromSocket(data)
 
+    def onScriptChanged(self):
+        self.script = None
+
+    def getScript(self) -> PythonScript:
+        """Returns the compiled script, it is compiled again with a fresh namespace after every edit"""
+        if self.script is None:
+            self.script = createScript(self.editorTextEdit.toPlainText(), self)
+        return self.script
+
     def excecuteScript(self, obj):
-        localDict = {"input": obj}
-        text = self.editorTextEdit.toPlainText()
-        self.resultName = ""
-        localDict.update(globals())
-        localDict.update(locals())
         try:
-            with redirect_stdout(StringIO()) as f:
-                exec(text, localDict)
-            s = str(f.getvalue()).replace("<", "&lt;").replace(">", "&gt;")
-            self.consoleLabel.setText(s.strip())
-            if s:
-                self.consoleLabel.show()
-            else:
-                self.consoleLabel.hide()
-            self.errorLabel.hide()
+            self.showConsole(executeScript(self.getScript(), obj))
         except Exception as inst:
+            self.showError(inst)
+
+    def showConsole(self, text):
+        self.consoleText = str(text)
+        self.errorText = None
+        if not self.consoleTimer.isActive(): self.consoleTimer.start()
+
+    def showError(self, inst):
+        self.errorText = str(inst)
+        if not self.consoleTimer.isActive(): self.consoleTimer.start()
+
+    def updateConsole(self):
+        s = self.consoleText.replace("<", "&lt;").replace(">", "&gt;")
+        self.consoleLabel.setText(s.strip())
+        if s:
+            self.consoleLabel.show()
+        else:
+            self.consoleLabel.hide()
+
+        if self.errorText is None:
+            self.errorLabel.hide()
+        else:
             self.errorLabel.show()
-            self.errorLabel.setText(str(inst))
+            self.errorLabel.setText(self.errorText)
 
 
 class GraphicsNode(QDMGraphicsNode):
@@ -75,7 +193,31 @@ class GraphicsNode(QDMGraphicsNode):
         self.setShowAndHiddenSameSize = True
 
 
+class Headless(HeadlessNode):
+    memoize = False
+    observed = True
+    script = None
+
+    def sendData(self, data):
+        self.sendDataFromSocket(data)
+
+    def receiveData(self, data, inputSocketIndex):
+        super().receiveData(data, inputSocketIndex)
+
+        try:
+            if self.script is None:
+                self.script = createScript(self.getContentValue("QTextEdit", default=""), self)
+            print(executeScript(self.script, data), end="")
+        except Exception as inst:
+            self.onComputeError(inst)
+
+
 class Node_ProgrammingPythonProgrammerNode(Abstract_Node):
+    HeadlessNode_class = Headless
+    process_compute = staticmethod(runScript)
+    memoize = False
+    observed = True
+
     def __init__(self, scene: 'Scene', title: str = "Python Programmer", inputs: list = [VAR_TYPE_NOT_DEFINED], outputs: list = [VAR_TYPE_NOT_DEFINED]):
         super().__init__(scene, title, inputs, outputs)
 
@@ -91,9 +233,22 @@ class Node_ProgrammingPythonProgrammerNode(Abstract_Node):
     def receiveData(self, data, inputSocketIndex):
         super().receiveData(data, inputSocketIndex)
 
-        self.content.excecuteScript(data)
+        if not self.run_in_process and not self.run_in_sandbox:
+            self.content.excecuteScript(data)
         #self.sendDataFromSocket(None)
 
+    def getProcessState(self):
+        return self.id, self.content.editorTextEdit.toPlainText()
+
+    def onComputed(self, result):
+        outputs, console = result
+        self.content.showConsole(console)
+        for data in outputs:
+            self.sendDataFromSocket(data)
+
+    def onComputeError(self, exception):
+        self.content.showError(exception)
+
 
 def format(color, style=''):
     _color = QColor()
@@ -0,0 +1,187 @@
+import os
+from collections import OrderedDict
+from pathlib import Path
+from time import monotonic
+
+import numpy as np
+from PyQt5.QtCore import QTimer
+from PyQt5.QtWidgets import QLabel, QDoubleSpinBox, QGridLayout, QPushButton, QFileDialog
+
+from nodeeditor.Abstract_Node import Abstract_Node
+from nodeeditor.node_content_widget import QDMNodeContentWidget
+from nodeeditor.node_graphics_node import QDMGraphicsNode
+from nodeeditor.node_headless import HeadlessNode
+from nodeeditor.utils_no_qt import dumpException
+from nodeeditor.utils_recording import openBinaryRecording, InvalidRecording, BINARY_RECORDING_EXTENSION
+from nodeeditor.var_type_conf import *
+
+REPLAY_INTERVAL = 20            #: milliseconds between two blocks sent during replay
+REPLAY_MAX_BLOCK_SIZE = 10000   #: maximal number of frames sent at once
+
+
+def getReplayBlock(records, start: int, end: int) -> tuple:
+    """Returns ``(samples, times)`` of the records from `start` to `end`, copied out of the memory-mapped file"""
+    block = records[start:end]
+    return np.array(block['samples']), np.array(block['time'])
+
+
+def sendReplayBlock(node, records, start: int, end: int) -> int:
+    """Send the records from `start` to `end` from `node` (the `Node` or its `HeadlessNode`), samples from the first
+    and timestamps from the second output. Returns the position after the sent block"""
+    samples, times = getReplayBlock(records, start, end)
+    node.sendDataFromSocket(samples, 0)
+    node.sendDataFromSocket(times, 1)
+    return min(end, len(records))
+
+
+class Content(QDMNodeContentWidget):
+    def initUI(self):
+        self.recordingFileName = ""
+        self.lastOpenedFolder = ""
+        self.records = None
+        self.position = 0
+        self.startTime = 0.0
+        self.startRecordTime = 0.0
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.replayStep)
+
+        self.loadButton = QPushButton("Load Recording")
+        self.loadButton.clicked.connect(self.loadRecording)
+
+        self.playButton = QPushButton("Play")
+        self.playButton.setCheckable(True)
+        self.playButton.toggled.connect(self.togglePlay)
+
+        speedLabel = QLabel("Speed")
+        self.speedSpinBox = QDoubleSpinBox()
+        self.speedSpinBox.setRange(0, 100000)
+        self.speedSpinBox.setSpecialValueText("max")
+        self.speedSpinBox.setValue(1.0)
+        self.speedSpinBox.valueChanged.connect(self.changeSpeed)
+
+        self.positionLabel = QLabel("no recording")
+
+        layout = QGridLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(self.loadButton, 0, 0, 1, 2)
+        layout.addWidget(speedLabel, 1, 0)
+        layout.addWidget(self.speedSpinBox, 1, 1)
+        layout.addWidget(self.playButton, 2, 0)
+        layout.addWidget(self.positionLabel, 2, 1)
+        self.setLayout(layout)
+
+    def loadRecording(self):
+        home = str(Path.home()) if self.lastOpenedFolder == "" else self.lastOpenedFolder
+        fname, filter = QFileDialog.getOpenFileName(None, 'Open recording', home, "Recordings (*%s)" % BINARY_RECORDING_EXTENSION, "", QFileDialog.DontUseNativeDialog)
+        self.openRecording(fname)
+
+    def openRecording(self, fname):
+        if fname == '' or not os.path.isfile(fname):
+            return
+        self.playButton.setChecked(False)
+        try:
+            description, self.records = openBinaryRecording(fname)
+            self.recordingFileName = fname
+            self.lastOpenedFolder = os.path.dirname(fname)
+            self.position = 0
+            self.updatePositionLabel()
+            self.node.grNode.setToolTip(os.path.basename(fname))
+        except (InvalidRecording, OSError, KeyError) as e:
+            self.records = None
+            self.node.grNode.setToolTip(str(e))
+            self.node.grNode.errorAnimation.startAnimation()
+        except Exception as e: dumpException(e)
+
+    def updatePositionLabel(self):
+        if self.records is None:
+            self.positionLabel.setText("no recording")
+        else:
+            self.positionLabel.setText("%d / %d" % (self.position, len(self.records)))
+
+    def togglePlay(self, checked: bool):
+        if checked:
+            self.startReplay()
+        else:
+            self.stopReplay()
+
+    def startReplay(self):
+        if self.records is None or len(self.records) == 0:
+            self.playButton.setChecked(False)
+            return
+        if self.position >= len(self.records):
+            self.position = 0
+        self.playButton.setText("Stop")
+        self.changeSpeed()
+
+    def stopReplay(self):
+        self.timer.stop()
+        self.playButton.setText("Play")
+
+    def changeSpeed(self):
+        """Continue the replay from the current frame with the new speed"""
+        if not self.playButton.isChecked() or self.records is None or self.position >= len(self.records):
+            return
+        self.startTime = monotonic()
+        self.startRecordTime = float(self.records['time'][self.position])
+        self.timer.start(0 if self.speedSpinBox.value() == 0 else REPLAY_INTERVAL)
+
+    def replayStep(self):
+        speed = self.speedSpinBox.value()
+        end = self.position + REPLAY_MAX_BLOCK_SIZE
+        if speed != 0:
+            replayTime = self.startRecordTime + (monotonic() - self.startTime) * speed
+            end = min(end, int(np.searchsorted(self.records['time'], replayTime, side='right')))
+
+        if end > self.position:
+            self.position = sendReplayBlock(self.node, self.records, self.position, end)
+            self.updatePositionLabel()
+
+        if self.position >= len(self.records):
+            self.playButton.setChecked(False)
+
+    def removeContent(self):
+        self.timer.stop()
+
+    def serialize(self) -> OrderedDict:
+        orderedDict = super().serialize()
+        orderedDict["recordingFileName"] = self.recordingFileName
+        return orderedDict
+
+    def deserialize(self, data: dict, hashmap: dict = {}, restore_id: bool = True) -> bool:
+        super().deserialize(data, hashmap, restore_id)
+        self.openRecording(data.get("recordingFileName", ""))
+        return True
+
+
+class GraphicsNode(QDMGraphicsNode):
+    def initSizes(self):
+        super().initSizes()
+        self.setShownSize(190, 117)
+        self.setHiddenSize(190, 83)
+
+
+class Headless(HeadlessNode):
+    """Replays the whole recording at maximum speed when the graph is started"""
+    memoize = False
+
+    def start(self):
+        fileName = self.content_data.get("recordingFileName", "")
+        if fileName == "" or not os.path.isfile(fileName):
+            return
+        description, records = openBinaryRecording(fileName)
+        for start in range(0, len(records), REPLAY_MAX_BLOCK_SIZE):
+            sendReplayBlock(self, records, start, start + REPLAY_MAX_BLOCK_SIZE)
+            self.scene.evaluator.evaluate()
+
+
+class Node_RecordingReplay(Abstract_Node):
+    HeadlessNode_class = Headless
+    memoize = False
+
+    def __init__(self, scene: 'Scene', title: str = "Recording Replay", inputs: list = [], outputs: list = [VAR_TYPE_LIST, VAR_TYPE_LIST]):
+        super().__init__(scene, title, inputs, outputs)
+
+    def initInnerClasses(self):
+        self.content = Content(self)
+        self.grNode = GraphicsNode(self)
@@ -1,8 +1,7 @@
-import binascii
 import os
+import threading
 from collections import OrderedDict
 
-import libscrc
 import numpy as np
 from PyQt5.QtCore import QTimer, QObject, QRunnable, pyqtSignal, pyqtSlot, QThreadPool
 from PyQt5.QtGui import QIcon
@@ -14,6 +13,9 @@ from nodeeditor.Abstract_Node import Abstract_Node
 from nodeeditor.node_content_widget import QDMNodeContentWidget, QDMComboBox
 from nodeeditor.node_graphics_node import QDMGraphicsNode
 from nodeeditor.utils_no_qt import *
+from nodeeditor.utils_recording import RecordingWriter, packBinaryRecordingHeader, packBinaryRecords, \
+    BINARY_RECORDING_EXTENSION
+from nodeeditor.utils_serial import WUFrameDecoder, formatWUFrames
 from nodeeditor.var_type_conf import *
 
 import serial
@@ -24,6 +26,9 @@ import os
 from datetime import datetime
 from time import time, sleep
 
+READ_BUFFER_COMPACT_SIZE = 65536    #: consumed bytes are removed from the front of the read buffer above this size
+READ_POLL_INTERVAL = 0.002          #: seconds between two checks of the port while received data waits for emission
+
 
 class SerialParameters:
     def __init__(self, port=None, baudrate=115200, bytesize=serial.EIGHTBITS, parity=serial.PARITY_NONE,
@@ -48,6 +53,9 @@ class SerialParameters:
         self.DTR = False
         self.maxSignalRate = 5  # Hz
         self.Kennbin = ""
+        self.recordMaxFileSize = 0      # MB, 0 for no limit
+        self.recordMaxFileDuration = 0  # min, 0 for no limit
+        self.recordFormat = "text"      # "text" or "binary"
 
         self.local_echo = local_echo
         self.appendCR = appendCR
@@ -73,6 +81,9 @@ class SerialParameters:
             ('DTR', self.DTR),
             ('maxSignalRate', self.maxSignalRate),
             ('Kennbin', self.Kennbin),
+            ('recordMaxFileSize', self.recordMaxFileSize),
+            ('recordMaxFileDuration', self.recordMaxFileDuration),
+            ('recordFormat', self.recordFormat),
             ('local_echo', self.local_echo),
             ('appendCR', self.appendCR),
             ('appendLF', self.appendLF),
@@ -97,6 +108,9 @@ class SerialParameters:
         self.DTR = data["DTR"]
         self.maxSignalRate = data["maxSignalRate"]
         self.Kennbin = data["Kennbin"]
+        self.recordMaxFileSize = data.get("recordMaxFileSize", 0)
+        self.recordMaxFileDuration = data.get("recordMaxFileDuration", 0)
+        self.recordFormat = data.get("recordFormat", "text")
 
         self.local_echo = data["local_echo"]
         self.appendCR = data["appendCR"]
@@ -297,8 +311,30 @@ class SerialConnectWindow(QWidget):
         self.maxSignalRateSpinBox.setRange(1, 9999)
         self.maxSignalRateSpinBox.setValue(serialParam.maxSignalRate)
 
+        recordMaxFileSizeLabel = QLabel("Split recording [MB]")
+        recordMaxFileDurationLabel = QLabel("Split recording [min]")
+
+        self.recordMaxFileSizeSpinBox = QSpinBox()
+        self.recordMaxFileSizeSpinBox.setRange(0, 999999)
+        self.recordMaxFileSizeSpinBox.setSpecialValueText("never")
+        self.recordMaxFileSizeSpinBox.setValue(serialParam.recordMaxFileSize)
+
+        self.recordMaxFileDurationSpinBox = QSpinBox()
+        self.recordMaxFileDurationSpinBox.setRange(0, 99999)
+        self.recordMaxFileDurationSpinBox.setSpecialValueText("never")
+        self.recordMaxFileDurationSpinBox.setValue(serialParam.recordMaxFileDuration)
+
+        recordFormatLabel = QLabel("Recording format")
+        self.recordFormatCombobox = QComboBox()
+        self.recordFormatCombobox.addItem("text")
+        self.recordFormatCombobox.addItem("binary")
+        self.recordFormatCombobox.setCurrentText(serialParam.recordFormat)
+
         optionsLayout = QFormLayout()
         optionsLayout.addRow(maxSignalRateLabel, self.maxSignalRateSpinBox)
+        optionsLayout.addRow(recordMaxFileSizeLabel, self.recordMaxFileSizeSpinBox)
+        optionsLayout.addRow(recordMaxFileDurationLabel, self.recordMaxFileDurationSpinBox)
+        optionsLayout.addRow(recordFormatLabel, self.recordFormatCombobox)
         # optionsLayout.addWidget(-------------, 0, 0, 1, 1)
 
         optionsGroupbox = QGroupBox("Options")
@@ -390,13 +426,16 @@ class SerialConnectWindow(QWidget):
             serialParam.readTextIndex = "read_until"
             serialParam.readUntil = self.readUntilLineEdit.text()[0]
         serialParam.maxSignalRate = self.maxSignalRateSpinBox.value()
+        serialParam.recordMaxFileSize = self.recordMaxFileSizeSpinBox.value()
+        serialParam.recordMaxFileDuration = self.recordMaxFileDurationSpinBox.value()
+        serialParam.recordFormat = self.recordFormatCombobox.currentText()
 
         return serialParam
 
 
 class SerialSignals(QObject):
     # Signals
-    receivedData = pyqtSignal(object, object)
+    receivedData = pyqtSignal(object, object, object)
     madeConnection = pyqtSignal(object)
     lostConnection = pyqtSignal(object)
     failedSendData = pyqtSignal(object, object)
@@ -429,10 +468,18 @@ class SerialThread(QRunnable):
         self.recordingStarted = False
         self.record = False
         self.recordFilePath = os.getcwd() + "/test2.txt"
+        self.recorder = None
+        self.binaryRecorders = {}
+        self.recordLock = threading.Lock()   # recorders are started and stopped from the GUI thread
         self.lastRefreshTime = 0
         self.failCounter = 0
 
-        self.lastRefreshTimeDict = {}
+        self.queuedData = {}    # Kennbin (None for text modes): [list of data, list of times]
+
+        self.readBuffer = bytearray()
+        self.readPosition = 0
+        self.readSearchPosition = 0
+        self.wuDecoder = WUFrameDecoder()
 
         if platform.system() == "Linux":
             self.serialArduino.port = "/dev/" + self.serialParameters.port
@@ -453,7 +500,7 @@ class SerialThread(QRunnable):
                 #try:
                     if self.serialArduino.isOpen():
                         if self.serialParameters.readTextIndex == "read_line":
-                            readLine = self.read_line()  # self.serialArduino.readline()
+                            readLine = self.read_line(self.getEmitDeadline())  # self.serialArduino.readline()
                             if not readLine == b'':
                                 #try:
                                 #readLine.decode('utf-8')
@@ -465,11 +512,11 @@ class SerialThread(QRunnable):
                                 #        self.signals.lostConnection.emit(self.serialParameters)
                                 #        return None
                                 #    continue
-                                if time() > self.lastRefreshTime + (1 / self.serialParameters.maxSignalRate):
-                                    self.lastRefreshTime = time()
-                                    self.signals.receivedData.emit(self.serialParameters, readLine)
+                                self.queueData(readLine, time())
                         elif self.serialParameters.readTextIndex == "read_bytes":
-                            readLine = self.serialArduino.read(self.serialParameters.readBytes)
+                            readLine = b''
+                            if self.waitForData(self.getEmitDeadline()):
+                                readLine = self.serialArduino.read(self.serialParameters.readBytes)
                             if not readLine == b'':
                                 #try:
                                 #    readLine.decode('utf-8')
@@ -477,63 +524,42 @@ class SerialThread(QRunnable):
                                 #    print(e)
                                 #    self.signals.lostConnection.emit(self.serialParameters)
                                 #    return None
-                                if time() > self.lastRefreshTime + (1 / self.serialParameters.maxSignalRate):
-                                    self.lastRefreshTime = time()
-                                    self.signals.receivedData.emit(self.serialParameters, readLine)
+                                self.queueData(readLine, time())
                         elif self.serialParameters.readTextIndex == "read_until":
-                            readLine = self.serialArduino.read_until(
-                                self.serialParameters.readUntil.encode('utf-8'))  # self.serialParameters.readUntil)
+                            readLine = self.readBuffered(self.serialParameters.readUntil.encode('utf-8'), self.getEmitDeadline())
                             if not readLine == b'':
                                 try:
                                     readLine.decode('utf-8')
                                 except UnicodeDecodeError as e:
                                     print(e)
                                     self.signals.lostConnection.emit(self.serialParameters)
+                                    self.stopRecordData("ALL", timeout=None)
                                     return None
-                                if time() > self.lastRefreshTime + (1 / self.serialParameters.maxSignalRate):
-                                    self.lastRefreshTime = time()
-                                    self.signals.receivedData.emit(self.serialParameters, readLine)
+                                self.queueData(readLine, time())
                         elif self.serialParameters.readTextIndex == "logging_raw":
                             with open('loggingRaw2.txt', 'a') as file:
                                 readChar = self.serialArduino.read(1)
                                 if readChar != b'':
                                     file.write(str(readChar))
                         elif self.serialParameters.readTextIndex == "read_WU_device":
-                            if self.serialArduino.read(1) == b'\xaa':
-                                if self.serialArduino.read(1) == b'\x55':
-                                    Kennbin = self.serialArduino.read(2)
-                                    Kennung = int(binascii.hexlify(Kennbin[:1]), 16)
-                                    readLine = self.serialArduino.read(2 * Kennung + 2 + 2)
-                                    if not readLine == b'':
-                                        crc16send = readLine[-2:]
-                                        crc16 = libscrc.modbus(Kennbin + readLine[0:-2])
-                                        crc_check = crc16 == int(binascii.hexlify(crc16send), 16)
-
-                                        data = []
-                                        for n in range(len(readLine) // 2):
-                                            data.append(str(binascii.hexlify(readLine[2 * n:2 * n + 2]))[2:6])
-                                        singleLine = np.asarray(data)
-                                        if not crc_check:
-                                            singleLine = np.append(singleLine, '4650')
-                                            if self.record:
-                                                self.failCounter += 1
-                                        else:
-                                            singleLine = np.append(singleLine, '4f4b')
-                                        # if not crc_check:
-                                        #     singleLine[-1] = 'aaaa'
-
-                                        if self.record:
-                                            self.recordData(singleLine)
-
-                                        if Kennbin not in self.lastRefreshTimeDict:
-                                            self.lastRefreshTimeDict[Kennbin] = 0
-
-                                        if time() > self.lastRefreshTimeDict[Kennbin] + (1 / self.serialParameters.maxSignalRate):
-                                            self.lastRefreshTimeDict[Kennbin] = time()
-                                            self.serialParameters.Kennbin = Kennbin
-                                            self.signals.receivedData.emit(self.serialParameters, singleLine)
+                            # blocks up to the timeout of the port if nothing is waiting
+                            groups = []
+                            if self.waitForData(self.getEmitDeadline()):
+                                groups = self.wuDecoder.decode(self.serialArduino.read(max(1, self.serialArduino.in_waiting)))
+                            receivedTime = time()
+                            if groups and self.record:
+                                self.failCounter += sum(int(np.count_nonzero(~frames['crc_ok'])) for kennbin, frames in groups)
+                                if self.serialParameters.recordFormat == "binary":
+                                    self.recordBinaryData(groups, receivedTime)
+                                else:
+                                    self.recordData(formatWUFrames(groups), sum(len(frames) for kennbin, frames in groups))
+
+                            for Kennbin, frames in groups:
+                                self.queueData(frames['words'], receivedTime, Kennbin)
+                        self.emitQueuedData()
                     else:
                         self.signals.lostConnection.emit(self.serialParameters)
+                        self.stopRecordData("ALL", timeout=None)
                         return None
                 #except Exception as e:
                 #    try:
@@ -543,12 +569,49 @@ class SerialThread(QRunnable):
                 #        pass
                 #    return None
             # QApplication.processEvents()
+        self.emitQueuedData(force=True)
         self.serialArduino.close()
+        self.stopRecordData("ALL", timeout=None)
         try:
             self.signals.lostConnection.emit(self.serialParameters)
         except:
             pass
 
+    def queueData(self, data, timestamp: float, Kennbin=None):
+        """
+        Queue received `data` until the next :meth:`emitQueuedData`
+
+        :param data: received line (``bytes``) or 2D array of WU device frames
+        :param timestamp: time when `data` was received
+        :type timestamp: ``float``
+        :param Kennbin: identifier of the WU device frames or ``None``
+        """
+        queued = self.queuedData.get(Kennbin)
+        if queued is None:
+            queued = self.queuedData[Kennbin] = [[], []]
+        queued[0].append(data)
+        queued[1].append(timestamp)
+
+    def emitQueuedData(self, force: bool = False):
+        """
+        Emit everything received since the last call as one batch per identifier, at most ``maxSignalRate`` times
+        per second. Lines are sent as a list, WU device frames as a 2D array with one frame per row. Each batch is
+        accompanied by an array with the time every line or frame was received
+        """
+        if not self.queuedData:
+            return
+        if not force and time() <= self.lastRefreshTime + (1 / self.serialParameters.maxSignalRate):
+            return
+        self.lastRefreshTime = time()
+        queuedData, self.queuedData = self.queuedData, {}
+        for Kennbin, (items, times) in queuedData.items():
+            if Kennbin is None:
+                self.signals.receivedData.emit(self.serialParameters, items, np.asarray(times))
+            else:
+                self.serialParameters.Kennbin = Kennbin
+                self.signals.receivedData.emit(self.serialParameters, np.concatenate(items),
+                                               np.repeat(times, [len(frames) for frames in items]))
+
     def startRecordData(self, port, filePath, fileName):
         if not port.upper() == "ALL" and not port.upper() == self.serialParameters.port.upper():
             return None
@@ -572,34 +635,44 @@ class SerialThread(QRunnable):
             fileName = fileName.split(".")[0] + "_" + str(self.serialParameters.port) + ".txt"
         self.recordFilePath = filePath + fileName
         self.failCounter = 0
-        self.recordingStarted = True
-        self.record = True
-
-        if self.serialParameters.readTextIndex == "read_WU_device":
-            with open(self.recordFilePath, 'a') as file:
-                file.write(float.hex(time()) + "\n")
-
-    def stopRecordData(self, port):
+        # start and end of every file of WU device recordings are marked with the time
+        isWUDevice = self.serialParameters.readTextIndex == "read_WU_device"
+        with self.recordLock:
+            # binary recordings are written per identifier of the frames, files are created with the first frame
+            self.binaryRecorders = {}
+            if not (isWUDevice and self.serialParameters.recordFormat == "binary"):
+                self.recorder = RecordingWriter(self.recordFilePath,
+                                                max_file_size=self.serialParameters.recordMaxFileSize * 1000000,
+                                                max_file_duration=self.serialParameters.recordMaxFileDuration * 60,
+                                                fileHeader=self.getRecordFileHeader if isWUDevice else None,
+                                                fileFooter=self.getRecordFileFooter if isWUDevice else None)
+            self.recordingStarted = True
+            self.record = True
+
+    def getRecordFileHeader(self) -> str:
+        return float.hex(time()) + "\n"
+
+    def getRecordFileFooter(self) -> str:
+        return float.hex(time()) + "\n" + "FatalError = " + str(self.failCounter) + "\n"
+
+    def stopRecordData(self, port, timeout: float = 0):
+        """Stop the recording. The writers finish the queued data in the background, unless `timeout` is ``None``
+        (used by the read thread itself) which waits until everything is written"""
         if not port.upper() == "ALL" and not port.upper() == self.serialParameters.port.upper():
             return None
 
-        self.recordingStarted = False
-        self.record = False
-
-        if not self.recordingStarted:
-            return None
-
-        if self.serialParameters.readTextIndex == "read_WU_device":
-            #occurrences = 0
-            #with open(self.recordFilePath, 'r') as file:
-            #    occurrences = file.read().count("aaaa")
-            #with open(self.recordFilePath, 'a') as file:
-            #    file.write(float.hex(time()) + "\n")
-            #    file.write("FatalError = " + str(occurrences) + "\n")
+        with self.recordLock:
+            self.record = False
+            if not self.recordingStarted:
+                return None
+            self.recordingStarted = False
+            recorders = list(self.binaryRecorders.values())
+            if self.recorder is not None:
+                recorders.append(self.recorder)
+            self.recorder, self.binaryRecorders = None, {}
 
-            with open(self.recordFilePath, 'a') as file:
-                file.write(float.hex(time()) + "\n")
-                file.write("FatalError = " + str(self.failCounter) + "\n")
+        for recorder in recorders:
+            recorder.close(timeout)
 
     def pauseRecordData(self, port):
         if not port.upper() == "ALL" and not port.upper() == self.serialParameters.port.upper():
@@ -632,13 +705,38 @@ class SerialThread(QRunnable):
             self.failCounter = 0
 
         if self.serialParameters.readTextIndex == "read_WU_device":
-            with open(self.recordFilePath, 'a') as file:
-                file.write(text)
+            recorder = self.recorder
+            if recorder is not None and recorder.firstFilePath == self.recordFilePath:
+                recorder.write(text, 0)
+            else:
+                with open(self.recordFilePath, 'a') as file:
+                    file.write(text)
         self.record = lastRecord
 
-    def recordData(self, data):
-        with open(self.recordFilePath, 'a') as file:
-            file.write(' '.join(data) + "\n")
+    def recordData(self, text: str, frames: int = 1) -> bool:
+        """Queue `text` for the background writer of the recording. Returns ``False`` if it was dropped"""
+        recorder = self.recorder
+        if recorder is None:
+            return False
+        return recorder.write(text, frames)
+
+    def recordBinaryData(self, groups: list, timestamp: float):
+        """Queue decoded WU device frames for the binary recordings, one file per identifier"""
+        for Kennbin, frames in groups:
+            recorder = self.binaryRecorders.get(Kennbin)
+            if recorder is None:
+                # the lock keeps stopRecordData from missing a writer created at the same time
+                with self.recordLock:
+                    if not self.recordingStarted:
+                        return
+                    header = packBinaryRecordingHeader(frames['words'].shape[1], info={
+                        'port': self.serialParameters.port, 'Kennbin': Kennbin.hex(), 'start': time()})
+                    recorder = self.binaryRecorders[Kennbin] = RecordingWriter(
+                        os.path.splitext(self.recordFilePath)[0] + "_" + Kennbin.hex() + BINARY_RECORDING_EXTENSION,
+                        max_file_size=self.serialParameters.recordMaxFileSize * 1000000,
+                        max_file_duration=self.serialParameters.recordMaxFileDuration * 60,
+                        fileHeader=lambda header=header: header, mode='wb')
+            recorder.write(packBinaryRecords(np.full(len(frames), timestamp), frames['words']), len(frames))
 
     def writeSerial(self, port, data):
         if port.upper() == "ALL" or port.upper() == self.serialParameters.port.upper():
@@ -647,7 +745,7 @@ class SerialThread(QRunnable):
                     self.serialArduino.write(data)
                     self.serialArduino.flush()
                     if self.serialParameters.local_echo:
-                        self.signals.receivedData.emit(self.serialParameters, data)
+                        self.signals.receivedData.emit(self.serialParameters, [data], np.asarray([time()]))
                 else:
                     self.signals.lostConnection.emit(self.serialParameters)
                     return None
@@ -667,25 +765,80 @@ class SerialThread(QRunnable):
         if port.upper() == "ALL" or port.upper() == self.serialParameters.port.upper():
             self.is_paused = False
 
-    def read_line(self):
+    def read_line(self, emitDeadline: float = None):
+        return self.readBuffered(b'\n', emitDeadline)
+
+    def getEmitDeadline(self) -> float:
+        """Returns time when the queued data has to be emitted or ``None`` if there is no queued data"""
+        if not self.queuedData:
+            return None
+        return self.lastRefreshTime + (1 / self.serialParameters.maxSignalRate)
+
+    def waitForData(self, deadline: float = None) -> bool:
+        """
+        Wait until data is waiting at the port, but not beyond `deadline`, so a blocking read doesn't hold back
+        queued data when the device stops sending
+
+        :param deadline: time until data may arrive or ``None`` to return immediately
+        :type deadline: ``float``
+        :return: ``False`` if nothing arrived before `deadline`
+        :rtype: ``bool``
+        """
+        if deadline is None:
+            return True
+        while self.serialArduino.in_waiting == 0:
+            if self.is_killed or time() >= deadline:
+                return False
+            sleep(min(READ_POLL_INTERVAL, max(0.0, deadline - time())))
+        return True
+
+    def readBuffered(self, delimiter: bytes, emitDeadline: float = None) -> bytes:
+        """
+        Returns the next chunk of received data up to and including `delimiter`. Everything waiting in the input
+        buffer of the port is read with one call and kept in ``readBuffer``, so following lines are split from
+        memory without reading from the port again. If no `delimiter` arrives within the timeout of the port, the
+        data received so far is returned like ``serial.Serial.read_until`` does.
+
+        :param delimiter: end of a chunk, i.e. ``b'\\n'``
+        :type delimiter: ``bytes``
+        :param emitDeadline: time when queued data has to be emitted or ``None``. If the port stays silent until then
+            ``b''`` is returned and incomplete data stays in the buffer
+        :type emitDeadline: ``float``
+        :rtype: ``bytes``
+        """
         startTime = time()
-        byte_str = b''
+        timeout = self.serialArduino.timeout
+        hasRead = False
         while True:
-            if self.serialArduino.timeout is None:
-                if self.is_killed:
-                    break
-                byte = self.serialArduino.read()
-                byte_str += byte
-                if byte == b'\n':
-                    break
-            else:
-                if self.is_killed or time() - startTime >= self.serialArduino.timeout:
-                    break
-                byte = self.serialArduino.read()
-                byte_str += byte
-                if byte == b'\n':
-                    break
-        return byte_str
+            # continue the search where the last one ended, a delimiter may be split across two reads
+            searchStart = max(self.readPosition, self.readSearchPosition - len(delimiter) + 1)
+            end = self.readBuffer.find(delimiter, searchStart)
+            if end != -1:
+                return self.takeFromReadBuffer(end + len(delimiter))
+            self.readSearchPosition = len(self.readBuffer)
+
+            # the port is read at least once, so a timeout of 0 returns what is waiting
+            if self.is_killed or (hasRead and timeout is not None and time() - startTime >= timeout):
+                return self.takeFromReadBuffer(len(self.readBuffer))
+            if emitDeadline is not None:
+                waitDeadline = emitDeadline if timeout is None else min(emitDeadline, startTime + timeout)
+                if not self.waitForData(waitDeadline):
+                    hasRead = True
+                    if timeout is None or time() - startTime < timeout:
+                        return b''
+                    continue
+            # blocks up to the timeout of the port if nothing is waiting
+            self.readBuffer += self.serialArduino.read(max(1, self.serialArduino.in_waiting))
+            hasRead = True
+
+    def takeFromReadBuffer(self, end: int) -> bytes:
+        chunk = bytes(self.readBuffer[self.readPosition:end])
+        self.readPosition = end
+        if self.readPosition == len(self.readBuffer) or self.readPosition > READ_BUFFER_COMPACT_SIZE:
+            del self.readBuffer[:self.readPosition]
+            self.readSearchPosition = max(0, self.readSearchPosition - self.readPosition)
+            self.readPosition = 0
+        return chunk
 
     def changeMaxSignalRate(self, port, maxSignalRate: int):
         if port.upper() == "ALL" or port.upper() == self.serialParameters.port.upper():
@@ -876,8 +1029,9 @@ class Content(QDMNodeContentWidget):
         except:
             pass
 
-    def receiveSerialData(self, obj: SerialParameters, data):
-        self.node.sendDataFromSocket(data)
+    def receiveSerialData(self, obj: SerialParameters, data, times):
+        self.node.sendDataFromSocket(data, 0)
+        self.node.sendDataFromSocket(times, 1)
 
     def failedSendSerialData(self, obj: SerialParameters, data):
         print("FAILED TO SEND", obj.port, data)
@@ -909,7 +1063,10 @@ class GraphicsNode(QDMGraphicsNode):
 
 
 class Node_SerialConnection(Abstract_Node):
-    def __init__(self, scene: 'Scene', title: str = "Serial Connection", inputs: list = [VAR_TYPE_STR], outputs: list = [VAR_TYPE_STR]):
+    memoize = False
+    observed = True
+
+    def __init__(self, scene: 'Scene', title: str = "Serial Connection", inputs: list = [VAR_TYPE_STR], outputs: list = [VAR_TYPE_LIST, VAR_TYPE_LIST]):
         super().__init__(scene, title, inputs, outputs)
 
     def initInnerClasses(self):
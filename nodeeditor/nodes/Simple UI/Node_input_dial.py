@@ -62,6 +62,8 @@ class GraphicsNode(QDMGraphicsNode):
 
 
 class Node_DialInputNode(Abstract_Node):
+    memoize = False
+
     def __init__(self, scene: 'Scene', title: str = "Dial Input", inputs: list = [VAR_TYPE_NOT_DEFINED], outputs: list = [VAR_TYPE_INT]):
         super().__init__(scene, title, inputs, outputs)
 
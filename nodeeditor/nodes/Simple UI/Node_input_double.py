@@ -2,9 +2,15 @@ from PyQt5.QtWidgets import QHBoxLayout, QDoubleSpinBox, QAbstractSpinBox
 from nodeeditor.Abstract_Node import Abstract_Node
 from nodeeditor.node_content_widget import QDMNodeContentWidget
 from nodeeditor.node_graphics_node import QDMGraphicsNode
+from nodeeditor.node_headless import HeadlessNode
 from nodeeditor.var_type_conf import *
 
 
+def sendValue(node, value):
+    """Send `value` (the number of the spin box) from `node`, the `Node` or its `HeadlessNode`"""
+    node.sendDataFromSocket(float(value))
+
+
 class Content(QDMNodeContentWidget):
     def initUI(self):
         self.doubleSpinBox = QDoubleSpinBox()
@@ -18,7 +24,7 @@ class Content(QDMNodeContentWidget):
         self.setLayout(layout)
 
     def sendData(self):
-        self.node.sendDataFromSocket(self.doubleSpinBox.value())
+        sendValue(self.node, self.doubleSpinBox.value())
 
 
 class GraphicsNode(QDMGraphicsNode):
@@ -32,7 +38,25 @@ class GraphicsNode(QDMGraphicsNode):
         self.hidden_title_height = 0
 
 
+class Headless(HeadlessNode):
+    memoize = False
+
+    def sendData(self):
+        sendValue(self, self.getContentValue("QDoubleSpinBox", default=0.0))
+
+    def start(self):
+        self.sendData()
+
+    def receiveData(self, data, inputSocketIndex):
+        super().receiveData(data, inputSocketIndex)
+
+        self.sendData()
+
+
 class Node_DoubleNumberInputNode(Abstract_Node):
+    HeadlessNode_class = Headless
+    memoize = False
+
     def __init__(self, scene: 'Scene', title: str = "Double Input", inputs: list = [VAR_TYPE_NOT_DEFINED], outputs: list = [VAR_TYPE_FLOAT]):
         super().__init__(scene, title, inputs, outputs)
 
@@ -2,9 +2,15 @@ from PyQt5.QtWidgets import QHBoxLayout, QSpinBox, QAbstractSpinBox
 from nodeeditor.Abstract_Node import Abstract_Node
 from nodeeditor.node_content_widget import QDMNodeContentWidget
 from nodeeditor.node_graphics_node import QDMGraphicsNode
+from nodeeditor.node_headless import HeadlessNode
 from nodeeditor.var_type_conf import *
 
 
+def sendValue(node, value):
+    """Send `value` (the number of the spin box) from `node`, the `Node` or its `HeadlessNode`"""
+    node.sendDataFromSocket(int(value))
+
+
 class Content(QDMNodeContentWidget):
     def initUI(self):
         self.spinBox = QSpinBox()
@@ -17,7 +23,7 @@ class Content(QDMNodeContentWidget):
         self.setLayout(layout)
 
     def sendData(self):
-        self.node.sendDataFromSocket(self.spinBox.value())
+        sendValue(self.node, self.spinBox.value())
 
 
 class GraphicsNode(QDMGraphicsNode):
@@ -31,7 +37,25 @@ class GraphicsNode(QDMGraphicsNode):
         self.hidden_title_height = 0
 
 
+class Headless(HeadlessNode):
+    memoize = False
+
+    def sendData(self):
+        sendValue(self, self.getContentValue("QSpinBox", default=0))
+
+    def start(self):
+        self.sendData()
+
+    def receiveData(self, data, inputSocketIndex):
+        super().receiveData(data, inputSocketIndex)
+
+        self.sendData()
+
+
 class Node_IntNumberInputNode(Abstract_Node):
+    HeadlessNode_class = Headless
+    memoize = False
+
     def __init__(self, scene: 'Scene', title: str = "Int Input", inputs: list = [VAR_TYPE_NOT_DEFINED], outputs: list = [VAR_TYPE_INT]):
         super().__init__(scene, title, inputs, outputs)
 
@@ -2,9 +2,15 @@ from PyQt5.QtWidgets import QHBoxLayout, QTextEdit
 from nodeeditor.Abstract_Node import Abstract_Node
 from nodeeditor.node_content_widget import QDMNodeContentWidget
 from nodeeditor.node_graphics_node import QDMGraphicsNode
+from nodeeditor.node_headless import HeadlessNode
 from nodeeditor.var_type_conf import *
 
 
+def sendValue(node, value):
+    """Send `value` (the text of the text edit) from `node`, the `Node` or its `HeadlessNode`"""
+    node.sendDataFromSocket(str(value))
+
+
 class Content(QDMNodeContentWidget):
     def initUI(self):
         self.textEdit = QTextEdit("")
@@ -16,7 +22,7 @@ class Content(QDMNodeContentWidget):
         self.setLayout(layout)
 
     def sendData(self):
-        self.node.sendDataFromSocket(self.textEdit.toPlainText())
+        sendValue(self.node, self.textEdit.toPlainText())
 
 
 class GraphicsNode(QDMGraphicsNode):
@@ -30,7 +36,25 @@ class GraphicsNode(QDMGraphicsNode):
         self.hidden_title_height = 0
 
 
+class Headless(HeadlessNode):
+    memoize = False
+
+    def sendData(self):
+        sendValue(self, self.getContentValue("QTextEdit", default=""))
+
+    def start(self):
+        self.sendData()
+
+    def receiveData(self, data, inputSocketIndex):
+        super().receiveData(data, inputSocketIndex)
+
+        self.sendData()
+
+
 class Node_TextInputNode(Abstract_Node):
+    HeadlessNode_class = Headless
+    memoize = False
+
     def __init__(self, scene: 'Scene', title: str = "Text Input", inputs: list = [VAR_TYPE_NOT_DEFINED], outputs: list = [VAR_TYPE_STR]):
         super().__init__(scene, title, inputs, outputs)
 
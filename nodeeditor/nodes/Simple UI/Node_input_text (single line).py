@@ -2,9 +2,15 @@ from PyQt5.QtWidgets import QLineEdit, QHBoxLayout
 from nodeeditor.Abstract_Node import Abstract_Node
 from nodeeditor.node_content_widget import QDMNodeContentWidget
 from nodeeditor.node_graphics_node import QDMGraphicsNode
+from nodeeditor.node_headless import HeadlessNode
 from nodeeditor.var_type_conf import *
 
 
+def sendValue(node, value):
+    """Send `value` (the text of the line edit) from `node`, the `Node` or its `HeadlessNode`"""
+    node.sendDataFromSocket(str(value))
+
+
 class Content(QDMNodeContentWidget):
     def initUI(self):
         self.lineEdit = QLineEdit("")
@@ -15,7 +21,7 @@ class Content(QDMNodeContentWidget):
         self.setLayout(layout)
 
     def sendData(self):
-        self.node.sendDataFromSocket(self.lineEdit.text())
+        sendValue(self.node, self.lineEdit.text())
 
 
 class GraphicsNode(QDMGraphicsNode):
@@ -29,7 +35,25 @@ class GraphicsNode(QDMGraphicsNode):
         self.hidden_title_height = 0
 
 
+class Headless(HeadlessNode):
+    memoize = False
+
+    def sendData(self):
+        sendValue(self, self.getContentValue("QLineEdit", default=""))
+
+    def start(self):
+        self.sendData()
+
+    def receiveData(self, data, inputSocketIndex):
+        super().receiveData(data, inputSocketIndex)
+
+        self.sendData()
+
+
 class Node_TextLineInputNode(Abstract_Node):
+    HeadlessNode_class = Headless
+    memoize = False
+
     def __init__(self, scene: 'Scene', title: str = "Text Line Input", inputs: list = [VAR_TYPE_NOT_DEFINED], outputs: list = [VAR_TYPE_STR]):
         super().__init__(scene, title, inputs, outputs)
 
@@ -2,9 +2,17 @@ from PyQt5.QtWidgets import QHBoxLayout, QPushButton, QLabel
 from nodeeditor.Abstract_Node import Abstract_Node
 from nodeeditor.node_content_widget import QDMNodeContentWidget
 from nodeeditor.node_graphics_node import QDMGraphicsNode
+from nodeeditor.node_headless import HeadlessNode
 from nodeeditor.var_type_conf import *
 
 
+def formatLabelText(data) -> str:
+    """Text shown for `data`, numbers with 4 decimals"""
+    if type(data) in [int, float]:
+        data = "%.4f" % (data)
+    return str(data)
+
+
 class Content(QDMNodeContentWidget):
     def initUI(self):
         self.label = QLabel()
@@ -25,7 +33,15 @@ class GraphicsNode(QDMGraphicsNode):
         self.hidden_title_height = 0
 
 
+class Headless(HeadlessNode):
+    def receiveData(self, data, inputSocketIndex):
+        super().receiveData(data, inputSocketIndex)
+        print("%s: %s" % (self.title, formatLabelText(data)))
+
+
 class Node_TextLabelOutputNode(Abstract_Node):
+    HeadlessNode_class = Headless
+
     def __init__(self, scene: 'Scene', title: str = "Label Output", inputs: list = [VAR_TYPE_NOT_DEFINED], outputs: list = []):
         super().__init__(scene, title, inputs, outputs)
 
@@ -39,6 +55,4 @@ class Node_TextLabelOutputNode(Abstract_Node):
 
     def receiveData(self, data, inputSocketIndex):
         super().receiveData(data, inputSocketIndex)
-        if type(data) in [int, float]:
-            data = "%.4f" % (data)
-        self.content.label.setText(str(data))
+        self.content.label.setText(formatLabelText(data))
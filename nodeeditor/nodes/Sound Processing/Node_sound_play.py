@@ -138,6 +138,8 @@ class GraphicsNode(QDMGraphicsNode):
 
 
 class Node_SoundPlayNode(Abstract_Node):
+    memoize = False
+
     def __init__(self, scene: 'Scene', title: str = "Sound Play",
                  inputs: list = [VAR_TYPE_NOT_DEFINED,
                                  VAR_TYPE_NOT_DEFINED,
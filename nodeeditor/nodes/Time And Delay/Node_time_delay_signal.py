@@ -1,10 +1,11 @@
-from PyQt5.QtCore import QTimer
 from PyQt5.QtWidgets import QHBoxLayout, QSpinBox, QAbstractSpinBox
 from nodeeditor.Abstract_Node import Abstract_Node
 from nodeeditor.node_content_widget import QDMNodeContentWidget
 from nodeeditor.node_graphics_node import QDMGraphicsNode
 from nodeeditor.var_type_conf import *
 
+MAX_DELAYED_VALUES = 10000      #: maximal number of values waiting in one delay node, newer values are dropped
+
 
 class Content(QDMNodeContentWidget):
     def initUI(self):
@@ -37,6 +38,8 @@ class GraphicsNode(QDMGraphicsNode):
 
 
 class Node_TimeDelaySignalNode(Abstract_Node):
+    memoize = False
+
     def __init__(self, scene: 'Scene', title: str = "Delay Signal", inputs: list = [VAR_TYPE_NOT_DEFINED], outputs: list = [VAR_TYPE_NOT_DEFINED]):
         super().__init__(scene, title, inputs, outputs)
 
@@ -51,4 +54,7 @@ class Node_TimeDelaySignalNode(Abstract_Node):
 
     def receiveData(self, data, inputSocketIndex):
         super().receiveData(data, inputSocketIndex)
-        QTimer.singleShot(self.content.spinBox.value(), lambda: self.content.sendData(data))
+        if not self.scene.scheduler.schedule(self, self.content.spinBox.value(), self.content.sendData, (data,),
+                                             MAX_DELAYED_VALUES):
+            self.grNode.setToolTip("More than %d values are delayed, new values are dropped" % MAX_DELAYED_VALUES)
+            self.grNode.errorAnimation.startAnimation()
@@ -1,12 +1,106 @@
+from time import monotonic
+
 from PyQt5.QtCore import QTimer, pyqtSignal, QObject
 
+ANIMATION_FRAME_INTERVAL = 40       #: minimal milliseconds between two frames of all running animations
+ANIMATION_MAX_EVENT_RATE = 500      #: throttled animations started more often per second are skipped, ``0`` for no limit
+
+_animation_clock = None
+
+
+class AnimationClock(QObject):
+    """Single timer driving all running :class:`PropertyAnimator` instances.
+
+    The timer only runs while at least one animation is active. It ticks with the smallest ``interval`` of the
+    running animations, but never faster than its own `interval`. Restarts of an animation within one frame are
+    coalesced into one. Throttled animations (the evaluation flashes) are skipped while they are started more often
+    than ``max_event_rate`` times per second in total.
+    """
+    def __init__(self, interval: int = ANIMATION_FRAME_INTERVAL, max_event_rate: int = ANIMATION_MAX_EVENT_RATE):
+        super().__init__()
+        self.min_interval = interval
+        self.max_event_rate = max_event_rate
+        self._active = {}
+        self._last_frame = 0.0
+        self._window_start = monotonic()
+        self._window_count = 0
+        self._last_rate = 0.0
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(interval)
+        self.timer.timeout.connect(self.onFrame)
+
+    def getEventRate(self) -> float:
+        """Number of throttled animation starts per second measured in the last full second"""
+        return self._last_rate
+
+    def isThrottling(self) -> bool:
+        """Returns ``True`` if throttled animations are currently skipped"""
+        if self.max_event_rate <= 0: return False
+        return self._last_rate > self.max_event_rate or self._window_count > self.max_event_rate
+
+    def countEvent(self) -> bool:
+        """Count start of a throttled animation. Returns ``False`` if it should be skipped"""
+        now = monotonic()
+        elapsed = now - self._window_start
+        if elapsed >= 1.0:
+            self._last_rate = self._window_count / elapsed
+            self._window_start = now
+            self._window_count = 0
+        self._window_count += 1
+        return not self.isThrottling()
+
+    def getFrameInterval(self) -> int:
+        """Milliseconds between two frames for the running animations"""
+        intervals = [animator._interval for animator in self._active if animator._interval > 0]
+        return int(max(self.min_interval, min(intervals, default=self.min_interval)))
+
+    def updateFrameInterval(self):
+        interval = self.getFrameInterval()
+        if interval != self.timer.interval():
+            self.timer.setInterval(interval)
+
+    def addAnimator(self, animator: 'PropertyAnimator'):
+        self._active[animator] = None
+        if not self.timer.isActive():
+            self._last_frame = monotonic()
+            self.timer.setInterval(self.getFrameInterval())
+            self.timer.start()
+        elif animator._interval < self.timer.interval():
+            self.updateFrameInterval()
+
+    def removeAnimator(self, animator: 'PropertyAnimator'):
+        self._active.pop(animator, None)
+
+    def onFrame(self):
+        now = monotonic()
+        elapsed = (now - self._last_frame) * 1000.0
+        self._last_frame = now
+        finished = False
+        for animator in list(self._active):
+            if not animator.advanceAnimation(elapsed):
+                self._active.pop(animator, None)
+                finished = True
+        if not self._active:
+            self.timer.stop()
+        elif finished:
+            self.updateFrameInterval()
+
+
+def getAnimationClock() -> AnimationClock:
+    """Returns the :class:`AnimationClock` shared by all animations. It is created with the first animation"""
+    global _animation_clock
+    if _animation_clock is None:
+        _animation_clock = AnimationClock()
+    return _animation_clock
+
 
 class PropertyAnimator(QObject):
     start = pyqtSignal(float)
     update = pyqtSignal(float)
     stop = pyqtSignal(float)
 
-    def __init__(self, startValue: float = 0.0, endValue: float = 100.0, duration: float = 1000.0, interval: int = 100):
+    def __init__(self, startValue: float = 0.0, endValue: float = 100.0, duration: float = 1000.0, interval: int = 100, throttled: bool = False):
         super().__init__()
         self._start_value = startValue
         self._end_value = endValue
@@ -14,18 +108,26 @@ class PropertyAnimator(QObject):
         self._duration = duration
         self._current_time = 0.0
         self._interval = interval
-        self._animation_timer = QTimer()
-        self._animation_timer.timeout.connect(self.updateAnimationFrame)
         self._enable = True
+        self._throttled = throttled
+        self._restart = False
 
-    def updateAnimationFrame(self):
+    def advanceAnimation(self, elapsed: float) -> bool:
+        """Called by the :class:`AnimationClock` every frame. Returns ``False`` when the animation has finished"""
         if not self._enable:
-            self._animation_timer.stop()
             self._current_time = 0
             self.stop.emit(self._end_value)
-            return
+            return False
+
+        if self._restart:
+            self._restart = False
+            self._current_time = 0.0
+            self._value = self._start_value
+            self.update.emit(self._value)
+            self.start.emit(self._value)
+            return True
 
-        self._current_time += self._interval
+        self._current_time += elapsed
 
         if self._duration == 0:
             self._value = self._end_value
@@ -35,21 +137,30 @@ class PropertyAnimator(QObject):
         self.update.emit(self._value)
 
         if self._current_time >= self._duration:
-            self._animation_timer.stop()
             self._current_time = 0
             self.stop.emit(self._value)
+            return False
+        return True
 
     def startAnimation(self, interval: int = -1):
         if not self._enable:
             return
 
+        clock = getAnimationClock()
+        if self._throttled and not clock.countEvent():
+            return
+
         if interval != -1:
             self._interval = float(interval)
+        # the animation restarts with the next frame, so many restarts within one frame cost only one
+        self._restart = True
+        clock.addAnimator(self)
+
+    def cancelAnimation(self):
+        self._restart = False
         self._current_time = 0.0
-        self._value = self._start_value
-        self.update.emit(self._value)
-        self.start.emit(self._value)
-        self._animation_timer.start(self._interval)
+        if _animation_clock is not None:
+            _animation_clock.removeAnimator(self)
 
     def setStartValue(self, value: float):
         self._start_value = value
@@ -61,8 +172,12 @@ class PropertyAnimator(QObject):
         self._duration = value
 
     def setInterval(self, value: float):
+        """Milliseconds between two frames of this animation, it takes effect with the next start"""
         self._interval = value
 
+    def setThrottled(self, b: bool = True):
+        self._throttled = b
+
     def setEnable(self, b: bool = True):
         self._enable = b
 
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""
+A module containing helpers for the Math `Nodes` which work on single values as well as on blocks of samples
+(lists, tuples and NumPy arrays)
+"""
+import math
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def isBlock(value) -> bool:
+    """Returns ``True`` if `value` is a block of samples (list, tuple or NumPy array)
+
+    :rtype: ``bool``
+    """
+    return isinstance(value, (list, tuple)) or (np is not None and isinstance(value, np.ndarray))
+
+
+def formatValue(value) -> str:
+    """Returns short text for the labels of the Math `Nodes`. Blocks are not converted element by element"""
+    if isBlock(value):
+        return "[%d samples]" % len(value)
+    return str(value)
+
+
+def _broadcast(a, b) -> list:
+    """Pairs of elements of `a` and `b` where a single value is repeated for every sample (used without NumPy)"""
+    if not isBlock(a): return [(a, item) for item in b]
+    if not isBlock(b): return [(item, b) for item in a]
+    if len(a) != len(b):
+        raise ValueError("Blocks of different lengths %d and %d can't be combined" % (len(a), len(b)))
+    return list(zip(a, b))
+
+
+def _result(result, a, b):
+    """Blocks stay NumPy arrays if one of the inputs was an array, otherwise they are returned as lists"""
+    if np is not None and isinstance(result, np.ndarray) and not isinstance(a, np.ndarray) and not isinstance(b, np.ndarray):
+        return result.tolist()
+    return result
+
+
+def applyOperation(operation, a, b):
+    """
+    Apply binary `operation` (i.e. ``operator.add``) to `a` and `b`. Single values are combined directly, blocks are
+    broadcast against each other or against a single value and processed in one call
+
+    :param operation: function of two arguments
+    :param a: first operand, value or block
+    :param b: second operand, value or block
+    :return: value or block
+    """
+    if not isBlock(a) and not isBlock(b):
+        return operation(a, b)
+    if np is None:
+        return [operation(x, y) for x, y in _broadcast(a, b)]
+    return _result(operation(np.asarray(a), np.asarray(b)), a, b)
+
+
+def divide(a, b) -> tuple:
+    """
+    Divide `a` by `b`. Division by zero gives ``nan`` for single values and for every affected sample of a block,
+    so blocks keep their length
+
+    :param a: dividend, value or block
+    :param b: divisor, value or block
+    :return: ``(result, zero_count)`` where `zero_count` is the number of divisions by zero
+    :rtype: ``tuple``
+    """
+    if not isBlock(a) and not isBlock(b):
+        if b == 0:
+            return math.nan, 1
+        return a / b, 0
+
+    if np is None:
+        pairs = _broadcast(a, b)
+        return [x / y if y != 0 else math.nan for x, y in pairs], sum(1 for x, y in pairs if y == 0)
+
+    dividend, divisor = np.asarray(a, dtype=float), np.asarray(b, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        result = np.true_divide(dividend, divisor)
+    zero = divisor == 0
+    zero_count = int(np.count_nonzero(np.broadcast_to(zero, result.shape)))
+    if zero_count:
+        result = np.where(zero, np.nan, result)
+    return _result(result, a, b), zero_count
@@ -1,4 +1,6 @@
 import os
+import pyclbr
+import re
 import sys
 import traceback
 from pprint import PrettyPrinter
@@ -25,6 +27,50 @@ def getNodeEditorDirectory():
     return os.path.abspath(os.getcwd() + "/../../nodeeditor")
 
 
+def getNodeModuleName(path: str, fileName: str) -> str:
+    """
+    Returns dotted module name of the node module `fileName` located in `path`
+
+    :param path: path of the node module relative to the nodeeditor directory (i.e. ``nodes/Math``)
+    :type path: ``str``
+    :param fileName: module name without extension
+    :type fileName: ``str``
+    :rtype: ``str``
+    """
+    return path.replace(".", "").lstrip("/").replace("/", ".").replace("\\", ".") + "." + fileName
+
+
+def getNodeClassFromPath(path: str, fileName: str, root: str = ""):
+    """
+    Import the node module `fileName` located in `path` and return the first class which name starts with ``Node_``
+
+    :param path: path of the node module relative to the nodeeditor directory (i.e. ``nodes/Math``)
+    :type path: ``str``
+    :param fileName: module name without extension
+    :type fileName: ``str``
+    :param root: directory `path` is relative to. Current working directory if empty
+    :type root: ``str``
+    :return: `Node` class or ``None``
+    """
+    noteClass = None
+
+    try:
+        keys = list(pyclbr.readmodule(fileName, path=[os.path.join(root, path) if root else path]).keys())
+        r = re.compile("Node_.*")
+        noteClasses = list(filter(r.match, keys))
+        if noteClasses:
+            noteClass = noteClasses[0]
+        if noteClass:
+            module = __import__(getNodeModuleName(path, fileName), fromlist=[path.replace("/", ".")])
+            node_class = getattr(module, noteClass)
+            return node_class
+    except ImportError:
+        print("ImportError")
+    except Exception as e:
+        dumpException(e)
+    return None
+
+
 def suppress_stdout():
     with open(os.devnull, "w") as devnull:
         old_stdout = sys.stdout
@@ -0,0 +1,278 @@
+# -*- coding: utf-8 -*-
+"""
+A module containing the writer of recordings. Data is handed over to a background thread through a bounded queue,
+so the thread reading a device never waits for the disk.
+
+Besides text, recordings can be stored in a binary format: a short header (:data:`BINARY_RECORDING_MAGIC`, the
+length of a JSON description and the description itself) followed by records of fixed width, each consisting of
+the ``float64`` timestamp and the samples of one frame. The records are read back as a memory-mapped NumPy array.
+"""
+import os
+import json
+import struct
+import threading
+from collections import deque
+from time import monotonic
+
+import numpy as np
+
+from nodeeditor.utils_no_qt import dumpException
+
+DEBUG = False
+
+RECORDING_MAX_QUEUED_FRAMES = 1000000   #: frames waiting for the disk before new frames are dropped
+RECORDING_FLUSH_INTERVAL = 0.5          #: seconds between two writes of the queued data
+RECORDING_FSYNC_INTERVAL = 5.0          #: seconds between two ``os.fsync`` calls, ``0`` to never call it
+
+BINARY_RECORDING_MAGIC = b'NEREC\x00\x01\x00'    #: first bytes of binary recordings, the last two are the version
+BINARY_RECORDING_EXTENSION = ".nerec"
+
+
+class InvalidRecording(Exception): pass
+
+
+def getBinaryRecordDtype(width: int, sample_dtype: str = '<u2') -> np.dtype:
+    """Returns the structured dtype of one record with the fields ``time`` and ``samples``
+
+    :param width: number of samples per frame
+    :type width: ``int``
+    :param sample_dtype: NumPy dtype of the samples
+    :type sample_dtype: ``str``
+    :rtype: ``numpy.dtype``
+    """
+    return np.dtype([('time', '<f8'), ('samples', sample_dtype, (width,))])
+
+
+def packBinaryRecordingHeader(width: int, sample_dtype: str = '<u2', info: dict = None) -> bytes:
+    """
+    Returns the header of a binary recording. The header is padded so the records start at a multiple of 8 bytes
+
+    :param width: number of samples per frame
+    :type width: ``int``
+    :param sample_dtype: NumPy dtype of the samples
+    :type sample_dtype: ``str``
+    :param info: additional description stored in the header, i.e. port or identifier of the device
+    :type info: ``dict``
+    :rtype: ``bytes``
+    """
+    description = dict(info or {})
+    description.update({'width': width, 'sample_dtype': np.dtype(sample_dtype).str})
+    text = json.dumps(description).encode('utf-8')
+    text += b' ' * (-(len(BINARY_RECORDING_MAGIC) + 4 + len(text)) % 8)
+    return BINARY_RECORDING_MAGIC + struct.pack('<I', len(text)) + text
+
+
+def packBinaryRecords(times, samples, sample_dtype: str = '<u2') -> bytes:
+    """Returns records of frames with `times` (one per frame) and `samples` (2D, one row per frame)"""
+    samples = np.asarray(samples)
+    records = np.empty(len(samples), dtype=getBinaryRecordDtype(samples.shape[1], sample_dtype))
+    records['time'] = times
+    records['samples'] = samples
+    return records.tobytes()
+
+
+def openBinaryRecording(filePath: str) -> tuple:
+    """
+    Open binary recording without reading the records into memory. An incomplete record at the end, i.e. of a
+    recording which wasn't closed, is ignored
+
+    :param filePath: path of the recording
+    :type filePath: ``str``
+    :return: ``(description, records)`` where `records` is a read only memory-mapped structured array with the
+        fields ``time`` and ``samples``
+    :rtype: ``tuple``
+    :raises InvalidRecording: if the file isn't a binary recording
+    """
+    with open(filePath, 'rb') as file:
+        if file.read(len(BINARY_RECORDING_MAGIC)) != BINARY_RECORDING_MAGIC:
+            raise InvalidRecording("%s is not a binary recording" % os.path.basename(filePath))
+        length, = struct.unpack('<I', file.read(4))
+        try:
+            description = json.loads(file.read(length).decode('utf-8'))
+        except ValueError:
+            raise InvalidRecording("%s has an invalid header" % os.path.basename(filePath))
+    offset = len(BINARY_RECORDING_MAGIC) + 4 + length
+    dtype = getBinaryRecordDtype(description['width'], description['sample_dtype'])
+    count = (os.path.getsize(filePath) - offset) // dtype.itemsize
+    if count <= 0:
+        return description, np.empty(0, dtype=dtype)
+    return description, np.memmap(filePath, dtype=dtype, mode='r', offset=offset, shape=(count,))
+
+
+class RecordingWriter():
+    """Class writing a recording from a background thread.
+
+    :meth:`write` only queues the data. The thread writes everything queued in one call every ``flush_interval``
+    seconds and calls ``os.fsync`` every ``fsync_interval`` seconds. If ``max_file_size`` (bytes) or
+    ``max_file_duration`` (seconds) is set, the recording continues in a new file ``name_001.ext``,
+    ``name_002.ext``, ... when the current file gets too large or too old.
+    """
+    def __init__(self, filePath: str, max_queued_frames: int = RECORDING_MAX_QUEUED_FRAMES,
+                 flush_interval: float = RECORDING_FLUSH_INTERVAL, fsync_interval: float = RECORDING_FSYNC_INTERVAL,
+                 max_file_size: int = 0, max_file_duration: float = 0, fileHeader: 'function' = None,
+                 fileFooter: 'function' = None, mode: str = 'a'):
+        """
+        :param filePath: path of the first file of the recording
+        :type filePath: ``str``
+        :param max_queued_frames: maximal number of frames in the queue
+        :type max_queued_frames: ``int``
+        :param flush_interval: seconds between two writes
+        :type flush_interval: ``float``
+        :param fsync_interval: seconds between two ``os.fsync`` calls, ``0`` to never call it
+        :type fsync_interval: ``float``
+        :param max_file_size: size in bytes after which a new file is started, ``0`` for no limit
+        :type max_file_size: ``int``
+        :param max_file_duration: seconds after which a new file is started, ``0`` for no limit
+        :type max_file_duration: ``float``
+        :param fileHeader: function returning the data written at the beginning of every file
+        :type fileHeader: ``function``
+        :param fileFooter: function returning the data written at the end of every file
+        :type fileFooter: ``function``
+        :param mode: ``'a'`` or ``'w'`` for text, ``'ab'`` or ``'wb'`` for binary recordings
+        :type mode: ``str``
+
+        :Instance Attributes:
+
+        - **filePath** - path of the file currently written
+        - **file_count** - number of files of the recording
+        - **queued_count** - number of frames accepted by :meth:`write`
+        - **written_count** - number of frames written to the disk
+        - **dropped_count** - number of frames dropped because the queue was full or writing failed
+        - **error** - exception which stopped the writer or ``None``
+        """
+        self.firstFilePath = filePath
+        self.filePath = filePath
+        self.max_queued_frames = max_queued_frames
+        self.flush_interval = flush_interval
+        self.fsync_interval = fsync_interval
+        self.max_file_size = max_file_size
+        self.max_file_duration = max_file_duration
+        self.fileHeader = fileHeader
+        self.fileFooter = fileFooter
+        self.mode = mode
+
+        self.file_count = 0
+        self.queued_count = 0
+        self.written_count = 0
+        self.dropped_count = 0
+        self.error = None
+
+        self._queue = deque()
+        self._queued_frames = 0
+        self._closing = False
+        self._condition = threading.Condition()
+        self._file = None
+        self._thread = threading.Thread(target=self.run, name="RecordingWriter", daemon=True)
+        self._thread.start()
+
+    def getQueuedFrames(self) -> int:
+        """Returns number of frames waiting for the disk
+
+        :rtype: ``int``
+        """
+        return self._queued_frames
+
+    def write(self, data, frames: int = 1) -> bool:
+        """
+        Queue `data` for writing
+
+        :param data: ``str`` or ``bytes`` depending on the mode of the writer
+        :param frames: number of frames contained in `data`, used for the limit of the queue and the counters
+        :type frames: ``int``
+        :return: ``False`` if `data` was dropped because the queue is full or the writer is closed
+        :rtype: ``bool``
+        """
+        with self._condition:
+            if self._closing or self.error is not None or self._queued_frames + frames > self.max_queued_frames:
+                self.dropped_count += frames
+                return False
+            self._queue.append((data, frames))
+            self._queued_frames += frames
+            self.queued_count += frames
+        return True
+
+    def close(self, timeout: float = None):
+        """
+        Write all queued data, close the file and stop the thread
+
+        :param timeout: seconds to wait for the thread, ``None`` to wait until everything is written and ``0`` to
+            return at once while the thread finishes in the background
+        :type timeout: ``float``
+        :return: ``True`` if the thread has finished
+        :rtype: ``bool``
+        """
+        with self._condition:
+            self._closing = True
+            self._condition.notify()
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
+
+    def getRotatedFilePath(self, index: int) -> str:
+        if index == 0: return self.firstFilePath
+        name, extension = os.path.splitext(self.firstFilePath)
+        return "%s_%03d%s" % (name, index, extension)
+
+    def openFile(self):
+        self.filePath = self.getRotatedFilePath(self.file_count)
+        self._file = open(self.filePath, self.mode)
+        self.file_count += 1
+        self._file_started = monotonic()
+        if self.fileHeader is not None:
+            self._file.write(self.fileHeader())
+
+    def closeFile(self):
+        if self._file is None: return
+        if self.fileFooter is not None:
+            self._file.write(self.fileFooter())
+        self._file.flush()
+        if self.fsync_interval > 0:
+            os.fsync(self._file.fileno())
+        self._file.close()
+        self._file = None
+
+    def needsRotation(self) -> bool:
+        if self.max_file_size > 0 and self._file.tell() >= self.max_file_size: return True
+        if self.max_file_duration > 0 and monotonic() - self._file_started >= self.max_file_duration: return True
+        return False
+
+    def run(self):
+        last_fsync = monotonic()
+        pending = 0
+        try:
+            self.openFile()
+            while True:
+                with self._condition:
+                    if not self._closing:
+                        self._condition.wait(self.flush_interval)
+                    batch, self._queue = self._queue, deque()
+                    pending, self._queued_frames = self._queued_frames, 0
+                    closing = self._closing
+
+                if batch:
+                    if self.needsRotation():
+                        self.closeFile()
+                        self.openFile()
+                    self._file.write(batch[0][0][:0].join(data for data, frames in batch))
+                    self._file.flush()
+                    self.written_count += pending
+                    pending = 0
+
+                if closing:
+                    break
+                if self.fsync_interval > 0 and monotonic() - last_fsync >= self.fsync_interval:
+                    os.fsync(self._file.fileno())
+                    last_fsync = monotonic()
+            self.closeFile()
+        except Exception as e:
+            dumpException(e)
+            with self._condition:
+                self.error = e
+                self.dropped_count += pending + self._queued_frames
+                self._queue.clear()
+                self._queued_frames = 0
+            try:
+                if self._file is not None: self._file.close()
+            except Exception: pass
+        if DEBUG or self.dropped_count:
+            print("RECORDING: %s written %d, dropped %d frames in %d files" %
+                  (self.firstFilePath, self.written_count, self.dropped_count, self.file_count))
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+"""
+A module containing helpers for the Serial `Nodes`, i.e. the decoder of the frames sent by WU devices.
+
+A WU device frame consists of the sync bytes ``0xAA 0x55``, the two byte identifier `Kennbin` whose first byte
+(`Kennung`) is the number of channels, ``Kennung + 1`` big-endian 16 bit words and a CRC16-Modbus over the
+identifier and the words, sent big-endian as well.
+"""
+import numpy as np
+
+WU_SYNC = b'\xaa\x55'           #: sync bytes at the start of every WU device frame
+WU_STATUS_OK = 0x4f4b           #: status word (``"OK"``) appended to frames with valid CRC
+WU_STATUS_FAIL = 0x4650         #: status word (``"FP"``) appended to frames with invalid CRC
+
+
+def _crcTable() -> np.ndarray:
+    table = np.zeros(256, dtype=np.uint16)
+    for byte in range(256):
+        crc = byte
+        for _ in range(8):
+            crc = (crc >> 1) ^ 0xA001 if crc & 1 else crc >> 1
+        table[byte] = crc
+    return table
+
+
+CRC16_MODBUS_TABLE = _crcTable()
+
+
+def crc16Modbus(data: np.ndarray) -> np.ndarray:
+    """
+    CRC16-Modbus of every row of `data`. The table lookup runs once per column for all rows together
+
+    :param data: 2D array of ``uint8``, one message per row
+    :type data: ``numpy.ndarray``
+    :return: ``uint16`` array with one CRC per row
+    :rtype: ``numpy.ndarray``
+    """
+    data = np.asarray(data, dtype=np.uint8).reshape(len(data), -1)
+    crc = np.full(len(data), 0xFFFF, dtype=np.uint16)
+    for column in data.T:
+        crc = (crc >> 8) ^ CRC16_MODBUS_TABLE[(crc ^ column) & 0xFF]
+    return crc
+
+
+class WUFrameDecoder():
+    """Class decoding WU device frames from a byte stream.
+
+    Received bytes are collected with :meth:`decode`. All complete frames in the buffer are decoded at once,
+    incomplete frames at the end are kept for the next call. Bytes in front of the sync bytes are skipped.
+    """
+    def __init__(self):
+        """
+        :Instance Attributes:
+
+        - **buffer** - ``bytearray`` with the received bytes which aren't decoded yet
+        - **frame_count** - number of decoded frames
+        - **fail_count** - number of decoded frames with invalid CRC
+        """
+        self.buffer = bytearray()
+        self.frame_count = 0
+        self.fail_count = 0
+
+    def clear(self):
+        self.buffer = bytearray()
+
+    def findFrames(self, data: np.ndarray) -> tuple:
+        """Start positions of all complete frames in `data` and the position where the next frame may start"""
+        sync = np.flatnonzero((data[:-1] == WU_SYNC[0]) & (data[1:] == WU_SYNC[1]))
+        starts, position = [], 0
+        for start in sync.tolist():
+            if start < position:
+                continue        # sync bytes inside the previous frame
+            if start + 4 > len(data):
+                return starts, start
+            end = start + 4 + 2 * int(data[start + 2]) + 4
+            if end > len(data):
+                return starts, start
+            starts.append(start)
+            position = end
+        # keep a trailing 0xAA, it may be the first sync byte of the next frame
+        if len(data) > position and data[-1] == WU_SYNC[0]:
+            return starts, len(data) - 1
+        return starts, len(data)
+
+    def decode(self, chunk: bytes = b'') -> list:
+        """
+        Append `chunk` to the buffer and decode all complete frames
+
+        :param chunk: received bytes
+        :type chunk: ``bytes``
+        :return: list of ``(kennbin, frames)`` in the order the identifiers were first received. `frames` is a
+            structured array with the fields ``words`` (``uint16`` words of a frame, including the sent CRC and
+            followed by :data:`WU_STATUS_OK` or :data:`WU_STATUS_FAIL`), ``crc_ok`` and ``sequence`` (number of
+            the frame in the stream)
+        :rtype: ``list``
+        """
+        self.buffer += chunk
+        if len(self.buffer) < 4:
+            return []
+        data = np.frombuffer(bytes(self.buffer), dtype=np.uint8)
+        starts, consumed = self.findFrames(data)
+        del self.buffer[:consumed]
+        if not starts:
+            return []
+
+        starts = np.asarray(starts)
+        sequence = np.arange(self.frame_count, self.frame_count + len(starts), dtype=np.int64)
+        self.frame_count += len(starts)
+
+        identifiers = data[starts + 2].astype(np.uint16) << 8 | data[starts + 3]
+        groups = []
+        for identifier in dict.fromkeys(identifiers.tolist()):
+            selected = identifiers == identifier
+            group_starts = starts[selected]
+            length = 2 * (identifier >> 8) + 4
+            # rows of all frames of the same identifier, from the identifier up to the CRC
+            frames = data[group_starts[:, None] + np.arange(2, 4 + length)]
+            words = frames[:, 2:].copy().view('>u2').astype(np.uint16)
+            crc_ok = crc16Modbus(frames[:, :-2]) == words[:, -1]
+            self.fail_count += int(np.count_nonzero(~crc_ok))
+
+            result = np.empty(len(group_starts), dtype=[('words', np.uint16, (words.shape[1] + 1,)),
+                                                        ('crc_ok', np.bool_), ('sequence', np.int64)])
+            result['words'][:, :-1] = words
+            result['words'][:, -1] = np.where(crc_ok, WU_STATUS_OK, WU_STATUS_FAIL)
+            result['crc_ok'] = crc_ok
+            result['sequence'] = sequence[selected]
+            groups.append((bytes(frames[0, :2]), result))
+        return groups
+
+
+def formatWUFrames(groups: list) -> str:
+    """Text of decoded frames as used by recordings, one line of hex words per frame in the order of receipt"""
+    lines = [(sequence, ' '.join('%04x' % word for word in words))
+             for kennbin, frames in groups for words, sequence in zip(frames['words'].tolist(), frames['sequence'].tolist())]
+    lines.sort()
+    return ''.join(line + "\n" for sequence, line in lines)